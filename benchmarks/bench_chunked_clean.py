@@ -0,0 +1,82 @@
+"""
+Peak-memory benchmark: whole-file cleaning vs. chunked cleaning of a large raw CSV.
+
+A large raw file is built by repeating `data/raw_data.csv`, then cleaned to CSV:
+- whole:    `read_fund_csv` + `clean_and_format_fund_data` + `to_csv` (memory grows with the file)
+- chunked:  `clean_csv_in_chunks` (memory set by the chunk size)
+
+Each variant runs in its own subprocess so its peak RSS (`ru_maxrss`) is measured in isolation,
+and the two outputs are compared byte for byte.
+
+Usage:
+    python benchmarks/bench_chunked_clean.py [--repeat 200] [--chunk-size 50000] [--workers 1]
+"""
+
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_RUNNER = """
+import resource, sys, time
+sys.path.insert(0, {root!r})
+from fund_fetcher.chunked import clean_csv_in_chunks
+from fund_fetcher.fetch_utt import UTT_DATE_FORMAT, clean_and_format_fund_data, read_fund_csv
+
+rules = dict(
+    date_column="Date Valued",
+    bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
+    decimal_columns=["Nav Per Unit", "Sale Price per Unit", "Repurchase Price/Unit"],
+    date_format=UTT_DATE_FORMAT,
+)
+start = time.perf_counter()
+if {mode!r} == "whole":
+    clean_and_format_fund_data(read_fund_csv({source!r}), **rules).to_csv({output!r}, index=False)
+else:
+    clean_csv_in_chunks({source!r}, {output!r}, chunk_size={chunk_size}, workers={workers}, **rules)
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def run(mode, source, output, chunk_size, workers):
+    code = _RUNNER.format(root=ROOT, mode=mode, source=source, output=output, chunk_size=chunk_size, workers=workers)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    seconds, max_rss_kb = result.stdout.split()[-2:]
+    return float(seconds), int(max_rss_kb) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200, help="copies of data/raw_data.csv (5000 rows each)")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "raw.csv")
+        with open(os.path.join(ROOT, "data", "raw_data.csv"), encoding="utf-8") as file:
+            header, *lines = file.read().splitlines(keepends=True)
+        with open(source, "w", encoding="utf-8") as file:
+            file.write(header)
+            for _ in range(args.repeat):
+                file.writelines(lines)
+        rows = len(lines) * args.repeat
+        print(f"{rows:,} rows, {os.path.getsize(source) / 1e6:.0f} MB raw CSV")
+
+        outputs = {}
+        for mode in ("whole", "chunked"):
+            outputs[mode] = os.path.join(tmp, f"{mode}.csv")
+            seconds, peak_mb = run(mode, source, outputs[mode], args.chunk_size, args.workers)
+            print(f"{mode:8s} {seconds:6.2f}s  peak RSS {peak_mb:7.0f} MB")
+
+        same = filecmp.cmp(outputs["whole"], outputs["chunked"], shallow=False)
+        print("outputs identical" if same else "❌ outputs differ")
+        sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
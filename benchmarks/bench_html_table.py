@@ -0,0 +1,104 @@
+"""
+HTML table extraction benchmark: BeautifulSoup tree vs. the streaming parser.
+
+Two page fixtures are built from the committed dataset, in the markup UTT AMIS uses
+(`<table id="data_table" class="table">` with a thead and a tbody):
+- the 5000 rows of data/raw_data.csv (one "Max (5000)" page),
+- a synthetic page of --rows rows (default 100,000), made by repeating those rows.
+
+Each page is parsed with the legacy `BeautifulSoup(html, "html.parser")` approach and with
+`fund_fetcher.html_table.stream_fund_table`; wall time and peak traced memory are reported
+and the extracted rows are checked to be identical.
+
+Usage:
+    python benchmarks/bench_html_table.py [--rows 100000]
+"""
+
+import argparse
+import csv
+import html
+import os
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from fund_fetcher.html_table import stream_fund_table  # noqa: E402
+
+RAW_DATA_PATH = os.path.join(REPO_ROOT, "data", "raw_data.csv")
+
+
+def build_page(headers, rows):
+    """Return an HTML page holding `rows` in a UTT AMIS-style DataTables table."""
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+    body = "\n".join(
+        "<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>" for row in rows
+    )
+    return (
+        "<html><head><title>Fund Performance</title></head><body>"
+        '<select name="data_table_length"><option value="5000">Max (5000)</option></select>'
+        f'<table id="data_table" class="table table-striped"><thead><tr>{head}</tr></thead>'
+        f"<tbody>\n{body}\n</tbody></table></body></html>"
+    )
+
+
+def legacy_parse(page):
+    # The BeautifulSoup extraction the scraper used before the streaming parser
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, "html.parser")
+    table = soup.find("table", class_="table")
+    headers = [th.text.strip() for th in table.select("thead th")]
+    rows = [[td.text.strip() for td in tr.select("td")] for tr in table.select("tbody tr")]
+    return headers, rows
+
+
+def streaming_parse(page):
+    headers, rows = stream_fund_table(page)
+    return headers, list(rows)
+
+
+def measure(fn, page):
+    # Time an untraced run first (tracemalloc slows allocation-heavy code several times over),
+    # then repeat the run under tracemalloc for the peak memory
+    start = time.perf_counter()
+    result = fn(page)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def run(label, page):
+    print(f"{label} ({len(page) / 2**20:.1f} MiB of HTML)")
+    legacy, t_legacy, m_legacy = measure(legacy_parse, page)
+    stream, t_stream, m_stream = measure(streaming_parse, page)
+    print(f"  BeautifulSoup  {t_legacy:8.3f} s  peak {m_legacy:8.1f} MiB")
+    print(f"  streaming      {t_stream:8.3f} s  peak {m_stream:8.1f} MiB")
+    if legacy != stream:
+        raise SystemExit("❌ Streaming parser output differs from BeautifulSoup")
+    print(f"  ✅ identical rows; {t_legacy / t_stream:.1f}x faster, {m_legacy / m_stream:.1f}x less memory")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare BeautifulSoup and streaming table extraction")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows in the synthetic page")
+    args = parser.parse_args(argv)
+
+    with open(RAW_DATA_PATH, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        rows = list(reader)
+
+    run(f"{len(rows)}-row page", build_page(headers, rows))
+    synthetic = [rows[i % len(rows)] for i in range(args.rows)]
+    run(f"{args.rows}-row synthetic page", build_page(headers, synthetic))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Import-time benchmark for the fund_fetcher package.
+
+Each measurement runs in a fresh interpreter so nothing is already cached in
+`sys.modules`. Two things are checked:
+- `import fund_fetcher` stays within the import budget
+- reaching the cleaning functions never pulls in the scraping or database stack
+  (Selenium, webdriver-manager, BeautifulSoup, psycopg2, SQLAlchemy)
+
+Usage:
+    python benchmarks/bench_import.py [--budget-ms 50] [--clean-budget-ms 2000] [--runs 5]
+
+Exits with status 1 when a budget is exceeded or a heavy module was imported.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must never be imported just to use the cleaning functions
+HEAVY_MODULES = ["selenium", "webdriver_manager", "bs4", "psycopg2", "sqlalchemy"]
+
+# Code executed in the child interpreter; prints one JSON line with the timings
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import fund_fetcher
+t1 = time.perf_counter()
+from fund_fetcher import clean_and_format_fund_data
+t2 = time.perf_counter()
+heavy = sorted({m.split(".")[0] for m in sys.modules} & set(%r))
+print(json.dumps({"package_ms": (t1 - t0) * 1000, "clean_ms": (t2 - t0) * 1000, "heavy": heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_once():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="max time for a bare `import fund_fetcher`")
+    parser.add_argument("--clean-budget-ms", type=float, default=2000.0,
+                        help="max time until the cleaning functions are usable (includes pandas)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    samples = [measure_once() for _ in range(args.runs)]
+    package_ms = min(s["package_ms"] for s in samples)  # Best-of-N removes scheduler noise
+    clean_ms = min(s["clean_ms"] for s in samples)
+    heavy = sorted({m for s in samples for m in s["heavy"]})
+
+    print(f"import fund_fetcher:          {package_ms:8.2f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"cleaning functions available: {clean_ms:8.2f} ms (budget {args.clean_budget_ms:.0f} ms)")
+
+    failed = False
+    if package_ms > args.budget_ms:
+        print("❌ Package import exceeded its budget")
+        failed = True
+    if clean_ms > args.clean_budget_ms:
+        print("❌ Cleaning import exceeded its budget")
+        failed = True
+    if heavy:
+        print(f"❌ Heavy modules imported on the cleaning path: {', '.join(heavy)}")
+        failed = True
+    if not failed:
+        print("✅ Import budget respected")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
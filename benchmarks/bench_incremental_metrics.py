@@ -0,0 +1,65 @@
+"""
+Timing benchmark: incremental metric updates vs. a full recomputation.
+
+The cleaned dataset is replayed day by day: the metrics are first built from the older
+part of the history, then `update_metrics` is run once per newly valued day and timed
+against `materialize_metrics` on the whole history. Both storage tiers are timed (a CSV
+file and a year-partitioned Parquet dataset).
+
+That the incremental results equal the full recomputation is checked by the test suite
+(tests/test_analytics.py).
+
+Usage:
+    python benchmarks/bench_incremental_metrics.py [--data data/cleaned_data.csv] [--days 30]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fund_fetcher.analytics import DATE_COLUMN, materialize_metrics, update_metrics  # noqa: E402
+
+
+def replay(cleaned, metrics_path, state_path, days):
+    """Return the seconds spent in the daily `update_metrics` calls of the last `days` days."""
+    dates = np.sort(pd.to_datetime(cleaned[DATE_COLUMN]).unique())
+    cut = dates[-days - 1] if days < len(dates) else dates[0]
+    parsed = pd.to_datetime(cleaned[DATE_COLUMN])
+
+    update_metrics(cleaned[parsed <= cut], metrics_path, state_path)
+    seconds = 0.0
+    for day in dates[dates > cut]:
+        start = time.perf_counter()
+        update_metrics(cleaned[parsed <= day], metrics_path, state_path)
+        seconds += time.perf_counter() - start
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default="data/cleaned_data.csv")
+    parser.add_argument("--days", type=int, default=30, help="number of trailing days replayed one by one")
+    args = parser.parse_args()
+
+    cleaned = pd.read_csv(args.data)
+    with tempfile.TemporaryDirectory() as tmp:
+        for tier, metrics_name in [("csv", "metrics.csv"), ("parquet", "metrics_parquet/")]:
+            metrics_path = os.path.join(tmp, metrics_name)
+            seconds = replay(cleaned, metrics_path, os.path.join(tmp, f"state_{tier}.json"), args.days)
+
+            start = time.perf_counter()
+            materialize_metrics(cleaned, os.path.join(tmp, f"full_{metrics_name}"))
+            full_seconds = time.perf_counter() - start
+            print(f"{tier:8s} {args.days} daily updates: {seconds:.2f}s "
+                  f"({seconds / args.days * 1000:.1f} ms each); full rebuild: {full_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
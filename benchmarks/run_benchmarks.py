@@ -0,0 +1,322 @@
+"""
+Benchmark suite for the parse, clean, load and analytics paths, with stored results and a
+regression check.
+
+For each size in --rows, a deterministic synthetic UTT-shaped dataset is generated once
+(see `benchmarks/synthetic.py`, cached in benchmarks/.data/) and these cases are timed:
+- html_extract:        `stream_fund_table` over the dataset rendered as 5000-row HTML pages
+- clean_basic:         `clean_fund_data_basic` on the raw text columns
+- clean_and_format:    `clean_and_format_fund_data` (numbers and dd-mm-YYYY dates)
+- process_fund_csv:    `process_fund_csv` on the raw CSV, whole file
+- process_fund_csv_chunked:  the same in 100,000-row chunks
+- compute_metrics:     `analytics.compute_metrics` on the cleaned data
+- db_load:             `create_utt_table` + `upsert_utt_data` into an empty table, in a
+                       throwaway `fundfetch_bench` schema of the configured database
+                       (FUNDFETCH_DATABASE_URL / scripts/config.py); skipped if it is unreachable
+
+Every case runs --repeat times and the fastest run is kept. Results are appended to
+benchmarks/results/<host>.jsonl together with the git commit, so runs on different commits
+of the same machine can be compared. Unless --no-compare is given, each case is compared
+with the latest stored result of the same case and size from a different commit (or from
+--baseline COMMIT); the script exits with status 1 if any case is slower than the baseline
+by more than --threshold (default 25%).
+
+Usage:
+    python benchmarks/run_benchmarks.py [--rows 5000 100000] [--cases clean_basic db_load]
+                                        [--repeat 3] [--threshold 0.25] [--baseline COMMIT]
+Sizes accept k/M suffixes (--rows 5k 1M 10M); 10M rows need several GB of memory.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import cached_raw_csv, html_pages, shape_for_rows  # noqa: E402
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+BIGINT_COLUMNS = ["Net Asset Value", "Outstanding Number of Units"]
+DECIMAL_COLUMNS = ["Nav Per Unit", "Sale Price per Unit", "Repurchase Price/Unit"]
+DATE_COLUMN = "Date Valued"
+BENCH_SCHEMA = "fundfetch_bench"
+
+
+def parse_rows(text):
+    """Parse a row count like "5000", "100k" or "10M"."""
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def git_commit():
+    # (commit, dirty) of the working tree, or ("unknown", False) outside a git checkout
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+# === Cases ===
+# Each case takes the prepared inputs and returns (setup, run): `setup()` builds fresh
+# arguments outside the timed region, `run(args)` is the timed call.
+
+def case_html_extract(data):
+    from fund_fetcher.html_table import stream_fund_table
+
+    pages = data.pages()
+
+    def run(_):
+        for page in pages:
+            _, rows = stream_fund_table(page)
+            for _ in rows:
+                pass
+    return (lambda: None), run
+
+
+def case_clean_basic(data):
+    from fund_fetcher.fetch_utt import clean_fund_data_basic
+
+    return (lambda: data.raw.copy()), lambda df: clean_fund_data_basic(df, BIGINT_COLUMNS, DECIMAL_COLUMNS)
+
+
+def case_clean_and_format(data):
+    from fund_fetcher.fetch_utt import UTT_DATE_FORMAT, clean_and_format_fund_data
+
+    def run(df):
+        clean_and_format_fund_data(
+            df, date_column=DATE_COLUMN, bigint_columns=BIGINT_COLUMNS, decimal_columns=DECIMAL_COLUMNS,
+            date_format=UTT_DATE_FORMAT,
+        )
+    return (lambda: data.raw.copy()), run
+
+
+def _process_fund_csv(data, chunk_size):
+    from fund_fetcher.fetch_utt import process_fund_csv
+
+    output = os.path.join(data.tmp_dir, "utt_cleaned.csv")
+    return (lambda: None), lambda _: process_fund_csv(data.csv_path, chunk_size=chunk_size, output_path=output)
+
+
+def case_process_fund_csv(data):
+    return _process_fund_csv(data, None)
+
+
+def case_process_fund_csv_chunked(data):
+    return _process_fund_csv(data, 100_000)
+
+
+def case_compute_metrics(data):
+    from fund_fetcher.analytics import compute_metrics
+
+    cleaned = data.cleaned()
+    return (lambda: None), lambda _: compute_metrics(cleaned)
+
+
+def case_db_load(data):
+    from fund_fetcher.db import raw_connection
+    from fund_fetcher.fetch_utt import create_utt_table, upsert_utt_data
+
+    cleaned = data.cleaned()
+    conn = data.resources.enter_context(raw_connection())  # Fails here, untimed, without a database
+    data.resources.callback(_drop_bench_schema, conn)
+
+    def setup():
+        cursor = conn.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        cursor.execute(f"SET search_path TO {BENCH_SCHEMA}")  # utt_data below is the bench table
+        conn.commit()
+        cursor.close()
+
+    def run(_):
+        create_utt_table(conn)
+        upsert_utt_data(cleaned, conn=conn)
+    return setup, run
+
+
+def _drop_bench_schema(conn):
+    conn.rollback()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cursor.execute("RESET search_path")  # The connection goes back to the shared pool
+    conn.commit()
+    cursor.close()
+
+
+CASES = {
+    "html_extract": case_html_extract,
+    "clean_basic": case_clean_basic,
+    "clean_and_format": case_clean_and_format,
+    "process_fund_csv": case_process_fund_csv,
+    "process_fund_csv_chunked": case_process_fund_csv_chunked,
+    "compute_metrics": case_compute_metrics,
+    "db_load": case_db_load,
+}
+
+
+class BenchData:
+    """Inputs for one dataset size, built lazily and shared by the cases."""
+
+    def __init__(self, rows, seed, tmp_dir):
+        self.rows = rows
+        self.tmp_dir = tmp_dir
+        self.csv_path = cached_raw_csv(rows, seed)
+        self.raw = pd.read_csv(self.csv_path, dtype=str)  # As scraped: every value is text
+        self.resources = ExitStack()  # Connections etc. held by the cases until the size is done
+        self._pages = None
+        self._cleaned = None
+
+    def pages(self):
+        if self._pages is None:
+            self._pages = list(html_pages(self.raw))
+        return self._pages
+
+    def cleaned(self):
+        if self._cleaned is None:
+            from fund_fetcher.fetch_utt import UTT_DATE_FORMAT, clean_and_format_fund_data
+
+            self._cleaned = clean_and_format_fund_data(
+                self.raw.copy(), date_column=DATE_COLUMN, bigint_columns=BIGINT_COLUMNS,
+                decimal_columns=DECIMAL_COLUMNS, date_format=UTT_DATE_FORMAT,
+            )
+            self._cleaned["#"] = self._cleaned["#"].astype(int)
+        return self._cleaned
+
+    def close(self):
+        self.resources.close()
+
+
+def time_case(name, data, repeat):
+    # Fastest of `repeat` runs, in seconds; the case's own prints are kept out of the report
+    import contextlib
+    import io
+
+    setup, run = CASES[name](data)
+    best = None
+    for _ in range(repeat):
+        args = setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run(args)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# === Stored results ===
+
+def results_path(host=None):
+    return os.path.join(RESULTS_DIR, f"{host or socket.gethostname()}.jsonl")
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+
+
+def find_baseline(history, result, baseline_commit=None):
+    """Latest stored result of the same case and size from `baseline_commit` (or any other commit)."""
+    for previous in reversed(history):
+        if previous["case"] != result["case"] or previous["rows"] != result["rows"]:
+            continue
+        if baseline_commit is not None:
+            if previous["commit"].startswith(baseline_commit):
+                return previous
+        elif previous["commit"] != result["commit"]:
+            return previous
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the parse, clean, load and analytics paths")
+    parser.add_argument("--rows", nargs="+", type=parse_rows, default=[5000, 100_000], help="dataset sizes")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is kept")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs. the baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", help="commit to compare with (default: the latest other commit stored)")
+    parser.add_argument("--results", default=results_path(), help="JSON-lines results file")
+    parser.add_argument("--no-save", action="store_true", help="do not store this run's results")
+    parser.add_argument("--no-compare", action="store_true", help="do not compare with stored results")
+    args = parser.parse_args(argv)
+
+    commit, dirty = git_commit()
+    history = load_results(args.results)
+    run_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    results, regressions = [], []
+    print(f"Commit {commit}{' (uncommitted changes)' if dirty else ''}, Python {platform.python_version()}")
+
+    tmp_dir = tempfile.mkdtemp(prefix="fundfetch-bench-")
+    try:
+        for rows in args.rows:
+            schemes, days = shape_for_rows(rows)
+            print(f"\n{rows:,} rows ({schemes} schemes x {days} days)")
+            data = BenchData(rows, args.seed, tmp_dir)
+            try:
+                for name in args.cases:
+                    try:
+                        seconds = time_case(name, data, args.repeat)
+                    except Exception as exc:  # e.g. no database configured for db_load
+                        print(f"  {name:26s} ⚠️ skipped: {type(exc).__name__}: {str(exc).splitlines()[0]}")
+                        continue
+                    result = {
+                        "case": name, "rows": rows, "seconds": round(seconds, 6),
+                        "rows_per_second": round(rows / seconds), "commit": commit, "dirty": dirty,
+                        "run_at": run_at, "python": platform.python_version(), "seed": args.seed,
+                    }
+                    results.append(result)
+
+                    line = f"  {name:26s} {seconds:9.4f} s  {rows / seconds:12,.0f} rows/s"
+                    baseline = None if args.no_compare else find_baseline(history, result, args.baseline)
+                    if baseline:
+                        change = seconds / baseline["seconds"] - 1
+                        line += f"  {change:+7.1%} vs {baseline['commit']}"
+                        if change > args.threshold:
+                            line += "  ❌ regression"
+                            regressions.append((name, rows, change, baseline["commit"]))
+                    print(line)
+            finally:
+                data.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if results and not args.no_save:
+        save_results(args.results, results)
+        print(f"\n✅ Results stored in {args.results}")
+    if regressions:
+        print(f"❌ {len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}:")
+        for name, rows, change, baseline_commit in regressions:
+            print(f"   {name} at {rows:,} rows: {change:+.1%} vs {baseline_commit}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
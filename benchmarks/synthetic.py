@@ -0,0 +1,171 @@
+"""
+Deterministic synthetic fund history in the shape of the UTT AMIS table.
+
+The generated raw data looks like `data/raw_data.csv`:
+- columns `#, Scheme Name, Net Asset Value, Outstanding Number of Units, Nav Per Unit,
+  Sale Price per Unit, Repurchase Price/Unit, Date Valued`,
+- numbers as text with comma thousands separators and four decimals ("1,151.1480"),
+- dates as `dd-mm-YYYY`, newest first, one row per scheme per business day.
+
+NAV per unit and units outstanding follow a seeded random walk per scheme, so the same
+(rows, seed) always produces byte-identical files. The first six schemes are the UTT
+AMIS funds; larger datasets add "Synthetic Fund NNNN" schemes rather than going back
+more than about ten years, so every size from 5k to 10M rows keeps realistic dates.
+
+Rows are produced in blocks of days (`iter_raw_chunks`), so a 10M-row CSV is written
+without holding it in memory. `html_pages` renders the same rows as UTT-style
+DataTables pages of at most 5000 rows ("Max (5000)").
+
+Usage:
+    python benchmarks/synthetic.py --rows 1000000 --output /tmp/utt_raw.csv [--html-dir /tmp/pages]
+"""
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_html_table import build_page  # noqa: E402
+
+COLUMNS = [
+    "#", "Scheme Name", "Net Asset Value", "Outstanding Number of Units", "Nav Per Unit",
+    "Sale Price per Unit", "Repurchase Price/Unit", "Date Valued",
+]
+UTT_SCHEMES = ["Umoja Fund", "Wekeza Maisha Fund", "Watoto Fund", "Jikimu Fund", "Liquid Fund", "Bond Fund"]
+LAST_DATE = "2025-05-02"
+MAX_DAYS = 2600  # About ten years of business days per scheme
+PAGE_ROWS = 5000  # Largest page size offered by the UTT AMIS table
+
+
+def shape_for_rows(rows, max_days=MAX_DAYS):
+    """
+    Return (schemes, days) for a dataset of about `rows` rows: at least the six UTT
+    schemes, and no more than `max_days` days of history per scheme.
+    """
+    schemes = max(len(UTT_SCHEMES), math.ceil(rows / max_days))
+    return schemes, math.ceil(rows / schemes)
+
+
+def scheme_names(count):
+    """Return `count` scheme names: the UTT funds first, then numbered synthetic funds."""
+    extra = [f"Synthetic Fund {i:04d}" for i in range(1, count - len(UTT_SCHEMES) + 1)]
+    return (UTT_SCHEMES + extra)[:count]
+
+
+def format_thousands(values, decimals=4):
+    """Format floats as website text: "1,234,567.1234"."""
+    return [f"{value:,.{decimals}f}" for value in values.tolist()]
+
+
+def iter_raw_chunks(rows, seed=0, block_days=500):
+    """
+    Yield the synthetic raw table (all columns as text, like a scraped CSV) in DataFrames
+    of `block_days` days, newest day first, `rows` rows in total.
+    """
+    schemes, days = shape_for_rows(rows)
+    names = np.array(scheme_names(schemes), dtype=object)
+    dates = pd.bdate_range(end=LAST_DATE, periods=days)[::-1].strftime("%d-%m-%Y").to_numpy()
+
+    rng = np.random.default_rng(seed)
+    nav = rng.uniform(100.0, 1200.0, schemes)  # Latest NAV per unit of each scheme
+    units = 10 ** rng.uniform(6.0, 9.5, schemes)  # Latest units outstanding
+    drift = rng.normal(0.0003, 0.0002, schemes)
+    volatility = rng.uniform(0.0005, 0.004, schemes)
+
+    emitted = 0
+    for start in range(0, days, block_days):
+        block = dates[start:start + block_days]
+        # Walk backwards in time from the newest values: value[t-1] = value[t] / (1 + r[t])
+        returns = drift + volatility * rng.standard_normal((len(block), schemes))
+        flows = rng.normal(0.0, 0.002, (len(block), schemes))
+        nav_block = nav / np.cumprod(np.vstack([np.ones(schemes), 1 + returns[:-1]]), axis=0)
+        units_block = units / np.cumprod(np.vstack([np.ones(schemes), 1 + flows[:-1]]), axis=0)
+        nav = nav_block[-1] / (1 + returns[-1])
+        units = units_block[-1] / (1 + flows[-1])
+
+        count = min(len(block) * schemes, rows - emitted)
+        nav_values = nav_block.ravel()[:count]
+        unit_values = units_block.ravel()[:count]
+        yield pd.DataFrame({
+            "#": np.arange(emitted + 1, emitted + count + 1),
+            "Scheme Name": np.tile(names, len(block))[:count],
+            "Net Asset Value": format_thousands(nav_values * unit_values),
+            "Outstanding Number of Units": format_thousands(unit_values),
+            "Nav Per Unit": format_thousands(nav_values),
+            "Sale Price per Unit": format_thousands(nav_values),
+            "Repurchase Price/Unit": format_thousands(nav_values * 0.99),
+            "Date Valued": np.repeat(block, schemes)[:count],
+        })
+        emitted += count
+        if emitted >= rows:
+            return
+
+
+def raw_frame(rows, seed=0):
+    """Return the whole synthetic raw table as one DataFrame (text columns, like `read_csv(dtype=str)`)."""
+    return pd.concat(list(iter_raw_chunks(rows, seed)), ignore_index=True)
+
+
+def write_raw_csv(path, rows, seed=0):
+    """
+    Write the synthetic raw table to `path` block by block (quoted like the scraped CSV).
+    Returns `path`.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    header = True
+    for chunk in iter_raw_chunks(rows, seed):
+        chunk.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+    os.replace(tmp_path, path)
+    return path
+
+
+def cached_raw_csv(rows, seed=0, cache_dir=None):
+    """
+    Return the path of the synthetic raw CSV for (rows, seed), generating it only once.
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+    path = os.path.join(cache_dir, f"utt_raw_{rows}_s{seed}.csv")
+    if not os.path.exists(path):
+        write_raw_csv(path, rows, seed)
+    return path
+
+
+def html_pages(df, page_rows=PAGE_ROWS):
+    """
+    Yield UTT-style HTML pages holding the rows of `df` (text values), `page_rows` rows per page.
+    """
+    headers = list(df.columns)
+    for start in range(0, len(df), page_rows):
+        page = df.iloc[start:start + page_rows]
+        yield build_page(headers, page.astype(str).itertuples(index=False, name=None))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic UTT-shaped raw dataset")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="raw CSV to write")
+    parser.add_argument("--html-dir", help="also write the rows as HTML table pages into this directory")
+    args = parser.parse_args(argv)
+
+    write_raw_csv(args.output, args.rows, args.seed)
+    schemes, days = shape_for_rows(args.rows)
+    print(f"✅ {args.rows} rows ({schemes} schemes x {days} days) written to {args.output}")
+    if args.html_dir:
+        os.makedirs(args.html_dir, exist_ok=True)
+        df = pd.read_csv(args.output, dtype=str)
+        for number, page in enumerate(html_pages(df), start=1):
+            with open(os.path.join(args.html_dir, f"page-{number:05d}.html"), "w", encoding="utf-8") as file:
+                file.write(page)
+        print(f"✅ HTML pages written to {args.html_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,78 @@ fund_fetcher Package
 Provides utilities to scrape, clean, and store fund data from the UTT AMIS website.
 
 This package supports:
-- Headless web scraping using Selenium
-- Parsing data tables with BeautifulSoup
+- Direct HTTP fetching of the fund table, with headless Selenium scraping as a fallback
+- Streaming, event-driven parsing of HTML data tables
 - Cleaning numeric and date fields using pandas
 - Writing cleaned data to PostgreSQL
+- Precomputed per-scheme analytics (returns, risk, flows)
 
 Main exposed functions:
 - scrape_fund_data(): Scrape and save UTT AMIS data
+- scrape_incremental(): Fetch only the rows newer than the stored data
+- run_sources(): Fetch all registered providers concurrently
 - clean_and_format_fund_data(): Clean data and format for analysis or database
-- insert_utt_data(): Insert cleaned data into PostgreSQL
+- normalize_files() / normalize_frame(): Clean any provider's table into one canonical schema
+- insert_utt_data(): Insert cleaned data into PostgreSQL (COPY + upsert on scheme and date)
+- materialize_metrics(): Precompute returns, volatility, drawdowns and flows per scheme
+- update_metrics(): Extend the precomputed metrics with new days only
+- latest_nav() / nav_on() / series(): Cached queries over the loaded data
+- FundSeriesStore / load_store(): Compact, memory-mappable history with binary-search lookups
+
+Importing the package has no side effects and is cheap: the functions below are
+resolved lazily on first access, and the heavy dependencies (Selenium,
+psycopg2, SQLAlchemy) are only imported when a function that needs them is called.
 """
 
-# Direct access to key functions
-from .fetch_utt import (
-    clean_fund_data_basic,
-    clean_and_format_fund_data,
-    process_fund_csv,
-    create_utt_table,
-    insert_utt_data,
-)
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "scrape_fund_data": ".fetch_utt",
+    "fetch_fund_table_http": ".http_fetch",
+    "stream_fund_table": ".html_table",
+    "scrape_incremental": ".incremental",
+    "read_high_water_marks": ".incremental",
+    "clean_fund_data_basic": ".fetch_utt",
+    "read_fund_csv": ".fetch_utt",
+    "clean_and_format_fund_data": ".fetch_utt",
+    "parse_fund_dates": ".fetch_utt",
+    "process_fund_csv": ".fetch_utt",
+    "normalize_frame": ".normalize",
+    "normalize_batches": ".normalize",
+    "normalize_files": ".normalize",
+    "clean_csv_in_chunks": ".chunked",
+    "create_utt_table": ".fetch_utt",
+    "insert_utt_data": ".fetch_utt",
+    "upsert_utt_data": ".fetch_utt",
+    "compute_metrics": ".analytics",
+    "summarize_metrics": ".analytics",
+    "materialize_metrics": ".analytics",
+    "update_metrics": ".analytics",
+    "build_report": ".report",
+    "latest_nav": ".query",
+    "nav_on": ".query",
+    "series": ".query",
+    "FundSeriesStore": ".timeseries",
+    "load_store": ".storage",
+    "get_engine": ".db",
+    "FundSource": ".sources",
+    "register_source": ".sources",
+    "run_sources": ".scheduler",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    # Direct access to key functions, e.g. `from fund_fetcher import insert_utt_data`
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Cache it so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,474 @@
+"""
+Fund analytics: returns, volatility, drawdowns and AUM flows per scheme.
+
+Every scheme is a time series of `Nav Per Unit`, `Net Asset Value` and
+`Outstanding Number of Units` over `Date Valued`. The metrics are computed for all
+schemes at once on NumPy arrays sorted by (scheme, date), with group boundaries
+handled by masks and pandas' grouped (Cython) operations, with no per-row Python loops:
+- `daily_return`: NAV per unit change since the scheme's previous valuation
+- `volatility`: rolling standard deviation of daily returns, annualized
+- `drawdown` / `max_drawdown`: distance below the running NAV peak, and its worst value so far
+- `net_flow`: net subscriptions, the change in outstanding units times the NAV per unit
+- `cumulative_net_flow`: running sum of `net_flow`
+
+`summarize_metrics` reduces the history to one row per scheme (latest NAV, period
+returns, current risk and recent flows). `materialize_metrics` stores both tables (files
+and/or database), so reports and ad-hoc queries read precomputed numbers instead of
+rescanning the whole history.
+
+Day-to-day runs go through `update_metrics`: the state each metric depends on (last NAV
+and units, the last `window` returns, the running NAV peak, worst drawdown and cumulative
+flow) is kept per scheme in a small JSON file, so newly valued days are computed from that
+state in O(new rows x window) and appended. The history is only recomputed in full when
+the stored rows changed (backfills, corrections, deletions) or the settings changed.
+"""
+
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+SCHEME_COLUMN = "Scheme Name"
+DATE_COLUMN = "Date Valued"
+NAV_PER_UNIT_COLUMN = "Nav Per Unit"
+NAV_COLUMN = "Net Asset Value"
+UNITS_COLUMN = "Outstanding Number of Units"
+
+# Rolling window (in valuations) for volatility, and valuations per year for annualizing it
+VOLATILITY_WINDOW = 20
+PERIODS_PER_YEAR = 252
+
+METRIC_COLUMNS = [
+    "daily_return",
+    "volatility",
+    "drawdown",
+    "max_drawdown",
+    "net_flow",
+    "cumulative_net_flow",
+]
+
+# Look-back periods of the summary table
+RETURN_PERIODS = {
+    "return_1w": pd.DateOffset(weeks=1),
+    "return_1m": pd.DateOffset(months=1),
+    "return_3m": pd.DateOffset(months=3),
+    "return_1y": pd.DateOffset(years=1),
+}
+FLOW_PERIODS = {
+    "net_flow_1m": pd.DateOffset(months=1),
+    "net_flow_1y": pd.DateOffset(years=1),
+}
+
+# Columns fingerprinted to detect backfills and corrections of already-processed rows
+STATE_CHECK_COLUMNS = [DATE_COLUMN, NAV_PER_UNIT_COLUMN, NAV_COLUMN, UNITS_COLUMN]
+
+# Database tables the metrics are materialized into
+METRICS_TABLE = "utt_fund_metrics"
+SUMMARY_TABLE = "utt_fund_summary"
+
+
+def prepare_series(df):
+    """
+    Return the columns the metrics need, one row per (scheme, date), sorted by scheme then date.
+
+    Dates are converted to `datetime64`. If the source repeats a (scheme, date), the first row
+    (the newest on the website) is kept.
+    """
+    data = df[[SCHEME_COLUMN, DATE_COLUMN, NAV_PER_UNIT_COLUMN, NAV_COLUMN, UNITS_COLUMN]].copy()
+    data[SCHEME_COLUMN] = data[SCHEME_COLUMN].astype(str)
+    data[DATE_COLUMN] = pd.to_datetime(data[DATE_COLUMN])
+    data = data.drop_duplicates([SCHEME_COLUMN, DATE_COLUMN], keep="first")
+    return data.sort_values([SCHEME_COLUMN, DATE_COLUMN], kind="mergesort").reset_index(drop=True)
+
+
+def _previous(values, first):
+    # Value of the previous row within the same scheme (NaN on each scheme's first row)
+    prev = np.empty_like(values)
+    prev[0] = np.nan
+    prev[1:] = values[:-1]
+    prev[first] = np.nan
+    return prev
+
+
+def compute_metrics(df, window=VOLATILITY_WINDOW, periods_per_year=PERIODS_PER_YEAR):
+    """
+    This function computes the per-scheme time-series metrics for every row of the history.
+
+    Parameters:
+    - `df`: cleaned fund data (numeric NAV/units columns; dates as text or datetimes)
+    - `window`: number of valuations in the rolling volatility window
+    - `periods_per_year`: valuations per year, used to annualize the volatility
+
+    Returns the series from `prepare_series` with the `METRIC_COLUMNS` added.
+    """
+    data = prepare_series(df)
+    if data.empty:
+        return data.assign(**{col: pd.Series(dtype=float) for col in METRIC_COLUMNS})
+
+    codes = pd.factorize(data[SCHEME_COLUMN])[0]
+    first = np.ones(len(data), dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]  # True on the first row of each scheme
+
+    nav = data[NAV_PER_UNIT_COLUMN].to_numpy(dtype=float)
+    units = data[UNITS_COLUMN].to_numpy(dtype=float)
+
+    daily_return = nav / _previous(nav, first) - 1.0
+    net_flow = (units - _previous(units, first)) * nav
+
+    groups = pd.Series(codes)
+    running_peak = pd.Series(nav).groupby(groups).cummax().to_numpy()
+    drawdown = nav / running_peak - 1.0
+
+    data["daily_return"] = daily_return
+    data["volatility"] = (
+        pd.Series(daily_return).groupby(groups)
+        .rolling(window, min_periods=window).std()
+        .reset_index(level=0, drop=True).sort_index().to_numpy()
+        * np.sqrt(periods_per_year)
+    )
+    data["drawdown"] = drawdown
+    data["max_drawdown"] = pd.Series(drawdown).groupby(groups).cummin().to_numpy()
+    data["net_flow"] = net_flow
+    data["cumulative_net_flow"] = pd.Series(np.nan_to_num(net_flow)).groupby(groups).cumsum().to_numpy()
+    return data
+
+
+def _value_as_of(metrics, targets, column):
+    # For each scheme, the value of `column` on the last valuation on or before its target date
+    left = pd.DataFrame({SCHEME_COLUMN: targets.index, "_target": targets.to_numpy()}).sort_values("_target")
+    right = metrics[[SCHEME_COLUMN, DATE_COLUMN, column]].sort_values(DATE_COLUMN)
+    merged = pd.merge_asof(
+        left, right, left_on="_target", right_on=DATE_COLUMN, by=SCHEME_COLUMN, direction="backward"
+    )
+    return merged.set_index(SCHEME_COLUMN)[column].reindex(targets.index)
+
+
+def summarize_metrics(metrics):
+    """
+    This function reduces the metric history to one summary row per scheme.
+
+    Columns: the latest date, NAV per unit, AUM and units; period returns (`RETURN_PERIODS` and
+    year-to-date); the latest volatility, drawdown and max drawdown; and net flows over
+    `FLOW_PERIODS`. Every look-back is an as-of lookup on the sorted history, not a rescan.
+    """
+    latest = metrics.groupby(SCHEME_COLUMN, sort=True).tail(1).set_index(SCHEME_COLUMN)
+    summary = latest[[DATE_COLUMN, NAV_PER_UNIT_COLUMN, NAV_COLUMN, UNITS_COLUMN,
+                      "volatility", "drawdown", "max_drawdown", "cumulative_net_flow"]].copy()
+    summary = summary.rename(columns={DATE_COLUMN: "as_of"})
+
+    nav = latest[NAV_PER_UNIT_COLUMN]
+    for name, offset in RETURN_PERIODS.items():
+        summary[name] = nav / _value_as_of(metrics, latest[DATE_COLUMN] - offset, NAV_PER_UNIT_COLUMN) - 1.0
+    year_start = latest[DATE_COLUMN].dt.to_period("Y").dt.start_time - pd.Timedelta(days=1)
+    summary["return_ytd"] = nav / _value_as_of(metrics, year_start, NAV_PER_UNIT_COLUMN) - 1.0
+
+    flows = latest["cumulative_net_flow"]
+    for name, offset in FLOW_PERIODS.items():
+        summary[name] = flows - _value_as_of(metrics, latest[DATE_COLUMN] - offset, "cumulative_net_flow")
+    return summary.reset_index()
+
+
+def create_metrics_tables(conn=None):
+    """
+    Create the metrics and summary tables (and their unique keys) if they do not exist.
+    """
+    from .db import raw_connection
+
+    if conn is None:
+        with raw_connection() as pooled:
+            return create_metrics_tables(pooled)
+
+    metric_columns = ",\n".join(f'            "{col}" FLOAT' for col in METRIC_COLUMNS)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+            "Scheme Name" TEXT NOT NULL,
+            "Date Valued" DATE NOT NULL,
+            "Nav Per Unit" FLOAT,
+            "Net Asset Value" FLOAT,
+            "Outstanding Number of Units" FLOAT,
+{metric_columns},
+            PRIMARY KEY ("Scheme Name", "Date Valued")
+        );
+    """)
+    summary_columns = ",\n".join(
+        f'            "{col}" FLOAT'
+        for col in ["volatility", "drawdown", "max_drawdown", "cumulative_net_flow",
+                    *RETURN_PERIODS, "return_ytd", *FLOW_PERIODS]
+    )
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            "Scheme Name" TEXT PRIMARY KEY,
+            "as_of" DATE,
+            "Nav Per Unit" FLOAT,
+            "Net Asset Value" FLOAT,
+            "Outstanding Number of Units" FLOAT,
+{summary_columns}
+        );
+    """)
+    conn.commit()
+    cursor.close()
+
+
+def materialize_metrics(df, metrics_path=None, summary_path=None, to_db=False, since=None,
+                        window=VOLATILITY_WINDOW, periods_per_year=PERIODS_PER_YEAR):
+    """
+    This function computes the metrics and stores them for reports and queries.
+
+    Parameters:
+    - `df`: cleaned fund data
+    - `metrics_path`, `summary_path`: files to write (CSV or Parquet, see `storage.save_frame`)
+    - `to_db`: also merge the results into the `utt_fund_metrics` / `utt_fund_summary` tables
+    - `since`: only rows valued on or after this date are merged into `utt_fund_metrics`
+      (the rest of the history is unchanged); the summary is always refreshed
+    - `window`, `periods_per_year`: rolling volatility window and annualization factor
+
+    Returns `(metrics, summary)` DataFrames.
+    """
+    from .storage import save_frame
+
+    metrics = compute_metrics(df, window=window, periods_per_year=periods_per_year)
+    summary = summarize_metrics(metrics)
+
+    if metrics_path:
+        save_frame(metrics, metrics_path, date_column=DATE_COLUMN)
+    if summary_path:
+        save_frame(summary, summary_path)
+
+    if to_db:
+        from .db import copy_upsert
+
+        create_metrics_tables()
+        changed = metrics if since is None else metrics[metrics[DATE_COLUMN] >= pd.Timestamp(since)]
+        copy_upsert(changed, METRICS_TABLE, [SCHEME_COLUMN, DATE_COLUMN])
+        copy_upsert(summary, SUMMARY_TABLE, [SCHEME_COLUMN])
+        print(f"✅ Metrics materialized: {len(changed)} metric rows, {len(summary)} scheme summaries")
+    return metrics, summary
+
+
+# === Incremental updates ===
+
+def _checksums(series):
+    # Row count and an order-independent fingerprint of the checked columns, per scheme
+    hashes = pd.util.hash_pandas_object(series[STATE_CHECK_COLUMNS], index=False)
+    grouped = hashes.groupby(series[SCHEME_COLUMN].to_numpy())
+    return grouped.size(), grouped.sum()
+
+
+def _number(value):
+    # JSON has no NaN: missing values are stored as null
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def metrics_state(series, metrics, window=VOLATILITY_WINDOW, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Build the per-scheme state needed to extend `metrics` with later valuations.
+
+    `series` is the `prepare_series` output the metrics were computed from; it is fingerprinted
+    so that later changes to these rows can be detected.
+    """
+    counts, sums = _checksums(series)
+    schemes = {}
+    for scheme, group in metrics.groupby(SCHEME_COLUMN, sort=True):
+        last = group.iloc[-1]
+        schemes[scheme] = {
+            "last_date": last[DATE_COLUMN].strftime("%Y-%m-%d"),
+            "nav": _number(last[NAV_PER_UNIT_COLUMN]),
+            "units": _number(last[UNITS_COLUMN]),
+            "returns": [_number(value) for value in group["daily_return"].iloc[-window:]],
+            "peak": _number(group[NAV_PER_UNIT_COLUMN].max()),
+            "max_drawdown": _number(group["drawdown"].min()),
+            "cumulative_net_flow": _number(last["cumulative_net_flow"]),
+            "rows": int(counts[scheme]),
+            "checksum": str(int(sums[scheme])),
+        }
+    return {"window": window, "periods_per_year": periods_per_year, "schemes": schemes}
+
+
+def load_metrics_state(path):
+    """
+    Read the state saved by `save_metrics_state` (None if there is none yet).
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_metrics_state(state, path):
+    """
+    Write the per-scheme metrics state as JSON.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=2)
+
+
+def extend_metrics(state, new_series, window=VOLATILITY_WINDOW, periods_per_year=PERIODS_PER_YEAR):
+    """
+    This function computes the metrics of new valuations from the saved per-scheme state.
+
+    Parameters:
+    - `state`: dict from `metrics_state`; it is updated in place to include the new rows
+    - `new_series`: `prepare_series` rows valued after each scheme's `last_date` (schemes
+      missing from the state start from scratch)
+
+    Each row costs O(window) (the volatility over the last `window` returns); the results
+    match `compute_metrics` run on the whole history. Returns the new metric rows.
+    """
+    schemes = state["schemes"]
+    scale = math.sqrt(periods_per_year)
+    columns = {col: np.full(len(new_series), np.nan) for col in METRIC_COLUMNS}
+
+    names = new_series[SCHEME_COLUMN].to_numpy()
+    navs = new_series[NAV_PER_UNIT_COLUMN].to_numpy(dtype=float)
+    units_values = new_series[UNITS_COLUMN].to_numpy(dtype=float)
+    dates = new_series[DATE_COLUMN]
+
+    previous_scheme, current = None, None
+    for i in range(len(new_series)):
+        if names[i] != previous_scheme:
+            # Pick up the running values of this scheme (rows are grouped by scheme)
+            previous_scheme = names[i]
+            current = schemes.setdefault(previous_scheme, {
+                "nav": None, "units": None, "returns": [], "peak": None,
+                "max_drawdown": None, "cumulative_net_flow": 0.0, "rows": 0, "checksum": "0",
+            })
+            returns = deque(
+                (np.nan if value is None else value for value in current["returns"]), maxlen=window
+            )
+            prev_nav = np.nan if current["nav"] is None else current["nav"]
+            prev_units = np.nan if current["units"] is None else current["units"]
+            peak = np.nan if current["peak"] is None else current["peak"]
+            worst = np.nan if current["max_drawdown"] is None else current["max_drawdown"]
+            cumulative = current["cumulative_net_flow"]
+
+        nav, units = navs[i], units_values[i]
+        daily_return = nav / prev_nav - 1.0
+        net_flow = (units - prev_units) * nav
+        if not np.isnan(nav):
+            peak = nav if np.isnan(peak) else max(peak, nav)
+        drawdown = nav / peak - 1.0
+        if not np.isnan(drawdown):
+            worst = drawdown if np.isnan(worst) else min(worst, drawdown)
+        if not np.isnan(net_flow):
+            cumulative += net_flow
+        returns.append(daily_return)
+
+        columns["daily_return"][i] = daily_return
+        if len(returns) == window and not any(np.isnan(value) for value in returns):
+            columns["volatility"][i] = np.std(returns, ddof=1) * scale
+        columns["drawdown"][i] = drawdown
+        columns["max_drawdown"][i] = worst if not np.isnan(drawdown) else np.nan
+        columns["net_flow"][i] = net_flow
+        columns["cumulative_net_flow"][i] = cumulative
+
+        prev_nav, prev_units = nav, units
+        last_of_scheme = i + 1 == len(new_series) or names[i + 1] != previous_scheme
+        if last_of_scheme:
+            current.update({
+                "last_date": dates.iloc[i].strftime("%Y-%m-%d"),
+                "nav": _number(nav),
+                "units": _number(units),
+                "returns": [_number(value) for value in returns],
+                "peak": _number(peak),
+                "max_drawdown": _number(worst),
+                "cumulative_net_flow": float(cumulative),
+            })
+
+    return new_series.assign(**columns).reset_index(drop=True)
+
+
+def _rebuild_reason(series, state, window, periods_per_year):
+    # Why the stored metrics cannot simply be extended (None if they can)
+    if state is None:
+        return "no saved state"
+    if state.get("window") != window or state.get("periods_per_year") != periods_per_year:
+        return "metric settings changed"
+
+    schemes = state["schemes"]
+    last_dates = pd.to_datetime(
+        series[SCHEME_COLUMN].map({name: info["last_date"] for name, info in schemes.items()})
+    )
+    processed = series[series[DATE_COLUMN] <= last_dates]
+    counts, sums = _checksums(processed)
+    for name, info in schemes.items():
+        if counts.get(name, 0) != info["rows"] or str(int(sums.get(name, 0))) != info["checksum"]:
+            return f"stored rows of {name!r} changed (backfill or correction)"
+    return None
+
+
+def update_metrics(df, metrics_path, state_path, summary_path=None, to_db=False,
+                   window=VOLATILITY_WINDOW, periods_per_year=PERIODS_PER_YEAR):
+    """
+    This function brings the materialized metrics up to date with `df`, incrementally when possible.
+
+    Parameters:
+    - `df`: the full cleaned fund data
+    - `metrics_path`: the metrics dataset (CSV or Parquet); new rows are appended to it
+    - `state_path`: JSON file holding the per-scheme state (see `metrics_state`)
+    - `summary_path`, `to_db`: as in `materialize_metrics`
+    - `window`, `periods_per_year`: volatility settings; changing them forces a rebuild
+
+    Rows valued after each scheme's last processed date are computed from the saved state
+    (`extend_metrics`) and appended. If the already-processed rows changed, or there is no
+    state or metrics file yet, everything is recomputed with `materialize_metrics`.
+
+    Returns `(new_metrics, summary, rebuilt)`: the metric rows that were written, the refreshed
+    summary, and whether a full rebuild happened.
+    """
+    from .storage import append_frame, load_frame, save_frame
+
+    series = prepare_series(df)
+    state = load_metrics_state(state_path)
+    reason = "no stored metrics" if not os.path.exists(metrics_path) else _rebuild_reason(
+        series, state, window, periods_per_year
+    )
+
+    if reason:
+        print(f"🔁 Full metrics rebuild: {reason}")
+        metrics, summary = materialize_metrics(
+            df, metrics_path, summary_path, to_db=to_db, window=window, periods_per_year=periods_per_year
+        )
+        save_metrics_state(metrics_state(series, metrics, window, periods_per_year), state_path)
+        return metrics, summary, True
+
+    last_dates = pd.to_datetime(
+        series[SCHEME_COLUMN].map({name: info["last_date"] for name, info in state["schemes"].items()})
+    )
+    new_series = series[~(series[DATE_COLUMN] <= last_dates)]
+    added = extend_metrics(state, new_series, window, periods_per_year)
+
+    # The summary only looks back one year from each scheme's own latest valuation, so only
+    # that part of every scheme's history (plus the new rows) is kept; a scheme that stopped
+    # reporting keeps the window ending at its last date
+    starts = series.groupby(SCHEME_COLUMN)[DATE_COLUMN].max() - pd.DateOffset(years=1, days=7)
+    history = load_frame(metrics_path, start=starts.min(), date_column=DATE_COLUMN)
+    history[DATE_COLUMN] = pd.to_datetime(history[DATE_COLUMN])
+    history[SCHEME_COLUMN] = history[SCHEME_COLUMN].astype(str)
+    history = history[history[DATE_COLUMN] >= history[SCHEME_COLUMN].map(starts)]
+    history = pd.concat([history, added], ignore_index=True)
+    summary = summarize_metrics(history.sort_values([SCHEME_COLUMN, DATE_COLUMN], kind="mergesort"))
+
+    if to_db:
+        # Idempotent, so it runs before the files: a failed run is simply redone next time
+        from .db import copy_upsert
+
+        create_metrics_tables()
+        copy_upsert(added, METRICS_TABLE, [SCHEME_COLUMN, DATE_COLUMN])
+        copy_upsert(summary, SUMMARY_TABLE, [SCHEME_COLUMN])
+
+    if not added.empty:
+        append_frame(added, metrics_path, date_column=DATE_COLUMN)
+    if summary_path:
+        save_frame(summary, summary_path)
+    counts, sums = _checksums(series)
+    for name, info in state["schemes"].items():
+        info["rows"], info["checksum"] = int(counts.get(name, 0)), str(int(sums.get(name, 0)))
+    save_metrics_state(state, state_path)
+
+    print(f"✅ Metrics updated incrementally: {len(added)} new rows")
+    return added, summary, False
@@ -0,0 +1,382 @@
+"""
+Warm headless-Chrome pool and table readiness detection for JavaScript-rendered sources.
+
+Starting a browser for every scrape is the slowest part of a Selenium fetch:
+`ChromeDriverManager().install()` asks the network for the latest driver version, and a
+cold Chrome takes seconds to start. This module keeps that cost off the scrape path:
+- the ChromeDriver path is resolved once and remembered on disk for `DRIVER_CACHE_DAYS`
+  (or taken from `FUNDFETCH_CHROMEDRIVER_PATH`), so later runs start Chrome without any
+  network request; a stale driver that no longer matches Chrome is re-resolved once,
+- `BrowserPool` keeps up to `size` started browsers idle between scrapes and hands them
+  out with `pool.browser()`; `warm()` starts them in the background ahead of time,
+- browsers load pages "eager" (no waiting for every sub-resource) and block images, fonts,
+  media and common analytics/ads hosts, which the table does not need.
+
+`wait_for_table` replaces fixed sleeps: it polls the table in the page and returns as soon
+as the rendered `<tbody>` rows match what DataTables says it is showing, from the DataTables
+API (`page.info()`) or, without it, from the "Showing 1 to 5,000 of 12,345 entries" info
+label. With `page_length` (e.g. after choosing "Max (5000)") it also waits until that page
+size is in effect, so a table still showing the old 10 rows is never captured. Tables that
+are not DataTables are considered ready once their row count stops changing.
+
+Selenium and webdriver-manager are imported only when a browser is started.
+"""
+
+import atexit
+import json
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+DRIVER_CACHE_DAYS = 7
+DRIVER_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "fundfetch", "chromedriver.json")
+MAX_USES = 50  # Pages a browser serves before it is replaced (Chrome slowly accumulates memory)
+
+# Requests the fund tables never need; blocked through the DevTools protocol
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+]
+
+_TABLE_STATE_JS = """
+const table = document.querySelector(arguments[0]);
+if (!table || !table.tBodies.length) return null;
+let rows = 0;
+for (const tr of table.tBodies[0].rows) {
+    if (!tr.querySelector("td.dataTables_empty")) rows += 1;
+}
+const state = {rows: rows, info: null, label: null, processing: false};
+const $ = window.jQuery;
+if ($ && $.fn && $.fn.dataTable && $.fn.dataTable.isDataTable(table)) {
+    const info = $(table).DataTable().page.info();
+    state.info = {start: info.start, end: info.end, total: info.recordsDisplay, length: info.length};
+}
+const wrapper = table.closest(".dataTables_wrapper") || document;
+const label = (table.id && document.getElementById(table.id + "_info")) || wrapper.querySelector(".dataTables_info");
+if (label) state.label = label.textContent;
+const processing = wrapper.querySelector(".dataTables_processing");
+if (processing) state.processing = processing.offsetParent !== null && getComputedStyle(processing).display !== "none";
+return state;
+"""
+
+_INFO_LABEL = re.compile(r"(\d[\d,.\s]*)\D+?(\d[\d,.\s]*)\D+?(\d[\d,.\s]*)")
+
+
+# === Driver binary ===
+
+def _read_driver_cache(max_age_days):
+    try:
+        with open(DRIVER_CACHE_PATH, encoding="utf-8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+    fresh = time.time() - cached.get("resolved_at", 0) < max_age_days * 86400
+    return cached["path"] if fresh and os.path.exists(cached.get("path", "")) else None
+
+
+def chromedriver_path(refresh=False, max_age_days=DRIVER_CACHE_DAYS):
+    """
+    Return the ChromeDriver binary to use, resolving it with webdriver-manager only when needed.
+
+    `FUNDFETCH_CHROMEDRIVER_PATH` wins if set. Otherwise the path found by the last
+    `ChromeDriverManager().install()` is reused for `max_age_days` days; `refresh=True`
+    forces a new lookup (e.g. after a Chrome update made the cached driver incompatible).
+    """
+    override = os.environ.get("FUNDFETCH_CHROMEDRIVER_PATH")
+    if override:
+        return override
+    if not refresh:
+        cached = _read_driver_cache(max_age_days)
+        if cached:
+            return cached
+
+    from webdriver_manager.chrome import ChromeDriverManager  # Automatically manages ChromeDriver installation
+
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(DRIVER_CACHE_PATH), exist_ok=True)
+    tmp_path = f"{DRIVER_CACHE_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"path": path, "resolved_at": time.time()}, file)
+    os.replace(tmp_path, DRIVER_CACHE_PATH)
+    return path
+
+
+def start_chrome(block_resources=True, headless=True):
+    """
+    Start a headless Chrome session tuned for scraping and return the driver.
+    """
+    # Selenium components for browser automation
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.options import Options  # Used to set browser options (like headless mode)
+    from selenium.webdriver.chrome.service import Service  # Used to configure the ChromeDriver service
+
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")  # Run browser without a UI, useful on servers
+    options.add_argument("--no-sandbox")  # Commonly needed in containers or CI/CD
+    options.add_argument("--disable-dev-shm-usage")  # Avoid running out of shared memory in containers
+    options.add_argument("--disable-extensions")
+    options.add_argument("--mute-audio")
+    options.page_load_strategy = "eager"  # Return from get() at DOMContentLoaded; the table wait does the rest
+    if block_resources:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+
+    try:
+        driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+    except SessionNotCreatedException:
+        # The cached driver no longer matches the installed Chrome: resolve it again, once
+        driver = webdriver.Chrome(service=Service(chromedriver_path(refresh=True)), options=options)
+
+    if block_resources:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+# === Pool ===
+
+class BrowserPool:
+    """
+    Keeps started headless browsers between scrapes.
+
+    - `size`: browsers kept idle for reuse (more may run at once; callers such as the
+      scheduler bound concurrency themselves, extra browsers are closed on release)
+    - `block_resources`: block images, fonts, media and analytics requests
+    - `max_uses`: pages a browser serves before it is replaced
+    """
+
+    def __init__(self, size=2, block_resources=True, max_uses=MAX_USES):
+        self.size = size
+        self.block_resources = block_resources
+        self.max_uses = max_uses
+        self._idle = queue.LifoQueue()  # Most recently used first: its caches are the warmest
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._warming = 0  # Browsers being started by `warm`
+        self.started = 0  # Browsers started so far (a pool hit starts none)
+
+    def _start(self):
+        driver = start_chrome(block_resources=self.block_resources)
+        with self._lock:
+            self._uses[id(driver)] = 0
+            self.started += 1
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass  # Already dead; nothing left to free
+
+    def _checkout(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                if self._warming:
+                    time.sleep(0.05)  # A browser is already starting: wait for it rather than start another
+                    continue
+                return self._start()
+            try:
+                driver.current_url  # Cheap liveness check: raises if Chrome or the driver died
+                return driver
+            except Exception:
+                self._discard(driver)
+
+    def _checkin(self, driver, healthy):
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+        if not healthy or self._closed or uses >= self.max_uses or self._idle.qsize() >= self.size:
+            self._discard(driver)
+            return
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")  # Free the last page's DOM and stop its scripts
+        except Exception:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def browser(self):
+        """
+        Lend a browser: `with pool.browser() as driver: ...`.
+
+        The browser goes back to the pool afterwards, unless the block raised a Selenium
+        error (the session may be broken), in which case it is closed.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        driver = self._checkout()
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self._checkin(driver, healthy)
+
+    def warm(self, count=None, wait=False):
+        """
+        Start browsers in the background until `count` (default: `size`) are idle.
+
+        Returns the starter threads; with `wait=True` they are joined first.
+        """
+        missing = max(0, (self.size if count is None else count) - self._idle.qsize())
+
+        def start_one():
+            try:
+                self._idle.put(self._start())
+            except Exception as exc:
+                print(f"⚠️ Could not pre-start a browser: {exc}")
+            finally:
+                with self._lock:
+                    self._warming -= 1
+
+        with self._lock:
+            self._warming += missing
+
+        threads = [threading.Thread(target=start_one, name="browser-warmup", daemon=True) for _ in range(missing)]
+        for thread in threads:
+            thread.start()
+        if wait:
+            for thread in threads:
+                thread.join()
+        return threads
+
+    def close(self):
+        """Quit every idle browser; browsers still lent out are quit when they are returned."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    Return the shared browser pool, creating it on first use (closed at interpreter exit).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+                atexit.register(_pool.close)
+    return _pool
+
+
+def configure_browser_pool(size=2, block_resources=True, max_uses=MAX_USES):
+    """
+    Replace the shared browser pool with one using these settings (the old one is closed).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = BrowserPool(size=size, block_resources=block_resources, max_uses=max_uses)
+        atexit.register(_pool.close)
+    return _pool
+
+
+# === Readiness ===
+
+def parse_info_label(text):
+    """
+    Parse a DataTables info label ("Showing 1 to 5,000 of 12,345 entries") into
+    `(first, last, total)`, or None if it has no three numbers.
+    """
+    match = _INFO_LABEL.search(text or "")
+    if match is None:
+        return None
+    return tuple(int(re.sub(r"\D", "", group)) for group in match.groups())
+
+
+def table_ready(state, page_length=None, expected_total=None, previous_rows=None):
+    """
+    Decide from a table state (see `wait_for_table`) whether the table is fully rendered.
+
+    - with the DataTables API or an info label: the rendered rows equal the rows the table
+      says it shows, nothing is processing, the page size is `page_length` (if given) and
+      the total is `expected_total` (if given)
+    - otherwise: there are rows and their count equals `previous_rows`, the count seen
+      `settle` seconds earlier (it stopped changing)
+    """
+    if state is None or state.get("processing"):
+        return False
+    rows = state["rows"]
+
+    if state.get("info"):
+        info = state["info"]
+        shown, total, length = info["end"] - info["start"], info["total"], info["length"]
+    else:
+        parsed = parse_info_label(state.get("label"))
+        if parsed is None:
+            return rows > 0 and rows == previous_rows
+        first, last, total = parsed
+        shown = last - first + 1 if total else 0
+        length = None
+
+    if rows != shown:
+        return False
+    if expected_total is not None and total != expected_total:
+        return False
+    if page_length is not None:
+        if length is not None and length not in (page_length, -1):
+            return False
+        if page_length != -1 and shown != min(page_length, total):
+            return False
+    return True
+
+
+def wait_for_table(driver, selector="table.table", page_length=None, expected_total=None, timeout=30,
+                   poll_frequency=0.1, settle=0.5):
+    """
+    This function waits until the table matching `selector` is completely rendered.
+
+    Parameters:
+    - `driver`: Selenium driver showing the page
+    - `selector`: CSS selector of the table
+    - `page_length`: rows per page that must be in effect (e.g. 5000 after choosing "Max (5000)")
+    - `expected_total`: total number of entries the table must report
+    - `timeout`: seconds before a `TimeoutException` is raised
+    - `settle`: for tables without DataTables, seconds the row count must stay unchanged
+
+    Returns the final table state: `{"rows", "info", "label", "processing"}`.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    last = {"rows": None, "since": time.monotonic(), "state": None}
+
+    def ready(d):
+        state = d.execute_script(_TABLE_STATE_JS, selector)
+        rows = state["rows"] if state else None
+        if rows != last["rows"]:
+            last["rows"], last["since"] = rows, time.monotonic()
+        last["state"] = state
+        settled = time.monotonic() - last["since"] >= settle
+        return table_ready(state, page_length, expected_total, rows if settled else None)
+
+    WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(ready)
+    return last["state"]
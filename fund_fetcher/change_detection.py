@@ -0,0 +1,195 @@
+"""
+Change detection for the fund sources: skip fetching, cleaning and loading when nothing is new.
+
+UTT AMIS publishes at most once per business day, so most polls find the same table.
+Each source keeps a small fingerprint file next to the data (`SourceFingerprint`):
+- the HTTP validators (`ETag`, `Last-Modified`) of the resource that carries the rows:
+  the DataTables JSON endpoint when there is one, otherwise the page itself (a page that
+  only loads its rows by script can keep the same ETag while the data changes),
+- a content hash of the newest row of every scheme, for servers without validators,
+- the discovered data URL, table headers and JSON column keys, so a check needs no extra
+  page request,
+- `processed_hash`: a digest of the raw dataset the pipeline last ran on.
+
+`source_changed` sends one small request: a conditional GET (`If-None-Match` /
+`If-Modified-Since`) for the newest rows; a `304 Not Modified`, or an unchanged hash of
+the newest rows, means the source has nothing new. Corrections to older rows that leave
+the newest rows untouched are not seen by the hash; run with `force` to refetch anyway.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from .fetch_utt import UTT_DATE_FORMAT, parse_fund_dates, parse_fund_table, url as UTT_PAGE_URL
+from .http_fetch import DEFAULT_TIMEOUT, find_column_keys, find_data_url, make_session, rows_to_frame
+
+SCHEME_COLUMN = "Scheme Name"
+DATE_COLUMN = "Date Valued"
+PROBE_ROWS = 100  # Newest rows requested per check: several days of every scheme
+
+
+@dataclass
+class SourceFingerprint:
+    """
+    What was last seen of one source, stored as JSON next to its data.
+    """
+    source: str
+    validated_url: str = None
+    etag: str = None
+    last_modified: str = None
+    data_url: str = None
+    headers: list = field(default_factory=list)
+    column_keys: list = field(default_factory=list)
+    latest_hash: str = None
+    latest_date: str = None
+    processed_hash: str = None
+    checked_at: str = None
+    changed_at: str = None
+
+    @classmethod
+    def load(cls, path, source):
+        """Read the fingerprint at `path`, or return an empty one if there is none yet."""
+        if not os.path.exists(path):
+            return cls(source=source)
+        with open(path, encoding="utf-8") as file:
+            stored = json.load(file)
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in stored.items() if key in known})
+
+    def save(self, path):
+        """Write the fingerprint to `path` (atomically)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(asdict(self), file, indent=2)
+        os.replace(tmp_path, path)
+
+    def conditional_headers(self):
+        """Request headers that let the server answer `304 Not Modified`."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def latest_rows_hash(df, scheme_column=SCHEME_COLUMN, date_column=DATE_COLUMN, date_format=UTT_DATE_FORMAT):
+    """
+    Return `(hash, latest date)` of the newest row of every scheme in `df`.
+
+    The raw cell text is hashed (the "#" column is left out, since it is renumbered when new
+    rows arrive), so any new valuation or a change to the newest values changes the hash.
+    """
+    if df is None or df.empty:
+        return None, None
+    dates = parse_fund_dates(df[date_column].astype(str), date_format)
+    newest = df.assign(_date=dates.to_numpy()).sort_values([scheme_column, "_date"], kind="stable")
+    newest = newest.drop_duplicates(scheme_column, keep="last")
+    columns = [col for col in df.columns if col != "#"]
+    text = newest[columns].astype(str).to_csv(index=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), dates.max().date().isoformat()
+
+
+def _get(fingerprint, session, url, params, timeout):
+    # Conditional GET; the stored validators are only sent to the URL they came from
+    headers = fingerprint.conditional_headers() if url == fingerprint.validated_url else {}
+    response = session.get(url, params=params, headers=headers, timeout=timeout)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+def _probe(fingerprint, session, page_url, data_url, timeout):
+    # One request for the newest rows (two on the first check of a script-loaded table).
+    # Returns (url, response, rows), with rows None when the server answered 304 Not Modified.
+    if not data_url or not fingerprint.headers:
+        response = _get(fingerprint, session, page_url, None, timeout)
+        if response.status_code == 304:
+            return page_url, response, None
+        headers, rows = parse_fund_table(response.text)
+        fingerprint.headers = headers or []
+        fingerprint.column_keys = find_column_keys(response.text) or []
+        data_url = data_url or find_data_url(response.text, page_url)
+        if not data_url:
+            return page_url, response, pd.DataFrame(rows, columns=headers) if headers else pd.DataFrame()
+        fingerprint.data_url = data_url  # The page only loads its rows by script: check the data URL
+
+    params = {"draw": 1, "start": 0, "length": PROBE_ROWS}
+    if DATE_COLUMN in fingerprint.headers:
+        params.update({"order[0][column]": fingerprint.headers.index(DATE_COLUMN), "order[0][dir]": "desc"})
+    response = _get(fingerprint, session, data_url, params, timeout)
+    if response.status_code == 304:
+        return data_url, response, None
+    return data_url, response, rows_to_frame(response.json().get("data") or [], fingerprint.headers or None,
+                                          fingerprint.column_keys or None)
+
+
+def source_changed(fingerprint, page_url=UTT_PAGE_URL, data_url=None, session=None, timeout=DEFAULT_TIMEOUT,
+                   date_format=UTT_DATE_FORMAT):
+    """
+    This function checks with one lightweight request whether a source has new data.
+
+    Parameters:
+    - `fingerprint`: the source's `SourceFingerprint`; updated in place. Save it only once the
+      new data is stored, or a failed fetch would be remembered as already seen
+    - `page_url`, `data_url`: as for `fetch_fund_table_http`; a data URL discovered on the
+      page is remembered in the fingerprint
+    - `session`, `timeout`: optional `requests.Session` to reuse, per-request timeout
+
+    Returns True if the source changed since the fingerprint was taken (or was never checked).
+    """
+    own_session = session is None
+    session = session or make_session()
+    try:
+        url, response, rows = _probe(fingerprint, session, page_url, data_url or fingerprint.data_url, timeout)
+    finally:
+        if own_session:
+            session.close()
+
+    fingerprint.checked_at = _now()
+    if rows is None:
+        return False  # 304 Not Modified
+
+    fingerprint.validated_url = url
+    fingerprint.etag = response.headers.get("ETag")
+    fingerprint.last_modified = response.headers.get("Last-Modified")
+    if DATE_COLUMN not in rows.columns or SCHEME_COLUMN not in rows.columns:
+        fingerprint.latest_hash = None
+        return True  # Not a table we can fingerprint: always refetch
+
+    latest_hash, latest_date = latest_rows_hash(rows, date_format=date_format)
+    changed = latest_hash != fingerprint.latest_hash
+    fingerprint.latest_hash, fingerprint.latest_date = latest_hash, latest_date
+    if changed:
+        fingerprint.changed_at = fingerprint.checked_at
+    return changed
+
+
+def file_digest(path, block_size=1 << 20):
+    """
+    Return the sha256 of a file, or of every file under a directory (e.g. a Parquet dataset),
+    or None if `path` does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [path]
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(block_size), b""):
+                digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,252 @@
+"""
+Chunked, bounded-memory cleaning of large fund CSVs (backfills).
+
+Reading a whole multi-year CSV with `pd.read_csv` and cleaning it in place needs memory
+proportional to the file. `clean_csv_in_chunks` instead reads `chunk_size` rows at a
+time with pre-declared column types, cleans each chunk with the same rules as
+`clean_and_format_fund_data` / `clean_fund_data_basic`, and hands it to a writer that
+appends it to the output straight away:
+- CSV: appended to the output file,
+- Parquet: one row group per chunk in a single file (`.parquet`), or one file per chunk in
+  a year-partitioned dataset directory,
+- database: COPY'd into one staging table chunk by chunk and merged into `utt_data` once
+  at the end (`db.StagedUpsert`), in one transaction, so duplicate (scheme, date) rows are
+  resolved across the whole file exactly like the whole-file `upsert_utt_data`.
+
+With `provider` the chunks are normalized into the canonical schema by the provider's
+compiled plan instead (see `normalize.py`).
+
+Peak memory is therefore set by the chunk size (times the number of chunks in flight),
+not by the size of the file. With `workers > 1` the chunks are cleaned in a process pool
+while the main process keeps reading and writing in order.
+"""
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .fetch_utt import clean_and_format_fund_data, clean_fund_data_basic
+
+DEFAULT_CHUNK_SIZE = 100_000
+UTT_PROVIDER = "utt"  # `to_db` only loads this provider: `utt_data` has its key and "#" tiebreak
+
+
+def clean_chunk(chunk, date_column, bigint_columns, decimal_columns=None, date_format=None):
+    """
+    Clean one chunk: numbers (and the date column, if any) exactly like the whole-file cleaners.
+    """
+    if date_column:
+        return clean_and_format_fund_data(
+            chunk, date_column=date_column, bigint_columns=bigint_columns,
+            decimal_columns=decimal_columns, date_format=date_format,
+        )
+    return clean_fund_data_basic(chunk, bigint_columns, decimal_columns)
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self, ok=True):
+        pass
+
+
+class _ParquetWriter:
+    # Same physical types as storage.write_parquet: date32 dates, dictionary-encoded schemes
+    def __init__(self, path, date_column, scheme_column):
+        self.path = path
+        self.date_column = date_column
+        self.scheme_column = scheme_column
+        self.partitioned = not str(path).lower().endswith(".parquet") and bool(date_column)
+        self.schema = None
+        self.writer = None
+        self.parts = 0
+
+    def _table(self, chunk):
+        import pyarrow as pa
+
+        chunk = chunk.copy(deep=False)
+        if self.scheme_column in chunk.columns:
+            chunk[self.scheme_column] = chunk[self.scheme_column].astype(str)
+        if self.date_column:
+            chunk[self.date_column] = pd.to_datetime(chunk[self.date_column], format="%Y-%m-%d")
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.schema is None:
+            fields = []
+            for field in table.schema:
+                if field.name == self.scheme_column:
+                    field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+                elif field.name == self.date_column:
+                    field = field.with_type(pa.date32())
+                fields.append(field)
+            self.schema = pa.schema(fields)
+        return table.cast(self.schema)  # Later chunks follow the first chunk's types
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        table = self._table(chunk)
+        if not self.partitioned:
+            if self.writer is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            self.writer.write_table(table)
+            return
+
+        if self.parts == 0 and os.path.isdir(self.path):
+            shutil.rmtree(self.path)  # The chunks rewrite the whole dataset
+        years = pd.to_datetime(chunk[self.date_column], format="%Y-%m-%d").dt.year.astype("int16")
+        table = table.append_column("year", pa.array(years.to_numpy(), type=pa.int16()))
+        ds.write_dataset(
+            table,
+            self.path,
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("year", pa.int16())]), flavor="hive"),
+            existing_data_behavior="overwrite_or_ignore",  # Each chunk adds its own files
+            basename_template=f"part-{self.parts}-{{i}}.parquet",
+        )
+        self.parts += 1
+
+    def close(self, ok=True):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _DatabaseWriter:
+    # All chunks go to one staging table and are merged once, with the whole-file tiebreak on "#"
+    def __init__(self):
+        from contextlib import ExitStack
+
+        from .db import raw_connection
+        from .fetch_utt import create_utt_table
+
+        self.resources = ExitStack()
+        conn = self.resources.enter_context(raw_connection())
+        create_utt_table(conn)
+        self.conn = conn
+        self.upsert = None
+
+    def write(self, chunk):
+        from .db import StagedUpsert
+        from .fetch_utt import UTT_COLUMNS, UTT_KEY_COLUMNS
+
+        if self.upsert is None:
+            columns = [col for col in UTT_COLUMNS if col in chunk.columns]
+            self.upsert = StagedUpsert(
+                "utt_data", UTT_KEY_COLUMNS, self.conn, columns=columns,
+                tiebreak=["#"] if "#" in columns else None,
+            )
+        self.upsert.copy(chunk)
+
+    def close(self, ok=True):
+        try:
+            if self.upsert is not None and not ok:
+                self.upsert.rollback()
+            elif self.upsert is not None:
+                affected = self.upsert.merge()
+                print(f"✅ {affected} new or changed rows merged into 'utt_data' table.")
+        finally:
+            self.resources.close()
+
+
+def _writers(output_path, to_db, date_column, scheme_column):
+    writers = []
+    if output_path:
+        if str(output_path).lower().endswith(".csv"):
+            writers.append(_CsvWriter(output_path))
+        else:
+            writers.append(_ParquetWriter(output_path, date_column, scheme_column))
+    if to_db:
+        writers.append(_DatabaseWriter())
+    return writers
+
+
+def _cleaned_chunks(reader, workers, clean, clean_args):
+    # Yield cleaned chunks in file order; at most 2 x workers chunks are in flight at once
+    if workers <= 1:
+        for chunk in reader:
+            yield clean(chunk, *clean_args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for chunk in reader:
+            pending.append(executor.submit(clean, chunk, *clean_args))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def clean_csv_in_chunks(file_path, output_path=None, date_column=None, bigint_columns=(), decimal_columns=None,
+                        date_format=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, to_db=False,
+                        scheme_column="Scheme Name", dtypes=None, provider=None):
+    """
+    This function cleans a fund CSV chunk by chunk and writes each chunk out as soon as it is clean.
+
+    Parameters:
+    - `file_path`: raw CSV (as scraped, with thousands separators)
+    - `output_path`: `.csv` file, `.parquet` file or Parquet dataset directory (None = no file)
+    - `date_column`, `bigint_columns`, `decimal_columns`, `date_format`: cleaning rules, as for
+      `clean_and_format_fund_data` (without a `date_column`, `clean_fund_data_basic` is used)
+    - `chunk_size`: rows read, cleaned and written at a time
+    - `workers`: processes cleaning chunks in parallel (1 = clean in this process)
+    - `to_db`: also load the chunks into `utt_data` (COPY + upsert, see `upsert_utt_data`); only
+      for UTT data (`provider` None or "utt"), otherwise ValueError.
+      They are staged and merged once at the end, in one transaction: a (scheme, date) that
+      repeats, even in two different chunks, keeps the row with the lowest "#" as in the
+      whole-file load, and nothing is merged if cleaning fails part-way
+    - `dtypes`: extra `read_csv` dtypes; the numeric and date columns are always read as text,
+      so no chunk depends on type inference and the cleaning rules and error report apply unchanged
+    - `provider`: registered provider name; if given, its compiled schema replaces the cleaning
+      rules above, only its declared columns are read and every chunk is written in the
+      canonical schema (`normalize.CANONICAL_COLUMNS`)
+
+    Returns the number of rows written.
+    """
+    if to_db and provider not in (None, UTT_PROVIDER):
+        # `utt_data` is keyed and tiebroken the UTT way; other providers have no table yet
+        raise ValueError(f"to_db only loads UTT data into 'utt_data', not provider {provider!r}")
+
+    usecols = None
+    if provider:
+        from .normalize import compile_plan
+
+        plan = compile_plan(provider)
+        usecols, dtype = plan.usecols, dict.fromkeys(plan.read_columns, str)
+        date_column, clean, clean_args = plan.date_column, plan.apply, ()
+    else:
+        numeric_columns = list(bigint_columns) + list(decimal_columns or [])
+        dtype = {col: str for col in numeric_columns}
+        if date_column:
+            dtype[date_column] = str
+        clean, clean_args = clean_chunk, (date_column, bigint_columns, decimal_columns, date_format)
+    dtype.update(dtypes or {})
+
+    writers = _writers(output_path, to_db, date_column, scheme_column)
+    if not writers:
+        raise ValueError("Give an output_path and/or to_db=True")
+
+    rows = 0
+    ok = False
+    reader = pd.read_csv(file_path, usecols=usecols, dtype=dtype, chunksize=chunk_size)
+    try:
+        for cleaned in _cleaned_chunks(reader, workers, clean, clean_args):
+            for writer in writers:
+                writer.write(cleaned)
+            rows += len(cleaned)
+        ok = True
+    finally:
+        reader.close()
+        for writer in writers:
+            writer.close(ok)  # The database load is only merged if every chunk was cleaned
+    return rows
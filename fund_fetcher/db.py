@@ -0,0 +1,326 @@
+"""
+Shared database connection manager.
+
+Every database touchpoint (table creation, bulk loads, report and ad-hoc queries)
+goes through one module-level SQLAlchemy engine, so connections are pooled and reused
+across calls instead of being opened and torn down each time.
+
+Connection settings are resolved once, in this order:
+1. the `FUNDFETCH_DATABASE_URL` environment variable (a full SQLAlchemy URL),
+2. `DATABASE_URL`, or the `DB_*` credentials, in `scripts/config.py`,
+3. a local default (postgres@localhost:5432).
+
+Pool settings come from `FUNDFETCH_DB_POOL_SIZE` / `FUNDFETCH_DB_MAX_OVERFLOW` or
+`DB_POOL_SIZE` / `DB_MAX_OVERFLOW` in `scripts/config.py`. SQLAlchemy is imported
+only when the engine is first needed.
+
+Loads that change a table announce it: listeners registered in this process with
+`add_change_listener` are called after the commit, and a `NOTIFY` on `CHANGE_CHANNEL`
+(payload: the table name) is sent with the commit, so other processes (e.g. the query
+API server) can react too.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# PostgreSQL NOTIFY channel announcing committed changes, and the in-process listeners
+CHANGE_CHANNEL = "fundfetch_changes"
+_change_listeners = []
+
+# Fallbacks used when neither the environment nor scripts/config.py provide a value
+_DEFAULTS = {
+    "DATABASE_URL": None,
+    "DB_NAME": "fundfetch_analytics",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_POOL_SIZE": 5,
+    "DB_MAX_OVERFLOW": 5,
+}
+
+
+def _config_value(name):
+    # Environment first, then scripts/config.py, then the built-in default
+    env_value = os.environ.get(f"FUNDFETCH_{name}")
+    if env_value is not None:
+        return env_value
+    try:
+        from scripts import config
+    except ImportError:
+        config = None
+    return getattr(config, name, _DEFAULTS[name])
+
+
+def database_url():
+    """
+    Return the SQLAlchemy URL of the configured database.
+    """
+    url = _config_value("DATABASE_URL")
+    if url:
+        return url
+    from urllib.parse import quote_plus
+
+    user = quote_plus(str(_config_value("DB_USER")))
+    password = quote_plus(str(_config_value("DB_PASSWORD")))
+    credentials = f"{user}:{password}" if password else user
+    return (
+        f"postgresql+psycopg2://{credentials}@{_config_value('DB_HOST')}:{_config_value('DB_PORT')}"
+        f"/{_config_value('DB_NAME')}"
+    )
+
+
+def get_engine():
+    """
+    Return the shared, pooled SQLAlchemy engine, creating it on first use.
+
+    The pool checks connections with a lightweight ping before handing them out
+    (`pool_pre_ping`), so connections dropped by the server are replaced transparently.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+
+                _engine = create_engine(
+                    database_url(),
+                    pool_size=int(_config_value("DB_POOL_SIZE")),
+                    max_overflow=int(_config_value("DB_MAX_OVERFLOW")),
+                    pool_pre_ping=True,
+                )
+    return _engine
+
+
+def configure(url=None, pool_size=None, max_overflow=None):
+    """
+    Replace the shared engine, e.g. to point the package at a test database.
+
+    Arguments that are None fall back to the normal configuration.
+    """
+    global _engine
+    from sqlalchemy import create_engine
+
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = create_engine(
+            url or database_url(),
+            pool_size=int(pool_size if pool_size is not None else _config_value("DB_POOL_SIZE")),
+            max_overflow=int(max_overflow if max_overflow is not None else _config_value("DB_MAX_OVERFLOW")),
+            pool_pre_ping=True,
+        )
+    return _engine
+
+
+def dispose_engine():
+    """
+    Close every pooled connection and forget the shared engine (it is recreated on next use).
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+@contextmanager
+def raw_connection():
+    """
+    Borrow a DBAPI (psycopg2) connection from the shared pool.
+
+    Needed for driver-level features such as `COPY FROM STDIN`. The connection goes back
+    to the pool when the block exits; uncommitted work is rolled back by the pool.
+    """
+    conn = get_engine().raw_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()  # Returns the connection to the pool
+
+
+def add_change_listener(callback):
+    """
+    Call `callback(table)` whenever this process commits new or changed rows into a table.
+    """
+    _change_listeners.append(callback)
+    return callback
+
+
+def _notify_listeners(table):
+    for callback in list(_change_listeners):
+        callback(table)
+
+
+def publish_change(table, conn=None):
+    """
+    Announce that `table` changed: NOTIFY other processes and call the local listeners.
+
+    Loads through `copy_upsert` do this themselves; this is for other write paths.
+    """
+    if conn is None:
+        with raw_connection() as pooled:
+            return publish_change(table, pooled)
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_notify(%s, %s);", (CHANGE_CHANNEL, table))
+    conn.commit()
+    cursor.close()
+    _notify_listeners(table)
+
+
+def quote_identifier(name):
+    """
+    Quote a table or column name for PostgreSQL (the fund columns contain spaces and slashes).
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+class StagedUpsert:
+    """
+    One COPY + upsert load into `table`, fed frame by frame.
+
+    `copy(df)` streams each frame into one temporary staging table; `merge()` then merges the
+    whole staging table into `table` in one statement and commits. All frames of a load are
+    therefore de-duplicated together, exactly as if they had been one frame, while only one
+    frame at a time is held in memory. Everything happens in one transaction on `conn`;
+    `rollback()` abandons the load. Use `copy_upsert` for a single frame.
+
+    - `table`, `key_columns`, `tiebreak`: as for `copy_upsert`
+    - `columns`: columns loaded (default: those of the first frame); later frames must have them
+    - `conn`: psycopg2 connection, committed (or rolled back) but not closed
+    - `chunk_size`: rows serialized per COPY call, which bounds the size of the CSV buffer
+    """
+
+    def __init__(self, table, key_columns, conn, tiebreak=None, columns=None, chunk_size=100_000):
+        self.table = table
+        self.key_columns = list(key_columns)
+        self.tiebreak = list(tiebreak or [])
+        self.columns = list(columns) if columns is not None else None
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self._cursor = None
+
+    @property
+    def _staging(self):
+        return quote_identifier(f"{self.table}_staging")
+
+    def copy(self, df):
+        """COPY the rows of `df` into the staging table (created on the first call)."""
+        import io
+
+        if self._cursor is None:
+            if self.columns is None:
+                self.columns = list(df.columns)
+            self._cursor = self.conn.cursor()
+            self._cursor.execute(
+                f"CREATE TEMP TABLE {self._staging} (LIKE {quote_identifier(self.table)}) ON COMMIT DROP;"
+            )
+
+        column_list = ", ".join(quote_identifier(col) for col in self.columns)
+        copy_sql = f"COPY {self._staging} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+        df = df[self.columns]
+        for start in range(0, len(df), self.chunk_size):
+            buffer = io.StringIO()
+            df.iloc[start:start + self.chunk_size].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            self._cursor.copy_expert(copy_sql, buffer)
+        self.rows += len(df)
+
+    def merge(self):
+        """
+        Merge the staged rows into the table and commit. Returns the number of rows inserted
+        or updated; if there are any, the change is published (see `add_change_listener`).
+        """
+        if self._cursor is None:
+            return 0  # Nothing was staged
+
+        columns = self.columns
+        column_list = ", ".join(quote_identifier(col) for col in columns)
+        key_list = ", ".join(quote_identifier(col) for col in self.key_columns)
+        order_by = ", ".join(quote_identifier(col) for col in self.key_columns + self.tiebreak)
+        # Tiebreak columns (e.g. the site's "#", renumbered on every scrape) only order the
+        # staged rows; they are neither compared nor updated, so a renumbered reload writes nothing
+        value_columns = [col for col in columns if col not in self.key_columns + self.tiebreak]
+        target = quote_identifier(self.table)
+
+        if value_columns:
+            updates = ", ".join(f"{quote_identifier(col)} = EXCLUDED.{quote_identifier(col)}" for col in value_columns)
+            changed = " OR ".join(
+                f"{target}.{quote_identifier(col)} IS DISTINCT FROM EXCLUDED.{quote_identifier(col)}"
+                for col in value_columns
+            )
+            on_conflict = f"DO UPDATE SET {updates} WHERE {changed}"
+        else:
+            on_conflict = "DO NOTHING"
+
+        try:
+            self._cursor.execute(f"""
+                INSERT INTO {target} ({column_list})
+                SELECT DISTINCT ON ({key_list}) {column_list}
+                FROM {self._staging}
+                ORDER BY {order_by}
+                ON CONFLICT ({key_list}) {on_conflict};
+            """)
+            affected = self._cursor.rowcount
+            if affected:
+                # Delivered to listening sessions only if (and when) the transaction commits
+                self._cursor.execute("SELECT pg_notify(%s, %s);", (CHANGE_CHANNEL, self.table))
+            self.conn.commit()
+        except Exception:
+            self.rollback()
+            raise
+        self._close_cursor()
+        if affected:
+            _notify_listeners(self.table)
+        return affected
+
+    def rollback(self):
+        """Abandon the load: nothing staged so far reaches the table."""
+        self.conn.rollback()
+        self._close_cursor()
+
+    def _close_cursor(self):
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+
+
+def copy_upsert(df, table, key_columns, tiebreak=None, conn=None, chunk_size=100_000):
+    """
+    This function bulk-loads a DataFrame and merges it into `table` on `key_columns`.
+
+    Parameters:
+    - `df`: rows to load; its columns must exist in `table`
+    - `table`: target table, which needs a unique index on `key_columns`
+    - `key_columns`: columns identifying a row (e.g. scheme and date)
+    - `tiebreak`: columns ordering duplicate keys inside `df`; the first row per key wins.
+      They are written with new rows but never update a stored row or count as a change
+    - `conn`: optional psycopg2 connection, committed but not closed; by default one is
+      borrowed from the shared pool
+    - `chunk_size`: rows serialized per COPY call, which bounds the size of the CSV buffer
+
+    Key Steps:
+    - COPY the frame in CSV chunks into a temporary staging table (no per-row INSERTs)
+    - INSERT ... SELECT DISTINCT ON (keys) from staging ON CONFLICT (keys) DO UPDATE,
+      skipping rows whose values did not change, so reloading the same data writes nothing
+
+    If any row was inserted or updated, the change is published (see `add_change_listener`).
+    Returns the number of rows inserted or updated. To load a dataset frame by frame with
+    the same de-duplication across all frames, use `StagedUpsert`.
+    """
+    if conn is None:
+        with raw_connection() as pooled:
+            return copy_upsert(df, table, key_columns, tiebreak=tiebreak, conn=pooled, chunk_size=chunk_size)
+
+    upsert = StagedUpsert(table, key_columns, conn, tiebreak=tiebreak, chunk_size=chunk_size)
+    try:
+        upsert.copy(df)
+    except Exception:
+        upsert.rollback()
+        raise
+    return upsert.merge()
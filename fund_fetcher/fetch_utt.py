@@ -1,226 +1,375 @@
-# Import all necessary libraries and modules
-# These include Selenium components for browser automation,
-# BeautifulSoup for HTML parsing, and pandas for data manipulation.
-from selenium import webdriver
-from selenium.webdriver.common.by import By  # Used to specify how we locate elements (e.g., by name, ID, class, etc.)
-from selenium.webdriver.support.ui import WebDriverWait, Select  # WebDriverWait allows us to wait for certain conditions. Select is for handling dropdowns.
-from selenium.webdriver.support import expected_conditions as EC  # Contains expected conditions to wait for (e.g., element to be present)
-from selenium.webdriver.chrome.options import Options  # Used to set browser options (like headless mode)
-from selenium.webdriver.chrome.service import Service  # Used to configure the ChromeDriver service
-from webdriver_manager.chrome import ChromeDriverManager  # Automatically manages ChromeDriver installation
-from bs4 import BeautifulSoup  # For parsing HTML and extracting data from it
+# Import only the lightweight modules at module level.
+# Heavy dependencies (Selenium, webdriver-manager, psycopg2 and SQLAlchemy)
+# are imported inside the functions that need them. This keeps `import fund_fetcher`
+# free of side effects: no browser is started, no network request is made and no
+# database connection is opened until one of the functions below is actually called.
+import numpy as np
 import pandas as pd  # For handling tabular data and saving it to CSV
-import time  # Used for delays in execution (though WebDriverWait is usually preferred)
-import psycopg2
-from sqlalchemy import create_engine
 import os
 
+from .db import copy_upsert, get_engine, publish_change, raw_connection  # Shared, pooled database engine (SQLAlchemy is imported lazily)
+
 
 # The URL of the webpage containing the fund performance table
 url = "https://uttamis.co.tz/fund-performance"
 
-# Set up Chrome browser options for automated use
-options = Options()
-options.add_argument("--headless")  # Run browser in headless mode (no UI). Useful for automation and running on servers.
-options.add_argument("--no-sandbox")  # Disable sandboxing for Chrome (commonly needed for running in containers or CI/CD)
-options.add_argument("--disable-dev-shm-usage")  # Prevents issues related to limited shared memory space in container environments
-
-# Initialize a Chrome browser session using WebDriverManager to auto-handle driver setup
-driver = webdriver.Chrome(
-    service=Service(ChromeDriverManager().install()),  # Automatically install and use the correct ChromeDriver version
-    options=options  # Use the browser options defined above
-)
-
-try:
-    # Navigate to the fund performance page
-    driver.get(url)
-
-    # Wait up to 30 seconds for the dropdown element that controls how many table entries are shown
-    WebDriverWait(driver, 30).until(
-        EC.presence_of_element_located((By.NAME, "data_table_length"))
-    )
 
-    # Locate the dropdown menu by its HTML 'name' attribute and create a Select object to interact with it
-    dropdown = Select(driver.find_element(By.NAME, "data_table_length"))
+# === SCRAPING ===
+def parse_fund_table(html):
+    """
+    This function extracts the fund performance table from a page's HTML.
 
-    # Print all available dropdown options (e.g., 50, 100, 200, Max 5000) for debugging purposes
-    print("Dropdown options:")
-    for option in dropdown.options:
-        print(f"- {option.text} (value: {option.get_attribute('value')})")
+    Returns a `(headers, rows)` tuple where `rows` is a list of lists of stripped cell text,
+    or `(None, [])` if the page has no table with the class "table".
+    The page is read with the event-driven parser in `html_table`, so no document tree is
+    built, but all rows are collected into the list; use `html_table.stream_fund_table`
+    directly to consume the rows one at a time.
+    """
+    from .html_table import stream_fund_table
 
-    # Select the dropdown option that has value "5000", which corresponds to "Max (5000)" entries
-    dropdown.select_by_value("5000")
-    print("Selected 'Max (5000)' option...")
+    headers, rows = stream_fund_table(html)
+    return headers, list(rows)
 
-    # Pause execution for 5 seconds to allow the table to start loading the large number of entries
-    # (5000 entries can take significant time to fully load; this buffer prevents premature scraping)
-    time.sleep(5)
 
-    # Wait until the table has been updated and contains rows inside the <tbody> section
-    # This is done using an anonymous lambda function that tries to find <tr> elements inside the <tbody> of the table with ID "data_table"
-    WebDriverWait(driver, 30).until(
-        lambda d: d.find_element(By.ID, "data_table")
-                 .find_element(By.TAG_NAME, "tbody")
-                 .find_elements(By.TAG_NAME, "tr")  # Will return True when at least one row is present
-    )
+def scrape_table_with_browser(page_url, timeout=30, pool=None):
+    """
+    This function renders any page with a JavaScript-built table in headless Chrome and returns the table.
 
-    # Parse the current page's HTML using BeautifulSoup to allow easier navigation and extraction of the table
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    A warm browser is borrowed from `pool` (default: the shared `browser.get_browser_pool()`).
+    It waits until the first table with the class "table" is completely rendered (see
+    `browser.wait_for_table`), then parses it with `parse_fund_table`. Returns a DataFrame of
+    raw cell text, or None if no table was found.
+    """
+    from .browser import get_browser_pool, wait_for_table
 
-    # Find the main table on the page that has the class "table"
-    table = soup.find("table", class_="table")
+    with (pool or get_browser_pool()).browser() as driver:
+        driver.get(page_url)
+        wait_for_table(driver, "table.table", timeout=timeout)
+        headers, rows = parse_fund_table(driver.page_source)
 
-    # If the table exists and was successfully found:
-    if table:
-        # Extract the column headers by selecting all <th> elements inside the <thead>
-        headers = [th.text.strip() for th in table.select("thead th")]
+    if headers is None:
+        return None
+    return pd.DataFrame(rows, columns=headers)
 
-        # Extract each row of data by selecting <tr> elements inside the <tbody>
-        # For each row, extract the text from each <td> (cell), strip whitespace, and store it as a list of lists
-        rows = [
-            [td.text.strip() for td in tr.select("td")]
-            for tr in table.select("tbody tr")
-        ]
 
-        # Create a pandas DataFrame from the extracted rows and headers
-        df = pd.DataFrame(rows, columns=headers)
+def _scrape_with_selenium(page_url, pool=None, page_length=5000, timeout=30):
+    """
+    This function renders the fund performance page in a headless Chrome browser and returns the table.
 
-        # Display the first 5 rows of the resulting DataFrame in the terminal for verification
-        print(df.head())
-    else:
+    It is the fallback engine for when the page cannot be fetched over plain HTTP.
+    """
+    from selenium.webdriver.common.by import By  # Used to specify how we locate elements (e.g., by name, ID, class, etc.)
+    from selenium.webdriver.support.ui import WebDriverWait, Select  # WebDriverWait allows us to wait for certain conditions. Select is for handling dropdowns.
+    from selenium.webdriver.support import expected_conditions as EC  # Contains expected conditions to wait for (e.g., element to be present)
+
+    from .browser import get_browser_pool, wait_for_table
+
+    # Borrow a warm browser; it goes back to the pool (or is closed if it broke) afterwards
+    with (pool or get_browser_pool()).browser() as driver:
+        # Navigate to the fund performance page
+        driver.get(page_url)
+
+        # Wait up to `timeout` seconds for the dropdown element that controls how many table entries are shown
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.NAME, "data_table_length"))
+        )
+
+        # Locate the dropdown menu by its HTML 'name' attribute and create a Select object to interact with it
+        dropdown = Select(driver.find_element(By.NAME, "data_table_length"))
+
+        # Select the option with value `page_length`; "5000" corresponds to "Max (5000)" entries
+        dropdown.select_by_value(str(page_length))
+        print(f"Selected {page_length} entries per page...")
+
+        # Wait until the table really shows the new page size: the rendered rows must match the
+        # DataTables row count / "Showing 1 to 5,000 of N entries" label, so a half-rendered
+        # table (or the previous 10-row page) is never captured
+        state = wait_for_table(driver, "#data_table", page_length=page_length, timeout=timeout)
+        print(f"Table ready: {state['rows']} rows rendered")
+
+        headers, rows = parse_fund_table(driver.page_source)
+
+    if headers is None:
+        return None
+    return pd.DataFrame(rows, columns=headers)
+
+
+def scrape_fund_data(page_url=url, output_path="utt_fund_data_max.csv", engine="auto", data_url=None):
+    """
+    This function scrapes the fund performance table from the UTT AMIS website.
+
+    Parameters:
+    - `page_url`: URL of the fund performance page
+    - `output_path`: CSV file the raw table is saved to (set to None to skip saving)
+    - `engine`: "http" to fetch the table directly over HTTP, "selenium" to render the page
+      in a headless Chrome browser, or "auto" (default) to try HTTP first and fall back to Selenium
+    - `data_url`: optional DataTables JSON endpoint used by the HTTP engine
+
+    Returns the raw DataFrame, or None if the table was not found.
+    """
+    if engine not in ("auto", "http", "selenium"):
+        raise ValueError(f"Unknown scrape engine: {engine!r}")
+
+    df = None
+    if engine in ("auto", "http"):
+        from .http_fetch import fetch_fund_table_http
+        try:
+            df = fetch_fund_table_http(page_url, data_url=data_url)
+        except Exception as exc:  # Network/HTTP/JSON errors all mean "use the browser instead"
+            if engine == "http":
+                raise
+            print(f"⚠️ HTTP fetch failed ({exc}); falling back to Selenium")
+        if engine == "auto" and (df is None or df.empty):
+            df = None
+
+    if df is None and engine in ("auto", "selenium"):
+        df = _scrape_with_selenium(page_url)
+
+    if df is None:
         # If the table could not be found on the page, print an error message
         print("Table not found.")
+        return None
 
-finally:
-    # Close and terminate the browser session to free up resources (regardless of whether success or failure)
-    driver.quit()
+    # Display the first 5 rows of the resulting DataFrame in the terminal for verification
+    print(df.head())
 
-# Save the DataFrame as a CSV file named 'utt_fund_data_max.csv'
-# This allows future analysis or processing without needing to re-scrape
-df.to_csv("utt_fund_data_max.csv", index=False)
+    # Save the DataFrame so future analysis or processing does not need a re-scrape
+    if output_path:
+        df.to_csv(output_path, index=False)
+        print(f"Saved to '{output_path}'")
 
-# Confirm to the user via console that the file was saved successfully
-print("Saved to 'utt_fund_data_max.csv'")
+    return df
 
 
 # Clean the basic columns (BIGINT and numeric columns)
-def clean_fund_data_basic(df, bigint_columns, decimal_columns=None):
+def clean_fund_data_basic(df, bigint_columns, decimal_columns=None, errors="report", thousands=",", decimal="."):
     """
     This function takes a DataFrame and lists of column names representing numeric values.
     - `bigint_columns`: typically large integer-like values such as 'Net Asset Value' or 'Outstanding Units'.
     - `decimal_columns`: columns containing decimal values like prices or ratios.
+    - `errors`: what to do with values that are not numbers: "report" (default) prints a summary
+      and sets them to NaN, "coerce" sets them to NaN silently, "raise" raises a ValueError.
+    - `thousands`, `decimal`: number format of the text values (default "1,234.56")
 
     Purpose:
     - Many scraped values are in string format with commas (e.g., "1,234,567").
     - This function removes commas and converts the values into numeric `float` types for further analysis.
     - It ensures that all such columns are ready for computations or storage into a numeric-compatible database.
+
+    All text columns are converted together in one pass: their values are stacked into a single
+    Series, the separators are removed with one vectorized, non-regex `Series.str.replace` and
+    the result is cast to float once; `pd.to_numeric` is only used to locate bad values when the
+    cast fails. Columns that are already numeric (e.g. read with `read_fund_csv`) are only cast
+    to float. Bad values are listed in `df.attrs["numeric_errors"]`.
     """
-    for col in bigint_columns:
-        df[col] = df[col].replace({',': ''}, regex=True).astype(float)  # Remove commas and convert to float
-    if decimal_columns:
-        for col in decimal_columns:
-            df[col] = df[col].replace({',': ''}, regex=True).astype(float)  # Handle decimals similarly
+    if errors not in ("report", "coerce", "raise"):
+        raise ValueError(f"Unknown errors mode: {errors!r}")
+
+    columns = list(bigint_columns) + list(decimal_columns or [])
+    text_columns = [col for col in columns if not pd.api.types.is_numeric_dtype(df[col])]
+    for col in columns:
+        if col not in text_columns:
+            df[col] = df[col].astype(float)  # Already numeric, nothing to strip
+
+    if text_columns:
+        # Stack column by column (Fortran order) so each column is a contiguous block of the array
+        raw = df[text_columns].to_numpy(dtype=object).ravel(order="F")
+        values = pd.Series(raw, dtype=object)
+        # Remove the thousands separators with a plain (non-regex) vectorized replace
+        text = values.str.replace(thousands, "", regex=False)
+        if decimal != ".":
+            text = text.str.replace(decimal, ".", regex=False)
+        text = text.where(text.notna(), values)  # NaN and other non-strings pass through unchanged
+        bad = None
+        try:
+            parsed = text.to_numpy(dtype=float)  # Same rounding as float(), like the old astype(float)
+        except (TypeError, ValueError):
+            # Some values are not numbers: find them with to_numeric, then parse the rest
+            ok = pd.to_numeric(text, errors="coerce").notna().to_numpy()
+            parsed = np.full(len(text), np.nan)
+            parsed[ok] = text[ok].to_numpy(dtype=float)
+            # A value is bad if it was present but did not parse (blank cells just become NaN)
+            bad = ~ok & pd.notna(raw) & text.astype(str).str.strip().ne("").to_numpy()
+
+        n_rows = len(df)
+        report = {}
+        for i, col in enumerate(text_columns):
+            df[col] = parsed[i * n_rows:(i + 1) * n_rows]
+            col_bad = None if bad is None else bad[i * n_rows:(i + 1) * n_rows]
+            if col_bad is not None and col_bad.any():
+                report[col] = raw[i * n_rows:(i + 1) * n_rows][col_bad].tolist()
+
+        if report:
+            df.attrs["numeric_errors"] = report
+            summary = "; ".join(f"{col}: {len(vals)} bad (e.g. {vals[:3]!r})" for col, vals in report.items())
+            if errors == "raise":
+                raise ValueError(f"Non-numeric values found: {summary}")
+            if errors == "report":
+                print(f"⚠️ Non-numeric values set to NaN -> {summary}")
+
     return df  # Return cleaned DataFrame
 
+
+def read_fund_csv(file_path, thousands=",", **kwargs):
+    """
+    Read a raw fund CSV, letting pandas' C parser drop the thousands separators while it parses.
+
+    Numeric columns come back as floats, so `clean_fund_data_basic` has no string work left to do.
+    Extra keyword arguments are passed to `pd.read_csv`; "round_trip" float precision is used by
+    default so values match the string cleaner exactly.
+    """
+    kwargs.setdefault("float_precision", "round_trip")
+    return pd.read_csv(file_path, thousands=thousands, **kwargs)
+
+# Date format published by UTT AMIS in the `Date Valued` column (e.g. "02-05-2025")
+UTT_DATE_FORMAT = "%d-%m-%Y"
+
+
+def parse_fund_dates(values, date_format=None):
+    """
+    This function parses a column of date strings into datetimes, parsing each distinct value only once.
+
+    Parameters:
+    - `values`: Series of date strings
+    - `date_format`: explicit `strptime` format (e.g. "%d-%m-%Y"); if None the format is inferred
+      day-first, which is slower and only meant for sources with an unknown format
+
+    Fund tables repeat the same valuation date once per scheme, so the distinct values are
+    factorized first, parsed, and mapped back to the rows. The cost grows with the number of
+    distinct dates instead of the number of rows. Missing values become NaT.
+    """
+    codes, uniques = pd.factorize(values)  # codes[i] indexes uniques; missing values get -1
+    if date_format:
+        parsed = pd.to_datetime(pd.Index(uniques), format=date_format)
+    else:
+        parsed = pd.to_datetime(pd.Index(uniques), dayfirst=True)
+    parsed = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(parsed, index=values.index, name=values.name)
+
+
+def format_fund_dates(dates, date_format="%Y-%m-%d"):
+    """
+    Format a datetime Series as strings, formatting each distinct date only once (NaT becomes NaN).
+    """
+    codes, uniques = pd.factorize(dates)
+    text = pd.Index(pd.DatetimeIndex(uniques).strftime(date_format), dtype=object)
+    text = text.take(codes, allow_fill=True, fill_value=np.nan)
+    return pd.Series(text, index=dates.index, name=dates.name, dtype=object)
+
+
 # Clean and format date
-def clean_and_format_fund_data(df, date_column, bigint_columns, decimal_columns=None, date_format="%b %d, %Y"):
+def clean_and_format_fund_data(df, date_column, bigint_columns, decimal_columns=None, date_format=None,
+                               date_output="text"):
     """
     This function extends `clean_fund_data_basic` by also converting date columns to a uniform format.
-    
+
     Parameters:
     - `df`: DataFrame containing the fund data
     - `date_column`: Name of the date column to clean and reformat
     - `bigint_columns`, `decimal_columns`: Passed to the basic cleaner
-    - `date_format`: Optional format string if the original dates need specific parsing
+    - `date_format`: Format of the original dates (use `UTT_DATE_FORMAT` for UTT AMIS data);
+      if None the format is inferred day-first
+    - `date_output`: "text" (default) for 'YYYY-MM-DD' strings, "datetime" to keep a `datetime64`
+      column, or "date" for `datetime.date` values
 
     Key Steps:
     - Clean numeric columns first
-    - Parse dates from strings to datetime objects
-    - Reformat all dates to 'YYYY-MM-DD' which is standard for databases and analysis
+    - Parse dates from strings to datetime objects (each distinct date is parsed once)
+    - Reformat all dates to 'YYYY-MM-DD' which is standard for databases and analysis,
+      unless `date_output` asks to keep them as dates
     """
+    if date_output not in ("text", "datetime", "date"):
+        raise ValueError(f"Unknown date_output: {date_output!r}")
+
     df = clean_fund_data_basic(df, bigint_columns, decimal_columns)
-    df[date_column] = pd.to_datetime(df[date_column], dayfirst=True).dt.strftime('%Y-%m-%d')
+    dates = parse_fund_dates(df[date_column], date_format)
+    if date_output == "text":
+        df[date_column] = format_fund_dates(dates)
+    elif date_output == "date":
+        df[date_column] = dates.dt.date
+    else:
+        df[date_column] = dates
     return df  # Return fully cleaned and formatted DataFrame
 
 # === Dispatcher Function ===
-def process_fund_csv(file_path):
+def process_fund_csv(file_path, chunk_size=None, output_path=None, workers=1, to_db=False, provider=None):
     """
-    This function serves as a central dispatcher to clean different types of fund CSVs based on the filename.
+    This function serves as a central dispatcher to clean the fund CSVs of every known provider.
 
     It does the following:
-    1. Reads the CSV from the specified `file_path`.
-    2. Checks the filename to determine which institution (zansec, sanlam, utt) the data belongs to.
-    3. Calls the appropriate cleaning logic based on the structure and format typical to that institution's data.
-    4. Outputs a cleaned CSV file with a modified name (prefix `cleaned_table_` instead of `table_`).
-
-    This approach ensures flexibility and reuse across different datasets that have slightly different formats.
+    1. Reads the header of the CSV at `file_path`.
+    2. Finds the registered provider (utt, sanlaam, zansec, ...) whose declared columns the
+       header has (see `normalize.detect_provider`), unless `provider` names it.
+    3. Reads only that provider's columns and normalizes them with its compiled schema into
+       the canonical columns shared by all providers (see `normalize.CANONICAL_COLUMNS`).
+    4. Outputs a cleaned CSV file with a modified name (`_cleaned_table_` instead of `_max`).
+
+    New providers only need a `FundSource` declaring their columns; no change is needed here.
+
+    For large backfills pass `chunk_size`: the file is then read, cleaned and written `chunk_size`
+    rows at a time (see `chunked.clean_csv_in_chunks`), so memory no longer grows with the file.
+    In that mode `output_path` may also be a `.parquet` file or dataset directory, `workers`
+    cleans chunks in parallel processes and `to_db=True` merges every chunk of a UTT file into `utt_data`.
     """
+    from .normalize import compile_plan, detect_provider
+
     filename = os.path.basename(file_path)  # Extract only the filename from full path
-    df = pd.read_csv(file_path)  # Load the data into a DataFrame
-
-    if "zansec" in filename:
-        # ZANSEC files typically only need bigint columns cleaned (no decimals or dates)
-        cleaned = clean_fund_data_basic(df, bigint_columns=["Net Asset Value", "Outstanding number of units"])
-    
-    elif "sanlaam" in filename:
-        # Sanlam files have both bigint and date columns that need parsing
-        cleaned = clean_and_format_fund_data(
-            df,
-            date_column="Date",
-            bigint_columns=["Net Asset Value", "Outstanding Number of Units"]
-        )
+    if provider is None:
+        provider = detect_provider(pd.read_csv(file_path, nrows=0).columns)
+    if provider is None:
+        # If the columns don't match any known provider, skip and notify
+        print(f"Unknown file type: {filename}")
+        return
 
-    elif "utt" in filename:
-        # UTT files include both bigint and decimal columns, no dates
-        cleaned = clean_fund_data_basic(
-            df,
-            bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
-            decimal_columns=["Nav Per Unit", "Sale Price per Unit", "Repurchase Price/Unit"]
-        )
+    # Replace "_max" with "_cleaned_table_" in filename and save to that new path
+    output_path = output_path or file_path.replace("_max", "_cleaned_table_")
 
-    else:
-        # If file doesn't match any known patterns, skip and notify
-        print(f"Unknown file type: {filename}")
+    if chunk_size:
+        from .chunked import clean_csv_in_chunks
+
+        rows = clean_csv_in_chunks(
+            file_path, output_path, chunk_size=chunk_size, workers=workers, to_db=to_db, provider=provider
+        )
+        print(f"✅ Cleaned {provider} file saved to: {output_path} ({rows} rows, in chunks of {chunk_size})")
         return
 
-    # Replace "table_" with "cleaned_table_" in filename and save to that new path
-    output_path = file_path.replace("_max", "_cleaned_table_")
+    plan = compile_plan(provider)
+    cleaned = plan.apply(plan.read_csv(file_path))  # Load only the provider's columns, as text
     cleaned.to_csv(output_path, index=False)
-    print(f"✅ Cleaned file saved to: {output_path}")
-    
-# Define file path of the data to process (can be updated if called dynamically)
-file_path = r"C:\Users\rshun\Downloads\CML_2025\Scripts\Personal projects\1. Web Scraping\UTT_schemes\utt_fund_data_max.csv"
-
-# === DATABASE CONNECTION ===
-# === CLEAN CSV ===
-file_path = "utt_fund_data_max.csv"
-df = pd.read_csv(file_path)
-
-# Clean UTT-specific format
-cleaned = clean_and_format_fund_data(
-    df,
-    date_column="Date Valued",
-    bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
-    decimal_columns=["Nav Per Unit", "Sale Price per Unit", "Repurchase Price/Unit"]
-)
-
-cleaned_file_path = file_path.replace("_max", "_cleaned_table")
-cleaned.to_csv(cleaned_file_path, index=False)
-print(f"✅ Cleaned file saved to: {cleaned_file_path}")
+    print(f"✅ Cleaned {provider} file saved to: {output_path}")
 
-# === DATABASE CONFIG ===
-DB_NAME = "fundfetch_analytics"
-DB_USER = "postgres"
-DB_PASSWORD = "tanzania08"
-DB_HOST = "localhost"
-DB_PORT = "5432"
 
-def get_engine():
-    return create_engine(f'postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
+# === DATABASE CONFIG ===
+# Credentials and pooling live in `fund_fetcher.db` (configured from the environment or
+# scripts/config.py); every function below borrows its connection from that shared pool.
+
+# Columns of the utt_data table, in table order
+UTT_COLUMNS = [
+    "#",
+    "Scheme Name",
+    "Net Asset Value",
+    "Outstanding Number of Units",
+    "Nav Per Unit",
+    "Sale Price per Unit",
+    "Repurchase Price/Unit",
+    "Date Valued",
+]
+UTT_KEY_COLUMNS = ["Scheme Name", "Date Valued"]
 
 # === TABLE CREATION ===
-def create_utt_table():
-    conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+def create_utt_table(conn=None):
+    """
+    Create the `utt_data` table if needed, with a unique index on ("Scheme Name", "Date Valued").
+
+    Duplicate (scheme, date) rows left by earlier append-only loads are removed first
+    (the most recently inserted copy is kept), so the unique index can be built.
+    Pass `conn` to use an existing psycopg2 connection; it is committed but not closed.
+    By default a connection is borrowed from the shared pool.
+    """
+    if conn is None:
+        with raw_connection() as pooled:
+            return create_utt_table(pooled)
+
     cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS utt_data (
@@ -234,16 +383,91 @@ def create_utt_table():
             "Date Valued" DATE
         );
     """)
+    cursor.execute("""
+        DELETE FROM utt_data a USING utt_data b
+        WHERE a.ctid < b.ctid
+          AND a."Scheme Name" = b."Scheme Name"
+          AND a."Date Valued" = b."Date Valued";
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS utt_data_scheme_date_key
+        ON utt_data ("Scheme Name", "Date Valued");
+    """)
     conn.commit()
     cursor.close()
-    conn.close()
 
 # === DATA INSERTION ===
-def insert_utt_data(df):
-    engine = get_engine()
-    df.to_sql("utt_data", con=engine, if_exists="append", index=False)
-    print("✅ Data inserted into 'utt_data' table.")
+def upsert_utt_data(df, conn=None, chunk_size=100_000):
+    """
+    This function bulk-loads cleaned UTT data and merges it into `utt_data`.
+
+    Parameters:
+    - `df`: cleaned DataFrame with the `utt_data` columns
+    - `conn`: optional psycopg2 connection (e.g. to a local or embedded test database);
+      it is committed but not closed. By default a connection is borrowed from the shared pool
+    - `chunk_size`: rows serialized per COPY call, which bounds the size of the CSV buffer
+
+    Key Steps:
+    - COPY the frame in CSV chunks into a temporary staging table (no per-row INSERTs)
+    - INSERT ... SELECT from staging ON CONFLICT ("Scheme Name", "Date Valued") DO UPDATE,
+      skipping rows whose values did not change, so reloading the same data adds nothing
+    - If the staging data repeats a (scheme, date), the row with the lowest "#" (the newest
+      on the website) wins. "#" is only this tiebreak: the site renumbers it on every scrape,
+      so a stored row keeps its first "#" and a renumbered reload changes nothing
+
+    Returns the number of rows inserted or updated. Requires the unique index created by
+    `create_utt_table`.
+    """
+    columns = [col for col in UTT_COLUMNS if col in df.columns]
+    return copy_upsert(
+        df[columns], "utt_data", UTT_KEY_COLUMNS,
+        tiebreak=["#"] if "#" in columns else None, conn=conn, chunk_size=chunk_size,
+    )
+
+def insert_utt_data(df, method="upsert", conn=None):
+    """
+    Load cleaned UTT data into `utt_data`.
+
+    - `method="upsert"` (default): COPY + merge on ("Scheme Name", "Date Valued"), see `upsert_utt_data`
+    - `method="append"`: the original `DataFrame.to_sql` append (duplicates are not detected)
+
+    Returns the number of rows inserted or changed.
+    """
+    if method == "upsert":
+        affected = upsert_utt_data(df, conn=conn)
+        print(f"✅ {affected} new or changed rows merged into 'utt_data' table.")
+        return affected
+    if method == "append":
+        engine = get_engine()
+        df.to_sql("utt_data", con=engine, if_exists="append", index=False)
+        publish_change("utt_data")
+        print("✅ Data inserted into 'utt_data' table.")
+        return len(df)
+    raise ValueError(f"Unknown insert method: {method!r}")
+
 
 # === EXECUTION FLOW ===
-create_utt_table()
-insert_utt_data(cleaned)
+# Runs only when the module is executed directly (python -m fund_fetcher.fetch_utt),
+# never on import.
+if __name__ == "__main__":
+    file_path = "utt_fund_data_max.csv"
+    df = scrape_fund_data(output_path=file_path)
+    if df is None:
+        # Nothing to clean or load; exit with an error so schedulers notice the failed run
+        raise SystemExit("❌ No fund table was scraped; nothing cleaned or loaded")
+
+    # Clean UTT-specific format
+    cleaned = clean_and_format_fund_data(
+        df,
+        date_column="Date Valued",
+        bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
+        decimal_columns=["Nav Per Unit", "Sale Price per Unit", "Repurchase Price/Unit"],
+        date_format=UTT_DATE_FORMAT
+    )
+
+    cleaned_file_path = file_path.replace("_max", "_cleaned_table")
+    cleaned.to_csv(cleaned_file_path, index=False)
+    print(f"✅ Cleaned file saved to: {cleaned_file_path}")
+
+    create_utt_table()
+    insert_utt_data(cleaned)
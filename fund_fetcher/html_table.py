@@ -0,0 +1,174 @@
+"""
+Streaming, event-driven extraction of the fund table from HTML.
+
+BeautifulSoup builds the whole document tree before the table can be read, which for
+a 5000-row page means hundreds of thousands of Python objects held in memory at once.
+This module instead reacts to start/end tag events (`html.parser.HTMLParser`) and keeps
+only the row being read: each `<tr>` of the table body is emitted as soon as it closes,
+so `stream_fund_table` hands the rows out as a generator and the page can be fed in chunks.
+The fetch paths (`fetch_utt.parse_fund_table`) still collect the rows into a list, since
+the raw table is stored as text before it is cleaned; the saving there is that no
+document tree is built.
+
+The extraction matches `BeautifulSoup(html, "html.parser")` + `table.select("thead th")` /
+`table.select("tbody tr")` / `td.text.strip()` on the first table with the class "table".
+"""
+
+from collections import deque
+from html.parser import HTMLParser
+
+
+class _TableEvents(HTMLParser):
+    """
+    Collects the headers and body rows of one table from parser events.
+    """
+
+    def __init__(self, table_class="table", table_id=None):
+        super().__init__(convert_charrefs=True)
+        self.table_class = table_class
+        self.table_id = table_id
+        self.headers = None
+        self.rows = deque()  # Completed rows not yet handed out
+        self.done = False
+        self._depth = 0  # Nesting depth of <table> inside the matched table (0 = not inside)
+        self._section = None  # "thead" or "tbody"
+        self._row = None
+        self._cell = None
+        self._header_cells = []
+
+    def _matches(self, attrs):
+        attrs = dict(attrs)
+        if self.table_id is not None:
+            return attrs.get("id") == self.table_id
+        return self.table_class in (attrs.get("class") or "").split()
+
+    def _close_cell(self):
+        if self._cell is not None:
+            text = "".join(self._cell).strip()
+            if self._section == "thead":
+                self._header_cells.append(text)
+            elif self._row is not None:
+                self._row.append(text)
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            if self._depth:
+                self._depth += 1
+            elif self._matches(attrs):
+                self._depth = 1
+            return
+        if self._depth != 1:
+            return
+        if tag in ("thead", "tbody"):
+            self._close_row()
+            self._section = tag
+        elif tag == "tr" and self._section == "tbody":
+            self._close_row()
+            self._row = []
+        elif tag == "th" and self._section == "thead":
+            self._close_cell()
+            self._cell = []
+        elif tag == "td" and self._section == "tbody" and self._row is not None:
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self._depth:
+            return
+        if tag == "table":
+            self._depth -= 1
+            if not self._depth:
+                self._close_row()
+                self._finish_headers()
+                self.done = True
+            return
+        if self._depth != 1:
+            return
+        if tag in ("td", "th"):
+            self._close_cell()
+        elif tag == "tr":
+            self._close_row()
+        elif tag in ("thead", "tbody"):
+            self._close_row()
+            if tag == "thead":
+                self._finish_headers()
+            self._section = None
+
+    def _finish_headers(self):
+        if self.headers is None:
+            self._close_cell()
+            self.headers = self._header_cells
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _chunks(source, chunk_size=1 << 16):
+    # Accept a whole document or any iterable of text chunks (e.g. response.iter_content(decode_unicode=True))
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        yield from source
+
+
+def stream_fund_table(source, table_class="table", table_id=None):
+    """
+    This function extracts a table from HTML as a stream of rows.
+
+    Parameters:
+    - `source`: the HTML as a string, or an iterable of text chunks
+    - `table_class`: the first table with this class is read (ignored if `table_id` is given)
+    - `table_id`: read the table with this id instead
+
+    Returns `(headers, rows)`: `headers` is the list of `<thead>` `<th>` texts (None if the
+    table was not found) and `rows` is a generator of lists of stripped `<td>` texts, one per
+    `<tbody>` row. Chunks are only parsed as far as needed to find the headers; the rest
+    is parsed while `rows` is consumed.
+    """
+    parser = _TableEvents(table_class=table_class, table_id=table_id)
+    chunks = _chunks(source)
+
+    # Parse until the headers are known (or the input ends)
+    exhausted = False
+    while parser.headers is None and not parser.done:
+        chunk = next(chunks, None)
+        if chunk is None:
+            parser.close()
+            if parser._depth:  # Input ended inside the table
+                parser._close_row()
+                parser._finish_headers()
+            exhausted = True
+            break
+        parser.feed(chunk)
+
+    if parser.headers is None:
+        return None, iter(())
+
+    def rows():
+        nonlocal exhausted
+        while True:
+            while parser.rows:
+                yield parser.rows.popleft()
+            if parser.done or exhausted:
+                return
+            chunk = next(chunks, None)
+            if chunk is None:
+                parser.close()
+                parser._close_row()
+                exhausted = True
+            else:
+                parser.feed(chunk)
+
+    return parser.headers, rows()
+
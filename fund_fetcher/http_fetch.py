@@ -0,0 +1,184 @@
+"""
+Lightweight HTTP fetch engine for the UTT AMIS fund performance table.
+
+Instead of driving a full Chrome session, the table is fetched directly:
+- from the DataTables server-side data endpoint (JSON), paging through results
+  with `start`/`length` until `recordsTotal` rows have been read, or
+- from the server-rendered HTML of the fund performance page when no data
+  endpoint is configured or advertised by the page.
+
+All requests go through one pooled `requests.Session`, so TCP/TLS connections are
+reused across pages. Both URLs are parameters, which lets the engine be pointed at
+a local stub server serving recorded responses.
+"""
+
+import re
+
+import pandas as pd
+
+from .fetch_utt import url as UTT_PAGE_URL, parse_fund_table
+
+# Rows requested per call to the DataTables endpoint
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_TIMEOUT = 30  # seconds, per request
+
+DEFAULT_HEADERS = {
+    "User-Agent": "FundFetch/1.0 (+https://github.com/rshungu/FundFetch_and_Insight_Tanzania)",
+    "Accept": "text/html,application/json;q=0.9,*/*;q=0.8",
+}
+
+# Matches the data URL in a DataTables init block, e.g. `ajax: "/api/funds"` or `"ajax": {"url": "/api/funds"}`
+_AJAX_URL_RE = re.compile(r"""["']?ajax["']?\s*:\s*(?:\{[^}]*?["']?url["']?\s*:\s*)?["']([^"']+)["']""")
+# Matches the DataTables `columns: [...]` option and each column's `data` key inside it
+_COLUMNS_RE = re.compile(r"""["']?columns["']?\s*:\s*\[(.*?)\]""", re.S)
+_DATA_KEY_RE = re.compile(r"""["']?data["']?\s*:\s*["']([^"']+)["']""")
+
+
+def make_session(pool_size=4, retries=3):
+    """
+    This function builds a `requests.Session` with a pooled connection adapter.
+
+    Parameters:
+    - `pool_size`: number of connections kept alive per host
+    - `retries`: retry count (with exponential backoff) for connection errors and 5xx/429 responses
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def find_data_url(html, page_url):
+    """
+    Return the absolute DataTables data URL advertised in the page's scripts, or None.
+    """
+    from urllib.parse import urljoin
+
+    match = _AJAX_URL_RE.search(html)
+    return urljoin(page_url, match.group(1)) if match else None
+
+
+def find_column_keys(html):
+    """
+    Return the JSON keys of the table columns (`columns[i].data` in the DataTables init block),
+    in column order, or None if the page does not declare them.
+    """
+    match = _COLUMNS_RE.search(html)
+    keys = _DATA_KEY_RE.findall(match.group(1)) if match else []
+    return keys or None
+
+
+def iter_datatables_pages(session, data_url, page_size=DEFAULT_PAGE_SIZE, params=None, timeout=DEFAULT_TIMEOUT):
+    """
+    This generator pages through a DataTables server-side endpoint.
+
+    Parameters:
+    - `session`: the shared `requests.Session`
+    - `data_url`: URL of the JSON data endpoint
+    - `page_size`: rows requested per call (`length`)
+    - `params`: extra query parameters sent with every request (e.g. ordering or date filters)
+
+    Yields one list of rows per page. Rows are returned as the endpoint sends them
+    (lists of cell values, or dicts keyed by column). Paging stops once `recordsTotal`
+    rows have been read or the endpoint returns an empty page.
+    """
+    start = 0
+    draw = 1
+    while True:
+        query = {"draw": draw, "start": start, "length": page_size}
+        query.update(params or {})
+        response = session.get(data_url, params=query, timeout=timeout)
+        response.raise_for_status()
+        payload = response.json()
+
+        rows = payload.get("data") or []
+        if not rows:
+            return
+        yield rows
+
+        start += len(rows)
+        draw += 1
+        total = payload.get("recordsFiltered", payload.get("recordsTotal"))
+        if total is not None and start >= int(total):
+            return
+
+
+def rows_to_frame(rows, headers, keys=None):
+    """
+    Build a DataFrame from DataTables rows, which are sent either as arrays or as objects per row.
+
+    Object rows are matched to the headers by key, never by position: with `keys` (the
+    `columns[i].data` names, see `find_column_keys`) the i-th key fills the i-th header,
+    otherwise the keys must be the header names themselves. Raises ValueError if the
+    rows' keys do not match.
+    """
+    if not (rows and isinstance(rows[0], dict)):
+        return pd.DataFrame(rows, columns=headers or None)
+
+    df = pd.DataFrame(rows)
+    if not headers:
+        return df
+    keys = keys or headers
+    if len(keys) != len(headers):
+        raise ValueError(f"{len(keys)} column keys for {len(headers)} table headers")
+    missing = [key for key in keys if key not in df.columns]
+    if missing:
+        raise ValueError(f"Data rows lack the column keys {missing} (row keys: {list(df.columns)})")
+    return df[keys].set_axis(headers, axis=1)
+
+
+def fetch_fund_table_http(page_url=UTT_PAGE_URL, data_url=None, page_size=DEFAULT_PAGE_SIZE,
+                          session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    This function fetches the fund performance table over plain HTTP.
+
+    Parameters:
+    - `page_url`: URL of the fund performance page (used for the headers and server-rendered rows)
+    - `data_url`: DataTables JSON endpoint; if None, it is discovered from the page scripts when possible
+    - `page_size`: rows per JSON page
+    - `session`: optional `requests.Session` to reuse; a pooled one is created otherwise
+    - `timeout`: per-request timeout in seconds
+
+    Key Steps:
+    - GET the page once and read the table headers (and any server-rendered rows)
+    - If a data endpoint is known, page through it and build the DataFrame from the JSON rows
+      (object rows are matched to the headers by their `columns[i].data` keys)
+    - Otherwise return the server-rendered table rows
+
+    Returns a DataFrame of raw (uncleaned) cell values, or None if no table was found.
+    """
+    own_session = session is None
+    session = session or make_session()
+    try:
+        response = session.get(page_url, timeout=timeout)
+        response.raise_for_status()
+        html = response.text
+
+        headers, rows = parse_fund_table(html)
+        data_url = data_url or find_data_url(html, page_url)
+
+        if data_url:
+            rows = []
+            for page in iter_datatables_pages(session, data_url, page_size=page_size, timeout=timeout):
+                rows.extend(page)
+            return rows_to_frame(rows, headers, find_column_keys(html))
+
+        if headers is None:
+            return None
+        return pd.DataFrame(rows, columns=headers)
+    finally:
+        if own_session:
+            session.close()
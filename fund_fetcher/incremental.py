@@ -0,0 +1,164 @@
+"""
+Incremental scraping of the UTT AMIS fund performance table.
+
+The full table is no longer capped at the 5000 rows of the "Max (5000)" dropdown:
+the HTTP engine pages through every row. For daily runs, only the rows newer than
+what is already stored are needed, so this module:
+- reads the latest `Date Valued` per `Scheme Name` from the stored raw dataset
+  (the high-water marks),
+- walks the table newest-first, page by page, keeping only rows above the marks,
+- stops at the first page that contains nothing new,
+- merges the new rows into the stored dataset.
+"""
+
+import os
+
+import pandas as pd
+
+from .fetch_utt import UTT_DATE_FORMAT, parse_fund_dates, parse_fund_table, url as UTT_PAGE_URL
+from .http_fetch import (
+    DEFAULT_TIMEOUT,
+    find_column_keys,
+    find_data_url,
+    iter_datatables_pages,
+    make_session,
+    rows_to_frame,
+)
+
+SCHEME_COLUMN = "Scheme Name"
+DATE_COLUMN = "Date Valued"
+RAW_DATE_FORMAT = UTT_DATE_FORMAT  # Format of `Date Valued` as published by UTT AMIS
+
+# Rows per page when walking the table for new data; a day adds about one row per scheme
+INCREMENTAL_PAGE_SIZE = 50
+
+
+def _parse_dates(values, date_format=RAW_DATE_FORMAT):
+    # Raw files hold dd-mm-YYYY, cleaned files hold YYYY-MM-DD; accept either
+    try:
+        return parse_fund_dates(values, date_format)
+    except (ValueError, TypeError):
+        return parse_fund_dates(values, "%Y-%m-%d")
+
+
+def high_water_marks(df, scheme_column=SCHEME_COLUMN, date_column=DATE_COLUMN, date_format=RAW_DATE_FORMAT):
+    """
+    Return a dict of `{scheme name: latest date}` for the rows in `df`.
+    """
+    if df is None or df.empty:
+        return {}
+    dates = _parse_dates(df[date_column], date_format)
+    return dates.groupby(df[scheme_column].values).max().to_dict()
+
+
+def read_high_water_marks(path, scheme_column=SCHEME_COLUMN, date_column=DATE_COLUMN, date_format=RAW_DATE_FORMAT):
+    """
+    Read the stored dataset at `path` and return its high-water marks (empty if the file does not exist).
+    """
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, usecols=[scheme_column, date_column], dtype=str)
+    return high_water_marks(df, scheme_column, date_column, date_format)
+
+
+def _new_rows_mask(page, marks, scheme_column, date_column, date_format):
+    # True for rows whose date is after their scheme's mark (or whose scheme is not stored yet)
+    dates = _parse_dates(page[date_column], date_format)
+    known = pd.to_datetime(page[scheme_column].map(marks))
+    return (known.isna() | (dates > known)).to_numpy()
+
+
+def fetch_new_rows(marks, page_url=UTT_PAGE_URL, data_url=None, page_size=INCREMENTAL_PAGE_SIZE,
+                   session=None, timeout=DEFAULT_TIMEOUT, scheme_column=SCHEME_COLUMN,
+                   date_column=DATE_COLUMN, date_format=RAW_DATE_FORMAT):
+    """
+    This function fetches only the rows that are newer than the stored high-water marks.
+
+    Parameters:
+    - `marks`: `{scheme name: latest stored date}`, see `read_high_water_marks`
+    - `page_url`, `data_url`, `session`, `timeout`: as for `fetch_fund_table_http`
+    - `page_size`: rows per page while walking the table
+
+    Key Steps:
+    - Request the table sorted by `Date Valued`, newest first
+    - Keep the rows of each page that are above their scheme's mark
+    - Stop at the first page with no new rows, since everything after it is older
+
+    Returns a DataFrame of raw (uncleaned) new rows, in table order.
+    """
+    own_session = session is None
+    session = session or make_session()
+    try:
+        response = session.get(page_url, timeout=timeout)
+        response.raise_for_status()
+        headers, rendered_rows = parse_fund_table(response.text)
+        data_url = data_url or find_data_url(response.text, page_url)
+        column_keys = find_column_keys(response.text)
+
+        if not data_url:
+            # Only the server-rendered rows are available; they are the newest ones
+            page = pd.DataFrame(rendered_rows, columns=headers)
+            new_rows = page[_new_rows_mask(page, marks, scheme_column, date_column, date_format)]
+            if marks and len(new_rows) == len(page) and len(page):
+                print("⚠️ Every rendered row is new; older missing rows cannot be paged without a data endpoint")
+            return new_rows.reset_index(drop=True)
+
+        # DataTables ordering parameters: sort by the date column, descending
+        params = {}
+        if headers and date_column in headers:
+            params = {"order[0][column]": headers.index(date_column), "order[0][dir]": "desc"}
+
+        frames = []
+        for rows in iter_datatables_pages(session, data_url, page_size=page_size, params=params, timeout=timeout):
+            page = rows_to_frame(rows, headers, column_keys)
+            mask = _new_rows_mask(page, marks, scheme_column, date_column, date_format)
+            if not mask.any():
+                break  # Reached data that is already stored
+            frames.append(page[mask])
+
+        if not frames:
+            return pd.DataFrame(columns=headers)
+        return pd.concat(frames, ignore_index=True)
+    finally:
+        if own_session:
+            session.close()
+
+
+def scrape_incremental(raw_path, page_url=UTT_PAGE_URL, data_url=None, page_size=INCREMENTAL_PAGE_SIZE,
+                       session=None, scheme_column=SCHEME_COLUMN, date_column=DATE_COLUMN,
+                       date_format=RAW_DATE_FORMAT):
+    """
+    This function brings the raw dataset at `raw_path` up to date with the website.
+
+    New rows are placed on top of the stored ones (newest first, like the website) and stored rows
+    with the same (scheme, date) as a new row are replaced. Stored rows keep their "#"; the new
+    rows are numbered after the highest stored one, so an update only adds rows. If nothing is
+    stored yet, the whole table is fetched.
+
+    Returns the DataFrame of rows that were added.
+    """
+    stored = pd.read_csv(raw_path, dtype=str) if os.path.exists(raw_path) else None
+    marks = high_water_marks(stored, scheme_column, date_column, date_format)
+
+    new_rows = fetch_new_rows(
+        marks, page_url=page_url, data_url=data_url, page_size=page_size, session=session,
+        scheme_column=scheme_column, date_column=date_column, date_format=date_format,
+    )
+    if new_rows.empty:
+        print("✅ No new rows; stored data is up to date")
+        return new_rows
+
+    merged = new_rows
+    if stored is not None:
+        key = [scheme_column, date_column]
+        replaced = pd.MultiIndex.from_frame(stored[key]).isin(pd.MultiIndex.from_frame(new_rows[key]))
+        kept = stored[~replaced]
+        if "#" in new_rows.columns and "#" in kept.columns:
+            # Stored rows keep their numbers; only the new rows are numbered, after the highest one
+            highest = pd.to_numeric(kept["#"], errors="coerce").max()
+            first = 1 if pd.isna(highest) else int(highest) + 1
+            new_rows = new_rows.assign(**{"#": [str(n) for n in range(first, first + len(new_rows))]})
+        merged = pd.concat([new_rows, kept], ignore_index=True)
+    merged.to_csv(raw_path, index=False)
+    print(f"✅ Added {len(new_rows)} new rows to '{raw_path}'")
+    return new_rows
@@ -0,0 +1,244 @@
+"""
+Stage timing and resource instrumentation for the pipeline (`main.py`).
+
+Each pipeline step runs inside `PipelineMonitor.stage(name)`, which records:
+- wall-clock and CPU time (this process plus any worker processes it waited for),
+- rows in and rows out (set by the caller on the yielded `StageStats`),
+- peak resident memory (RSS) during the stage, sampled in a background thread,
+- bytes read and written by the process during the stage (`/proc/self/io` rchar/wchar:
+  everything passed through read/write system calls, whether or not it hit the disk),
+- whether the stage succeeded.
+
+Every finished stage is appended as one JSON line to the metrics log, and at the end of the
+run `write_prometheus` can write the same numbers in the Prometheus text format (for the
+node_exporter textfile collector). Stages listed in `profile` are also run under cProfile;
+their stats are dumped to `<profile_dir>/<stage>-<run_id>.prof` (open with `pstats` or
+snakeviz) and the top functions are printed.
+
+Memory and I/O counters come from `/proc` and are left empty on platforms without it.
+CPU time comes from `resource.getrusage`; where the `resource` module does not exist
+(Windows) it falls back to `time.process_time()`, which leaves out worker processes.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_PROMETHEUS_PREFIX = "fundfetch_stage"
+
+
+@dataclass
+class StageStats:
+    """
+    Measurements of one pipeline stage (one JSON line in the metrics log).
+    """
+    run_id: str
+    stage: str
+    started_at: str = None
+    status: str = "ok"
+    error: str = None
+    wall_seconds: float = None
+    cpu_seconds: float = None
+    rows_in: int = None
+    rows_out: int = None
+    peak_rss_bytes: int = None
+    bytes_read: int = None
+    bytes_written: int = None
+    profile_path: str = None
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _io_counters():
+    try:
+        with open("/proc/self/io", encoding="ascii") as file:
+            counters = dict(line.split(":", 1) for line in file.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _cpu_seconds():
+    # User + system time of this process and of its terminated, waited-for children
+    if resource is None:
+        return time.process_time()  # This process only
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class _RssSampler(threading.Thread):
+    # Polls the resident set size while a stage runs and keeps the maximum
+    def __init__(self, interval=0.05):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = _rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        rss = _rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return self.peak
+
+
+class PipelineMonitor:
+    """
+    Collects `StageStats` for one pipeline run.
+
+    - `log_path`: JSON-lines file every finished stage is appended to (None = no log)
+    - `prometheus_path`: where `write_prometheus` writes the text-format metrics (None = not written)
+    - `profile`: stage names to run under cProfile ("all" profiles every stage)
+    - `profile_dir`: where the `.prof` files are written
+    """
+
+    def __init__(self, log_path=None, prometheus_path=None, profile=(), profile_dir="outputs/profiles/",
+                 run_id=None):
+        self.log_path = log_path
+        self.prometheus_path = prometheus_path
+        self.profile = set(profile or ())
+        self.profile_dir = profile_dir
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.stages = []
+
+    def _profiled(self, name):
+        return name in self.profile or "all" in self.profile
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Measure the enclosed block as stage `name`; set `rows_in` / `rows_out` on the yielded stats.
+        """
+        stats = StageStats(
+            run_id=self.run_id, stage=name, rows_in=rows_in,
+            started_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        sampler = _RssSampler()
+        sampler.start()
+        io_before = _io_counters()
+        cpu_before = _cpu_seconds()
+        started = time.perf_counter()
+        profiler = cProfile.Profile() if self._profiled(name) else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield stats
+        except BaseException as exc:
+            stats.status = "error"
+            stats.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            stats.wall_seconds = round(time.perf_counter() - started, 6)
+            stats.cpu_seconds = round(_cpu_seconds() - cpu_before, 6)
+            stats.peak_rss_bytes = sampler.stop()
+            io_after = _io_counters()
+            if io_before is not None and io_after is not None:
+                stats.bytes_read = io_after[0] - io_before[0]
+                stats.bytes_written = io_after[1] - io_before[1]
+            if profiler is not None:
+                stats.profile_path = self._dump_profile(name, profiler)
+            self.stages.append(stats)
+            self._log(stats)
+
+    def _dump_profile(self, name, profiler, top=15):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{name}-{self.run_id}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(top)
+        print(f"🔬 Profile of stage '{name}' saved to {path}\n{summary.getvalue()}")
+        return path
+
+    def _log(self, stats):
+        if not self.log_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(asdict(stats)) + "\n")
+
+    def summary(self):
+        """
+        Return a short human-readable table of the stages measured so far.
+        """
+        lines = [f"{'stage':<14}{'wall s':>9}{'cpu s':>9}{'rows out':>11}{'peak MB':>9}{'read MB':>9}{'write MB':>9}"]
+        for stats in self.stages:
+            def mb(value):
+                return "-" if value is None else f"{value / 1e6:.1f}"
+            lines.append(
+                f"{stats.stage:<14}{stats.wall_seconds:>9.2f}{stats.cpu_seconds:>9.2f}"
+                f"{'-' if stats.rows_out is None else stats.rows_out:>11}{mb(stats.peak_rss_bytes):>9}"
+                f"{mb(stats.bytes_read):>9}{mb(stats.bytes_written):>9}"
+                + ("" if stats.status == "ok" else "  ❌ " + stats.error)
+            )
+        return "\n".join(lines)
+
+    def write_prometheus(self, path=None):
+        """
+        Write the stage measurements in the Prometheus text exposition format.
+
+        The file is replaced atomically, so a collector never reads a half-written file.
+        """
+        path = path or self.prometheus_path
+        if not path:
+            return None
+        metrics = [
+            ("wall_seconds", "Wall-clock duration of the stage"),
+            ("cpu_seconds", "CPU time of the stage, including waited-for worker processes"),
+            ("rows_in", "Rows entering the stage"),
+            ("rows_out", "Rows produced by the stage"),
+            ("peak_rss_bytes", "Peak resident memory of the process during the stage"),
+            ("bytes_read", "Bytes read by the process during the stage"),
+            ("bytes_written", "Bytes written by the process during the stage"),
+        ]
+        lines = []
+        for field, help_text in metrics:
+            name = f"{_PROMETHEUS_PREFIX}_{field}"
+            lines += [f"# HELP {name} {help_text}.", f"# TYPE {name} gauge"]
+            for stats in self.stages:
+                value = getattr(stats, field)
+                if value is not None:
+                    lines.append(f'{name}{{stage="{stats.stage}"}} {value}')
+        name = f"{_PROMETHEUS_PREFIX}_success"
+        lines += [f"# HELP {name} 1 if the stage succeeded in the last run, else 0.", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{stage="{stats.stage}"}} {int(stats.status == "ok")}' for stats in self.stages]
+        lines += [
+            "# HELP fundfetch_last_run_timestamp_seconds Unix time the last pipeline run finished.",
+            "# TYPE fundfetch_last_run_timestamp_seconds gauge",
+            f"fundfetch_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        return path
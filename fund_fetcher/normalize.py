@@ -0,0 +1,284 @@
+"""
+Schema-driven normalization of every provider's table into one canonical, typed schema.
+
+Each provider declares its schema once in the source registry (`sources.FundSource`):
+which column names the scheme, which columns hold numbers and in what format, which
+column holds the date and in what format, and which of its column names differ from the
+canonical ones (e.g. Zan Securities' "Outstanding number of units"). `compile_plan` turns that declaration into a
+`NormalizePlan` once per provider; applying the plan to a batch then needs no further
+decisions:
+- only the declared columns are read, all as text, so `read_csv` does no type inference
+  (the row number column, such as UTT's "#", is kept when a file has it),
+- every numeric column is converted in one stacked pass (`clean_fund_data_basic`),
+- each distinct date is parsed once (`parse_fund_dates`),
+- the result has exactly `CANONICAL_COLUMNS`, in that order and with those dtypes;
+  columns a provider does not publish are filled with typed missing values.
+
+Because every normalized batch has the same columns and dtypes, batches from any mix of
+providers are concatenated once (`normalize_batches` / `normalize_files`) without
+object or float upcasting. Provider files are recognized by their header
+(`detect_provider`), not by their file name.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .fetch_utt import clean_fund_data_basic, parse_fund_dates
+from .sources import FundSource, get_source, registered_sources
+
+PROVIDER_COLUMN = "Provider"
+ROW_NUMBER_COLUMN = "#"
+SCHEME_COLUMN = "Scheme Name"
+DATE_COLUMN = "Date Valued"
+NUMERIC_COLUMNS = [
+    "Net Asset Value",
+    "Outstanding Number of Units",
+    "Nav Per Unit",
+    "Sale Price per Unit",
+    "Repurchase Price/Unit",
+]
+
+# Canonical schema: column -> dtype ("category" is replaced by the provider categories)
+CANONICAL_COLUMNS = {
+    PROVIDER_COLUMN: "category",
+    ROW_NUMBER_COLUMN: "Int64",
+    SCHEME_COLUMN: str,
+    DATE_COLUMN: "datetime64[ns]",
+    **{col: "float64" for col in NUMERIC_COLUMNS},
+}
+
+
+def provider_dtype():
+    """
+    Categorical dtype of the `Provider` column: one category per registered provider, in
+    registration order, so batches of different providers concatenate as a category.
+    """
+    return pd.CategoricalDtype([source.name for source in registered_sources()])
+
+
+@dataclass(frozen=True)
+class NormalizePlan:
+    """
+    A provider's schema compiled into the column work needed to normalize one batch.
+
+    - `provider`: registry name of the provider
+    - `scheme_column`: raw name of the scheme column
+    - `numeric`: `(raw name, canonical name)` of every numeric column
+    - `date`: `(raw name, date format)` of the date column, or None
+    - `row_number`: raw name of the optional row number column, or None
+    - `thousands`, `decimal`: number format of the numeric columns
+    - `categories`: the `Provider` categorical dtype
+    """
+    provider: str
+    scheme_column: str
+    numeric: tuple
+    date: tuple
+    row_number: str
+    thousands: str
+    decimal: str
+    categories: pd.CategoricalDtype
+
+    @property
+    def read_columns(self):
+        """Raw columns the plan needs; a file without one of them cannot be normalized."""
+        columns = [self.scheme_column] + [raw for raw, _ in self.numeric]
+        if self.date:
+            columns.append(self.date[0])
+        return columns
+
+    @property
+    def usecols(self):
+        """`read_csv` column filter: the needed columns plus the row number column if present."""
+        return frozenset(self.read_columns + ([self.row_number] if self.row_number else [])).__contains__
+
+    @property
+    def date_column(self):
+        """Canonical date column if the provider publishes dates, else None."""
+        return DATE_COLUMN if self.date else None
+
+    def matches(self, columns):
+        """True if a table with these column names has every column the plan reads."""
+        return set(self.read_columns).issubset(columns)
+
+    def read_csv(self, file_path, **kwargs):
+        """Read the plan's columns of a raw CSV as text (extra keyword arguments go to `pd.read_csv`)."""
+        return pd.read_csv(file_path, usecols=self.usecols, dtype=dict.fromkeys(self.read_columns, str),
+                           **kwargs)
+
+    def apply(self, df, errors="report"):
+        """
+        Normalize one raw batch of this provider into the canonical schema.
+
+        `errors` is passed to `clean_fund_data_basic`; non-numeric values are listed in
+        `attrs["numeric_errors"]` of the result. Raises ValueError if the batch lacks one of
+        the provider's declared columns.
+        """
+        missing = [col for col in self.read_columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Provider {self.provider!r} table lacks its declared columns {missing}")
+
+        n_rows = len(df)
+        canonical = [col for _, col in self.numeric]
+        numbers = df[[raw for raw, _ in self.numeric]].set_axis(canonical, axis=1)
+        numbers = clean_fund_data_basic(numbers, canonical, errors=errors, thousands=self.thousands,
+                                        decimal=self.decimal)
+
+        if self.date:
+            raw, date_format = self.date
+            dates = parse_fund_dates(df[raw], date_format).to_numpy(dtype="datetime64[ns]")
+        else:
+            dates = np.full(n_rows, np.datetime64("NaT", "ns"))
+
+        if self.row_number and self.row_number in df.columns:
+            row_numbers = pd.to_numeric(df[self.row_number], errors="coerce").astype("Int64").array
+        else:
+            row_numbers = pd.array([pd.NA] * n_rows, dtype="Int64")
+
+        columns = {
+            PROVIDER_COLUMN: pd.Categorical.from_codes(
+                np.full(n_rows, self.categories.categories.get_loc(self.provider)),
+                dtype=self.categories,
+            ),
+            ROW_NUMBER_COLUMN: row_numbers,
+            SCHEME_COLUMN: df[self.scheme_column].to_numpy(dtype=object),
+            DATE_COLUMN: dates,
+        }
+        for col in NUMERIC_COLUMNS:
+            columns[col] = numbers[col].to_numpy() if col in numbers.columns else np.full(n_rows, np.nan)
+
+        result = pd.DataFrame(columns, index=df.index, columns=list(CANONICAL_COLUMNS))
+        if "numeric_errors" in numbers.attrs:
+            result.attrs["numeric_errors"] = numbers.attrs["numeric_errors"]
+        return result
+
+
+def _compile(source, categories):
+    # Turn the provider's declarations into raw -> canonical column work, checking them once
+    if not source.scheme_column:
+        raise ValueError(f"Source {source.name!r} does not declare its scheme_column")
+    if source.name not in categories.categories:
+        raise ValueError(f"Source {source.name!r} is not registered (see `register_source`)")
+    renames = dict(source.columns)
+    unknown = set(renames.values()) - set(NUMERIC_COLUMNS) - {DATE_COLUMN}
+    if unknown:
+        raise ValueError(f"Source {source.name!r} maps to columns that are not numeric or the date: "
+                         f"{sorted(unknown)} (declare the scheme with scheme_column)")
+
+    numeric = tuple((raw, renames.get(raw, raw)) for raw in [*source.bigint_columns, *source.decimal_columns])
+    not_numeric = [raw for raw, col in numeric if col not in NUMERIC_COLUMNS]
+    if not_numeric:
+        raise ValueError(f"Source {source.name!r} has numeric columns outside the canonical schema: {not_numeric}")
+    if len({col for _, col in numeric}) != len(numeric):
+        raise ValueError(f"Source {source.name!r} maps two numeric columns to the same canonical column")
+    if source.date_column and renames.get(source.date_column, source.date_column) != DATE_COLUMN:
+        raise ValueError(f"Source {source.name!r}: map its date column {source.date_column!r} to {DATE_COLUMN!r}")
+
+    return NormalizePlan(
+        provider=source.name,
+        scheme_column=source.scheme_column,
+        numeric=numeric,
+        date=(source.date_column, source.date_format) if source.date_column else None,
+        row_number=source.row_number_column,
+        thousands=source.thousands,
+        decimal=source.decimal,
+        categories=categories,
+    )
+
+
+_PLANS = {}  # provider name -> (source it was compiled from, plan)
+
+
+def compile_plan(provider):
+    """
+    This function returns the compiled `NormalizePlan` of a registered provider.
+
+    Parameters:
+    - `provider`: provider name (see `sources.registered_sources`) or its `FundSource`
+
+    Plans are compiled once and reused; a provider replaced with `register_source`, or a
+    newly registered provider, is compiled again. Raises ValueError if the provider's
+    declared schema does not fit the canonical schema or it is not registered.
+    """
+    source = provider if isinstance(provider, FundSource) else get_source(provider)
+    categories = provider_dtype()
+    cached = _PLANS.get(source.name)
+    if cached is None or cached[0] is not source or cached[1].categories != categories:
+        cached = _PLANS[source.name] = (source, _compile(source, categories))
+    return cached[1]
+
+
+def detect_provider(columns):
+    """
+    Return the name of the registered provider whose declared columns all appear in `columns`
+    (a table header), preferring the provider that reads the most of them; None if none fits.
+    """
+    best, best_size = None, 0
+    for source in registered_sources():
+        plan = compile_plan(source.name)
+        if plan.matches(columns) and len(plan.read_columns) > best_size:
+            best, best_size = source.name, len(plan.read_columns)
+    return best
+
+
+def empty_frame():
+    """An empty frame with the canonical columns and dtypes."""
+    dtypes = {col: provider_dtype() if dtype == "category" else dtype for col, dtype in CANONICAL_COLUMNS.items()}
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+
+
+def normalize_frame(df, provider=None, errors="report"):
+    """
+    This function normalizes one provider's raw table into the canonical schema.
+
+    Parameters:
+    - `df`: raw table, as scraped (numbers and dates as text) or already numeric
+    - `provider`: provider name; if None it is detected from the column names
+    - `errors`: how non-numeric values are handled, as for `clean_fund_data_basic`
+
+    Raises ValueError if no registered provider matches the columns.
+    """
+    provider = provider or detect_provider(df.columns)
+    if provider is None:
+        raise ValueError(f"No registered provider matches the columns {list(df.columns)}")
+    return compile_plan(provider).apply(df, errors=errors)
+
+
+def normalize_batches(batches, errors="report"):
+    """
+    This function normalizes raw batches of any providers and concatenates them into one typed frame.
+
+    Parameters:
+    - `batches`: iterable of `(provider, DataFrame)`; `provider` may be None to detect it
+    - `errors`: how non-numeric values are handled, as for `clean_fund_data_basic`
+
+    Every batch is cleaned in a single pass and has the canonical dtypes, so the one final
+    concatenation keeps them (float64 numbers, datetime64 dates, categorical provider).
+    """
+    frames = [normalize_frame(df, provider, errors=errors) for provider, df in batches]
+    if not frames:
+        return empty_frame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def normalize_files(paths, provider=None, errors="report"):
+    """
+    This function reads raw CSVs of any providers and returns them as one canonical frame.
+
+    Parameters:
+    - `paths`: raw CSV files; each file's provider is detected from its header
+    - `provider`: force one provider for every file instead
+    - `errors`: how non-numeric values are handled, as for `clean_fund_data_basic`
+
+    Only the columns a provider's plan needs are read, all as text, so each file is parsed
+    once, by the plan's own converters.
+    """
+    def batches():
+        for path in paths:
+            name = provider or detect_provider(pd.read_csv(path, nrows=0).columns)
+            if name is None:
+                raise ValueError(f"No registered provider matches the columns of {path}")
+            yield name, compile_plan(name).read_csv(path)
+
+    return normalize_batches(batches(), errors=errors)
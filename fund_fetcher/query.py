@@ -0,0 +1,401 @@
+"""
+Query API over `utt_data`, with an in-process read-through cache.
+
+Analysts and dashboards keep asking the same few questions, so they are answered here
+instead of with ad-hoc SQL:
+- `schemes()`: the scheme names
+- `latest_nav(scheme)`: the scheme's most recent valuation
+- `nav_on(scheme, date)`: the valuation in force on a date (the last one on or before it)
+- `series(scheme, start, end)`: the scheme's valuations over a date range
+
+Results are kept in a thread-safe LRU cache whose entries also expire after a TTL, so
+a repeated question is answered from memory without touching the database. The whole
+cache is dropped as soon as `utt_data` changes: immediately when the load happens in this
+process, and through PostgreSQL `LISTEN` (see `listen_for_changes`) when another process
+commits it. The TTL bounds staleness if neither signal arrives.
+
+`serve()` exposes the same questions as a small local JSON HTTP endpoint
+(`scripts/serve_api.py`).
+"""
+
+import functools
+import json
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+
+from .db import CHANGE_CHANNEL, add_change_listener, get_engine
+
+TABLE = "utt_data"
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 300.0  # Seconds
+
+_VALUATION_COLUMNS = (
+    '"Scheme Name", "Date Valued", "Nav Per Unit", "Net Asset Value", '
+    '"Outstanding Number of Units", "Sale Price per Unit", "Repurchase Price/Unit"'
+)
+
+
+@dataclass(frozen=True)
+class NavPoint:
+    """
+    One valuation of a scheme.
+    """
+    scheme: str
+    date: date
+    nav_per_unit: float
+    net_asset_value: float
+    outstanding_units: float
+    sale_price: float
+    repurchase_price: float
+
+    def to_dict(self):
+        values = asdict(self)
+        values["date"] = self.date.isoformat()
+        return values
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache whose entries also expire `ttl` seconds after they were stored.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by clear(), so results computed before it are not stored
+
+    def get(self, key):
+        """Return `(True, value)` for a live entry, `(False, generation)` otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, self._generation
+
+    def put(self, key, value, generation):
+        """Store `value` unless the cache was cleared since `generation` was read."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses}
+
+
+_cache = QueryCache()
+
+
+def configure_cache(maxsize=None, ttl=None):
+    """
+    Resize the cache and/or change its TTL (the cache is emptied).
+    """
+    if maxsize is not None:
+        _cache.maxsize = maxsize
+    if ttl is not None:
+        _cache.ttl = ttl
+    _cache.clear()
+
+
+def invalidate_cache():
+    """
+    Drop every cached result (called automatically when `utt_data` changes).
+    """
+    _cache.clear()
+
+
+def cache_stats():
+    """
+    Return the cache size, settings and hit/miss counters.
+    """
+    return _cache.stats()
+
+
+@add_change_listener
+def _on_change(table):
+    if table == TABLE:
+        invalidate_cache()
+
+
+def _cached(function):
+    # Read-through: answer from the cache, or run the query and remember its result
+    @functools.wraps(function)
+    def wrapper(*args):
+        key = (function.__name__, *args)
+        found, value = _cache.get(key)
+        if found:
+            return value
+        result = function(*args)
+        _cache.put(key, result, value)
+        return result
+
+    wrapper.uncached = function
+    return wrapper
+
+
+def _as_date(value):
+    # Canonical date arguments, so "2025-05-02" and date(2025, 5, 2) share a cache entry
+    if value is None or type(value) is date:
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    if hasattr(value, "date"):  # pandas.Timestamp
+        return value.date()
+    return date.fromisoformat(str(value))
+
+
+def _fetch(sql, **params):
+    from sqlalchemy import text
+
+    with get_engine().connect() as conn:
+        return conn.execute(text(sql), params).fetchall()
+
+
+def _point(row):
+    return NavPoint(row[0], row[1], *(None if value is None else float(value) for value in row[2:]))
+
+
+@_cached
+def _schemes():
+    return tuple(row[0] for row in _fetch(f'SELECT DISTINCT "Scheme Name" FROM {TABLE} ORDER BY 1'))
+
+
+def schemes():
+    """
+    Return the scheme names in `utt_data`, sorted.
+    """
+    return list(_schemes())
+
+
+@_cached
+def _latest_nav(scheme):
+    rows = _fetch(
+        f'SELECT {_VALUATION_COLUMNS} FROM {TABLE} WHERE "Scheme Name" = :scheme '
+        'ORDER BY "Date Valued" DESC LIMIT 1',
+        scheme=scheme,
+    )
+    return _point(rows[0]) if rows else None
+
+
+def latest_nav(scheme):
+    """
+    Return the most recent valuation of `scheme` as a `NavPoint` (None if the scheme is unknown).
+    """
+    return _latest_nav(str(scheme))
+
+
+@_cached
+def _nav_on(scheme, on):
+    rows = _fetch(
+        f'SELECT {_VALUATION_COLUMNS} FROM {TABLE} WHERE "Scheme Name" = :scheme AND "Date Valued" <= :on '
+        'ORDER BY "Date Valued" DESC LIMIT 1',
+        scheme=scheme, on=on,
+    )
+    return _point(rows[0]) if rows else None
+
+
+def nav_on(scheme, on):
+    """
+    Return the valuation of `scheme` in force on date `on`: the last one on or before it
+    (None if there is none). Raises ValueError if `on` is None.
+    """
+    if on is None:
+        raise ValueError("A date is required")
+    return _nav_on(str(scheme), _as_date(on))
+
+
+@_cached
+def _series(scheme, start, end):
+    import pandas as pd
+
+    conditions = ['"Scheme Name" = :scheme']
+    if start is not None:
+        conditions.append('"Date Valued" >= :start')
+    if end is not None:
+        conditions.append('"Date Valued" <= :end')
+    rows = _fetch(
+        f'SELECT {_VALUATION_COLUMNS} FROM {TABLE} WHERE {" AND ".join(conditions)} ORDER BY "Date Valued"',
+        scheme=scheme, start=start, end=end,
+    )
+    frame = pd.DataFrame.from_records(
+        [tuple(row)[1:] for row in rows],
+        columns=["Date Valued", "Nav Per Unit", "Net Asset Value", "Outstanding Number of Units",
+                 "Sale Price per Unit", "Repurchase Price/Unit"],
+    )
+    frame["Date Valued"] = pd.to_datetime(frame["Date Valued"])
+    return frame
+
+
+def series(scheme, start=None, end=None):
+    """
+    Return the valuations of `scheme` between `start` and `end` (inclusive, either may be None)
+    as a DataFrame sorted by `Date Valued`. The returned frame is a copy and may be modified.
+    """
+    return _series(str(scheme), _as_date(start), _as_date(end)).copy()
+
+
+# === Cross-process invalidation ===
+
+def listen_for_changes(poll_interval=5.0):
+    """
+    Invalidate the cache when another process commits changes to `utt_data`.
+
+    Starts a daemon thread that `LISTEN`s on the change channel over a dedicated connection.
+    Returns a `threading.Event`; set it to stop listening.
+    """
+    import select
+
+    pooled = get_engine().raw_connection()
+    pooled.detach()  # Long-lived: keep it out of the shared pool
+    conn = getattr(pooled, "dbapi_connection", None) or pooled.connection
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute(f"LISTEN {CHANGE_CHANNEL};")
+    stop = threading.Event()
+
+    def run():
+        try:
+            while not stop.is_set():
+                if select.select([conn], [], [], poll_interval) == ([], [], []):
+                    continue
+                conn.poll()
+                changed = False
+                while conn.notifies:
+                    changed |= conn.notifies.pop(0).payload == TABLE
+                if changed:
+                    invalidate_cache()
+        finally:
+            conn.close()
+
+    threading.Thread(target=run, name="utt-query-listener", daemon=True).start()
+    return stop
+
+
+# === Local HTTP endpoint ===
+
+def _json_value(value):
+    if isinstance(value, NavPoint):
+        return value.to_dict()
+    if hasattr(value, "to_dict"):  # DataFrame
+        records = value.assign(**{"Date Valued": value["Date Valued"].dt.strftime("%Y-%m-%d")})
+        return records.to_dict(orient="records")
+    return value
+
+
+# Route -> query parameters it requires
+_ROUTES = {
+    "/schemes": (),
+    "/latest": ("scheme",),
+    "/nav": ("scheme", "date"),
+    "/series": ("scheme",),
+    "/stats": (),
+}
+
+
+@_cached
+def _response(route, scheme, on, start, end):
+    # Encoded JSON body of one API call, cached like the query results themselves
+    if route == "/schemes":
+        result = schemes()
+    elif route == "/latest":
+        result = latest_nav(scheme)
+    elif route == "/nav":
+        result = nav_on(scheme, on)
+    else:
+        result = _series(scheme, start, end)
+    if result is None:
+        raise LookupError(f"No valuation for {scheme!r}")
+    return json.dumps(_json_value(result)).encode("utf-8")
+
+
+def make_server(host="127.0.0.1", port=8765):
+    """
+    Build (without starting) the HTTP server answering:
+    `/schemes`, `/latest?scheme=`, `/nav?scheme=&date=`, `/series?scheme=&start=&end=`, `/stats`.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            if url.path not in _ROUTES:
+                self._send(404, json.dumps({"error": f"Unknown route {url.path}"}).encode("utf-8"))
+                return
+            try:
+                missing = [name for name in _ROUTES[url.path] if not params.get(name)]
+                if missing:
+                    raise ValueError(f"The '{missing[0]}' parameter is required")
+                if url.path == "/stats":
+                    body = json.dumps(cache_stats()).encode("utf-8")
+                else:
+                    body = _response(
+                        url.path, params.get("scheme"), _as_date(params.get("date")),
+                        _as_date(params.get("start")), _as_date(params.get("end")),
+                    )
+                self._send(200, body)
+            except LookupError as exc:
+                self._send(404, json.dumps({"error": str(exc)}).encode("utf-8"))
+            except ValueError as exc:
+                self._send(400, json.dumps({"error": str(exc)}).encode("utf-8"))
+            except Exception as exc:  # e.g. a database or serialization error: answer instead of dropping
+                print(f"❌ {self.command} {self.path} failed: {type(exc).__name__}: {exc}", file=sys.stderr)
+                traceback.print_exc()
+                self._send(500, json.dumps({"error": "Internal server error"}).encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass  # Keep the console quiet; dashboards poll often
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve(host="127.0.0.1", port=8765, listen=True):
+    """
+    Run the local query API until interrupted (Ctrl+C).
+
+    With `listen=True`, loads committed by other processes invalidate the cache right away
+    (see `listen_for_changes`).
+    """
+    stop = listen_for_changes() if listen else None
+    server = make_server(host, port)
+    print(f"🌐 Query API listening on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if stop is not None:
+            stop.set()
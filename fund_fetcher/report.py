@@ -0,0 +1,270 @@
+"""
+Chart rendering and PDF assembly for the fund performance report.
+
+Every chart of the report is described by a `ChartSpec`: what to draw and the slice of
+data it is drawn from. The PNG of a chart is named after a hash of that input
+(`<name>-<hash>.png` in the chart directory), so a chart whose data did not change is
+reused as is, and a daily run with one new valuation only redraws the charts of the
+schemes that got it. Charts that do need drawing are rendered in a process pool on
+matplotlib's headless Agg backend, and the PDF is then assembled from the cached images
+without redrawing anything.
+
+matplotlib (and Pillow, which it depends on) is imported only inside the rendering
+functions.
+"""
+
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+SCHEME_COLUMN = "Scheme Name"
+DATE_COLUMN = "Date Valued"
+NAV_PER_UNIT_COLUMN = "Nav Per Unit"
+NAV_COLUMN = "Net Asset Value"
+
+# Bump when the drawing code changes, so every cached chart is redrawn once
+RENDER_VERSION = "1"
+
+# Page geometry: landscape A4 at 100 dpi
+FIGURE_SIZE = (11.69, 8.27)
+DPI = 100
+
+SUMMARY_COLUMNS = {
+    "as_of": "As of",
+    "Nav Per Unit": "NAV / unit",
+    "return_1m": "1M return",
+    "return_ytd": "YTD return",
+    "return_1y": "1Y return",
+    "volatility": "Volatility",
+    "max_drawdown": "Max drawdown",
+}
+
+
+@dataclass
+class ChartSpec:
+    """
+    One chart of the report: `kind` selects the drawing function, `data` is its whole input.
+    """
+    name: str
+    kind: str
+    title: str
+    data: pd.DataFrame
+
+    @property
+    def key(self):
+        """Hash of everything the image depends on."""
+        digest = hashlib.sha256()
+        digest.update(f"{RENDER_VERSION}|{self.kind}|{self.title}|{list(self.data.columns)}".encode())
+        digest.update(pd.util.hash_pandas_object(self.data, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:16]
+
+    def path(self, chart_dir):
+        return os.path.join(chart_dir, f"{self.name}-{self.key}.png")
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_")
+
+
+# === Drawing functions (run in the worker processes) ===
+
+def _draw_scheme(fig, data, title):
+    # NAV per unit (line) over assets under management (shaded, right axis)
+    ax = fig.add_subplot(1, 1, 1)
+    dates = pd.to_datetime(data[DATE_COLUMN])
+    ax.plot(dates, data[NAV_PER_UNIT_COLUMN], color="tab:blue", linewidth=1.5)
+    ax.set_ylabel("NAV per unit (TZS)", color="tab:blue")
+    aum = ax.twinx()
+    aum.fill_between(dates, data[NAV_COLUMN] / 1e9, color="tab:orange", alpha=0.25, linewidth=0)
+    aum.set_ylabel("Net asset value (TZS bn)", color="tab:orange")
+    ax.set_zorder(aum.get_zorder() + 1)
+    ax.patch.set_visible(False)
+    ax.set_title(title)
+    ax.grid(alpha=0.3)
+
+
+def _draw_nav_index(fig, data, title):
+    # Every scheme's NAV per unit rebased to 100 at its first valuation
+    ax = fig.add_subplot(1, 1, 1)
+    for scheme, group in data.groupby(SCHEME_COLUMN, sort=True):
+        nav = group[NAV_PER_UNIT_COLUMN].to_numpy()
+        ax.plot(pd.to_datetime(group[DATE_COLUMN]), nav / nav[0] * 100, label=scheme, linewidth=1.2)
+    ax.set_ylabel("NAV per unit (first valuation = 100)")
+    ax.set_title(title)
+    ax.legend(loc="upper left")
+    ax.grid(alpha=0.3)
+
+
+def _draw_aum(fig, data, title):
+    # Latest net asset value per scheme
+    ax = fig.add_subplot(1, 1, 1)
+    data = data.sort_values(NAV_COLUMN)
+    ax.barh(data[SCHEME_COLUMN], data[NAV_COLUMN] / 1e9, color="tab:green")
+    ax.set_xlabel("Net asset value (TZS bn)")
+    ax.set_title(title)
+    ax.grid(axis="x", alpha=0.3)
+
+
+def _draw_table(fig, data, title):
+    # Summary metrics as a table page
+    ax = fig.add_subplot(1, 1, 1)
+    ax.axis("off")
+    table = ax.table(cellText=data.to_numpy(), colLabels=list(data.columns), loc="center", cellLoc="center")
+    table.auto_set_font_size(False)
+    table.set_fontsize(9)
+    table.scale(1, 1.6)
+    ax.set_title(title)
+
+
+_DRAW = {
+    "scheme": _draw_scheme,
+    "nav_index": _draw_nav_index,
+    "aum": _draw_aum,
+    "table": _draw_table,
+}
+
+
+def render_chart(kind, title, data, path):
+    """
+    Draw one chart with the Agg backend and save it as PNG to `path`.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=FIGURE_SIZE, dpi=DPI)
+    try:
+        _DRAW[kind](fig, data, title)
+        fig.tight_layout()
+        tmp_path = f"{path}.tmp.png"
+        fig.savefig(tmp_path, dpi=DPI)
+        os.replace(tmp_path, path)  # Never leave a half-written image under the cached name
+    finally:
+        plt.close(fig)
+    return path
+
+
+# === Report building ===
+
+def _format_summary(summary):
+    table = summary[[SCHEME_COLUMN, *SUMMARY_COLUMNS]].rename(columns=SUMMARY_COLUMNS)
+    table["As of"] = pd.to_datetime(table["As of"]).dt.strftime("%Y-%m-%d")
+    table["NAV / unit"] = table["NAV / unit"].map("{:,.4f}".format)
+    for col in ["1M return", "YTD return", "1Y return", "Volatility", "Max drawdown"]:
+        table[col] = table[col].map(lambda value: "-" if pd.isna(value) else f"{value:.2%}")
+    return table.rename(columns={SCHEME_COLUMN: "Scheme"})
+
+
+def _matches(scheme, name):
+    return bool(name) and str(name).lower() in str(scheme).lower()
+
+
+def report_charts(df, summary=None, sample_fund=None):
+    """
+    This function lists the charts of the report, in page order.
+
+    Parameters:
+    - `df`: cleaned fund data (`Scheme Name`, `Date Valued`, `Nav Per Unit`, `Net Asset Value`)
+    - `summary`: optional per-scheme summary (see `analytics.summarize_metrics`), shown as a table page
+    - `sample_fund`: scheme (or part of its name) whose chart comes right after the overview pages
+
+    Returns a list of `ChartSpec`. Each per-scheme chart only holds that scheme's rows, so it
+    keeps its hash (and cached image) until the scheme itself gets new data.
+    """
+    data = df[[SCHEME_COLUMN, DATE_COLUMN, NAV_PER_UNIT_COLUMN, NAV_COLUMN]].copy()
+    data[SCHEME_COLUMN] = data[SCHEME_COLUMN].astype(str)
+    data[DATE_COLUMN] = pd.to_datetime(data[DATE_COLUMN])
+    data = data.drop_duplicates([SCHEME_COLUMN, DATE_COLUMN]).sort_values(
+        [SCHEME_COLUMN, DATE_COLUMN], kind="mergesort"
+    ).reset_index(drop=True)
+
+    charts = []
+    if summary is not None and not summary.empty:
+        charts.append(ChartSpec("summary", "table", "Fund summary", _format_summary(summary)))
+    charts.append(ChartSpec("nav_index", "nav_index", "NAV per unit growth (rebased to 100)", data))
+    latest = data.groupby(SCHEME_COLUMN, sort=True).tail(1)
+    as_of = latest[DATE_COLUMN].max()
+    charts.append(ChartSpec(
+        "aum", "aum", f"Net asset value by scheme ({as_of:%Y-%m-%d})" if pd.notna(as_of) else "Net asset value",
+        latest.reset_index(drop=True),
+    ))
+
+    schemes = sorted(data[SCHEME_COLUMN].unique(), key=lambda scheme: (not _matches(scheme, sample_fund), scheme))
+    groups = dict(tuple(data.groupby(SCHEME_COLUMN, sort=False)))
+    for scheme in schemes:
+        charts.append(ChartSpec(
+            f"scheme_{_slug(scheme)}", "scheme", f"{scheme}: NAV per unit and net asset value",
+            groups[scheme].drop(columns=SCHEME_COLUMN).reset_index(drop=True),
+        ))
+    return charts
+
+
+def render_charts(charts, chart_dir, max_workers=None):
+    """
+    This function makes sure every chart has an up-to-date image in `chart_dir`.
+
+    Charts whose image (named after their input hash) already exists are reused; the others
+    are drawn in a process pool (or inline when only one needs drawing). Outdated images of
+    the same charts are deleted. Returns `(paths, redrawn)`: the image path of every chart,
+    in order, and the names of the charts that were drawn.
+    """
+    os.makedirs(chart_dir, exist_ok=True)
+    paths = [chart.path(chart_dir) for chart in charts]
+    stale = [(chart, path) for chart, path in zip(charts, paths) if not os.path.exists(path)]
+
+    if len(stale) == 1 or max_workers == 1:
+        for chart, path in stale:
+            render_chart(chart.kind, chart.title, chart.data, path)
+    elif stale:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(render_chart, chart.kind, chart.title, chart.data, path)
+                for chart, path in stale
+            ]
+            for future in futures:
+                future.result()
+
+    # Remove images of these charts drawn from older data
+    current = set(os.path.basename(path) for path in paths)
+    names = {chart.name for chart in charts}
+    for file_name in os.listdir(chart_dir):
+        stem, ext = os.path.splitext(file_name)
+        if ext == ".png" and stem.rsplit("-", 1)[0] in names and file_name not in current:
+            os.remove(os.path.join(chart_dir, file_name))
+
+    return paths, [chart.name for chart, _ in stale]
+
+
+def assemble_pdf(image_paths, output_path):
+    """
+    Write the chart images as the pages of one PDF (no chart is redrawn).
+    """
+    from PIL import Image
+
+    if not image_paths:
+        raise ValueError("No charts to put in the report")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    pages = [Image.open(path).convert("RGB") for path in image_paths]
+    try:
+        pages[0].save(output_path, "PDF", save_all=True, append_images=pages[1:], resolution=DPI)
+    finally:
+        for page in pages:
+            page.close()
+    return output_path
+
+
+def build_report(df, output_path, chart_dir, summary=None, sample_fund=None, max_workers=None):
+    """
+    This function renders (or reuses) every chart and assembles the PDF report.
+
+    Returns the list of charts that had to be redrawn.
+    """
+    charts = report_charts(df, summary=summary, sample_fund=sample_fund)
+    paths, redrawn = render_charts(charts, chart_dir, max_workers=max_workers)
+    assemble_pdf(paths, output_path)
+    return redrawn
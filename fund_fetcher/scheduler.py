@@ -0,0 +1,198 @@
+"""
+Concurrent fetch scheduler for the registered fund sources.
+
+All configured providers are fetched in parallel on a thread pool, so a full refresh
+takes about as long as the slowest source instead of the sum of all of them. Politeness
+and robustness are handled per source and per host:
+- each host gets a `HostLimiter`: at most `max_concurrency` requests in flight and at
+  least `min_interval` seconds between two requests,
+- failed fetches are retried with exponential backoff and jitter,
+- browser sources share a bounded pool of Chrome slots, so only a few heavy browsers
+  run at the same time; the browsers are taken from the shared warm pool
+  (`browser.get_browser_pool()`), which starts them in the background while the HTTP
+  sources are being fetched.
+
+Source URLs are plain attributes of each `FundSource`, so tests can point the
+providers at local stub servers.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from .browser import get_browser_pool
+from .fetch_utt import scrape_table_with_browser
+from .http_fetch import fetch_fund_table_http, make_session
+from .normalize import compile_plan
+from .sources import FETCH_BROWSER, registered_sources, get_source
+
+
+class HostLimiter:
+    """
+    Per-host concurrency cap and politeness delay.
+    """
+
+    def __init__(self, max_concurrency=1, min_interval=0.0):
+        self.min_interval = min_interval
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the host's slots, waiting first if the previous request was too recent."""
+        with self._slots:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._next_start - now
+                self._next_start = max(now, self._next_start) + self.min_interval
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+@dataclass
+class SourceResult:
+    """
+    Outcome of one provider's fetch: the raw and cleaned frames, or the error that stopped it.
+    """
+    name: str
+    raw: object = None
+    cleaned: object = None
+    error: Exception = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _limited_session(limiter):
+    # A pooled session whose every request goes through the host limiter. Retries are left to
+    # `_run_source` (with backoff), so the session itself does not retry as well
+    session = make_session(retries=0)
+    send = session.request
+
+    def request(*args, **kwargs):
+        with limiter.slot():
+            return send(*args, **kwargs)
+
+    session.request = request
+    return session
+
+
+def clean_source_frame(source, raw):
+    """
+    Clean a provider's raw table into the canonical schema with the provider's compiled
+    plan (see `normalize.compile_plan`), so its declared columns and number formats apply.
+    """
+    return compile_plan(source).apply(raw)
+
+
+def _fetch_once(source, limiter, browser_slots, session):
+    if source.fetch is not None:
+        return source.fetch(source, session)
+    if source.fetch_method == FETCH_BROWSER:
+        with browser_slots, limiter.slot():
+            return scrape_table_with_browser(source.page_url)
+    return fetch_fund_table_http(source.page_url, data_url=source.data_url, session=session)
+
+
+def _run_source(source, limiter, browser_slots, retries, backoff, output_dir):
+    result = SourceResult(name=source.name)
+    started = time.perf_counter()
+    session = _limited_session(limiter) if source.fetch_method != FETCH_BROWSER else None
+    try:
+        for attempt in range(retries + 1):
+            result.attempts = attempt + 1
+            try:
+                raw = _fetch_once(source, limiter, browser_slots, session)
+                if raw is None or raw.empty:
+                    raise ValueError(f"No table rows returned by {source.page_url}")
+                break
+            except Exception:
+                if attempt == retries:
+                    raise
+                # Exponential backoff with jitter so retries from several workers do not align
+                time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+        result.raw = raw
+        result.cleaned = clean_source_frame(source, raw)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            raw.to_csv(os.path.join(output_dir, f"{source.name}_raw.csv"), index=False)
+            result.cleaned.to_csv(os.path.join(output_dir, f"{source.name}_cleaned.csv"), index=False)
+    except Exception as exc:
+        result.error = exc
+    finally:
+        if session is not None:
+            session.close()
+        result.seconds = time.perf_counter() - started
+    return result
+
+
+def run_sources(names=None, max_workers=None, browser_slots=2, retries=3, backoff=1.0, output_dir=None):
+    """
+    This function fetches and cleans several providers concurrently.
+
+    Parameters:
+    - `names`: provider names to run (default: every registered provider with a `page_url`)
+    - `max_workers`: thread pool size (default: one worker per provider)
+    - `browser_slots`: maximum number of headless browsers running at the same time
+    - `retries`, `backoff`: retry count and base delay (seconds) of the exponential backoff
+    - `output_dir`: if given, `<name>_raw.csv` and `<name>_cleaned.csv` are written there
+
+    Returns a dict `{name: SourceResult}`. A failing provider does not stop the others;
+    its error is kept in its result.
+    """
+    if names is None:
+        sources = [source for source in registered_sources() if source.configured]
+        for source in registered_sources():
+            if not source.configured:
+                print(f"⏭ Skipping {source.name}: no page_url configured")
+    else:
+        sources = [get_source(name) for name in names]
+
+    for source in sources:
+        if not source.configured:
+            raise ValueError(f"Source {source.name!r} has no page_url configured")
+
+    # One limiter per host, using the strictest settings of the sources sharing it
+    host_settings = {}
+    for source in sources:
+        concurrency, interval = host_settings.get(source.host, (source.max_concurrency, source.min_interval))
+        host_settings[source.host] = (
+            min(concurrency, source.max_concurrency), max(interval, source.min_interval)
+        )
+    limiters = {
+        host: HostLimiter(concurrency, interval) for host, (concurrency, interval) in host_settings.items()
+    }
+
+    browser_pool = threading.BoundedSemaphore(max(1, browser_slots))
+    results = {}
+    if not sources:
+        return results
+
+    browser_sources = [source for source in sources if source.fetch_method == FETCH_BROWSER and source.fetch is None]
+    if browser_sources:
+        # Start Chrome ahead of time, so its start-up overlaps the HTTP fetches
+        get_browser_pool().warm(min(len(browser_sources), max(1, browser_slots)))
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as executor:
+        futures = {
+            source.name: executor.submit(
+                _run_source, source, limiters[source.host], browser_pool, retries, backoff, output_dir
+            )
+            for source in sources
+        }
+        for name, future in futures.items():
+            results[name] = future.result()
+            status = "✅" if results[name].ok else "❌"
+            detail = f"{len(results[name].raw)} rows" if results[name].ok else results[name].error
+            print(f"{status} {name}: {detail} ({results[name].seconds:.1f}s, {results[name].attempts} attempt(s))")
+    return results
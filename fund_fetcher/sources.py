@@ -0,0 +1,133 @@
+"""
+Registry of fund data sources (providers).
+
+Each provider declares:
+- how its table is fetched: "http" (plain requests, see `http_fetch`) or "browser"
+  (JavaScript-rendered pages that need a headless Chrome),
+- its cleaning schema: which column names the scheme, which columns are numbers and
+  which column holds the date, their number and date formats, and which of its column
+  names differ from the canonical schema every provider is normalized to (see
+  `normalize.py`),
+- where its raw and cleaned output is written.
+
+The built-in providers are UTT AMIS, Sanlam and Zan Securities; `process_fund_csv`
+recognizes their files by these declared columns. Only UTT AMIS has a known URL; the other
+two are skipped by the scheduler until their `page_url` is configured (see
+`SANLAM_PAGE_URL` / `ZANSEC_PAGE_URL` in scripts/config.py). New providers are added
+with `register_source`.
+"""
+
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from .fetch_utt import UTT_DATE_FORMAT, url as UTT_PAGE_URL
+
+# Fetch methods a provider can declare
+FETCH_HTTP = "http"
+FETCH_BROWSER = "browser"
+
+
+@dataclass
+class FundSource:
+    """
+    A fund data provider and everything needed to fetch and clean its table.
+
+    - `name`: registry key, also used in output file names
+    - `scheme_column`: raw name of the column holding the scheme (fund) name; required,
+      since every normalized row needs it
+    - `page_url`: page holding the fund table (None = not configured, the source is skipped)
+    - `fetch_method`: FETCH_HTTP or FETCH_BROWSER
+    - `data_url`: optional DataTables JSON endpoint for HTTP sources
+    - `bigint_columns`, `decimal_columns`, `date_column`, `date_format`: cleaning schema,
+      passed to `clean_fund_data_basic` / `clean_and_format_fund_data`
+    - `thousands`, `decimal`: number format of the numeric columns (default "1,234.56")
+    - `row_number_column`: optional raw name of the provider's row number column (UTT's "#"),
+      kept as the canonical "#" column when a file has it
+    - `columns`: `{raw name: canonical name}` for numeric or date columns named differently
+      from the canonical schema (`normalize.CANONICAL_COLUMNS`); the others keep their names
+    - `min_interval`: politeness delay, minimum seconds between two requests to this host
+    - `max_concurrency`: maximum simultaneous requests to this host
+    - `fetch`: optional custom fetch function `fetch(source, session) -> DataFrame`
+    """
+    name: str
+    scheme_column: str
+    page_url: str = None
+    fetch_method: str = FETCH_HTTP
+    data_url: str = None
+    bigint_columns: list = field(default_factory=list)
+    decimal_columns: list = field(default_factory=list)
+    date_column: str = None
+    date_format: str = None
+    thousands: str = ","
+    decimal: str = "."
+    row_number_column: str = None
+    columns: dict = field(default_factory=dict)
+    min_interval: float = 1.0
+    max_concurrency: int = 1
+    fetch: object = None
+
+    @property
+    def host(self):
+        return urlparse(self.page_url).netloc if self.page_url else None
+
+    @property
+    def configured(self):
+        return bool(self.page_url)
+
+
+_REGISTRY = {}
+
+
+def register_source(source):
+    """
+    Add (or replace) a provider in the registry and return it.
+    """
+    if source.fetch_method not in (FETCH_HTTP, FETCH_BROWSER):
+        raise ValueError(f"Unknown fetch method for {source.name!r}: {source.fetch_method!r}")
+    _REGISTRY[source.name] = source
+    return source
+
+
+def get_source(name):
+    """
+    Return the registered provider called `name` (KeyError if unknown).
+    """
+    return _REGISTRY[name]
+
+
+def registered_sources():
+    """
+    Return all registered providers, in registration order.
+    """
+    return list(_REGISTRY.values())
+
+
+# === Built-in providers ===
+register_source(FundSource(
+    name="utt",
+    scheme_column="Scheme Name",
+    page_url=UTT_PAGE_URL,
+    fetch_method=FETCH_HTTP,
+    bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
+    decimal_columns=["Nav Per Unit", "Sale Price per Unit", "Repurchase Price/Unit"],
+    date_column="Date Valued",
+    date_format=UTT_DATE_FORMAT,
+    row_number_column="#",
+))
+
+register_source(FundSource(
+    name="sanlaam",
+    scheme_column="Scheme Name",
+    fetch_method=FETCH_BROWSER,  # Sanlam renders its table with JavaScript
+    bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
+    date_column="Date",
+    columns={"Date": "Date Valued"},
+))
+
+register_source(FundSource(
+    name="zansec",
+    scheme_column="Scheme Name",
+    fetch_method=FETCH_HTTP,  # Zan Securities serves a static page
+    bigint_columns=["Net Asset Value", "Outstanding number of units"],
+    columns={"Outstanding number of units": "Outstanding Number of Units"},
+))
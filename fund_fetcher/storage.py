@@ -0,0 +1,219 @@
+"""
+Columnar (Parquet/Arrow) storage tier for the raw and cleaned fund datasets.
+
+CSV stays the default and the exchange format; Parquet is selected with
+`STORAGE_FORMAT = "parquet"` in `scripts/config.py`. Compared to CSV, the Parquet store:
+- keeps proper dtypes (float64 numbers, date32 dates), so nothing is re-parsed as text,
+- dictionary-encodes `Scheme Name`, which repeats on every row,
+- partitions the cleaned dataset by year (`year=2025/part-0.parquet`, hive style),
+- reads through memory-mapped files, loading only the requested columns, and pushes
+  scheme and date-range filters down so untouched partitions and row groups are skipped.
+
+`save_frame` / `load_frame` pick CSV or Parquet from the path, so pipeline code does
+not need to know which tier is configured. pyarrow is imported only when Parquet is used.
+"""
+
+import os
+
+import pandas as pd
+
+SCHEME_COLUMN = "Scheme Name"
+PARTITION_COLUMN = "year"
+
+
+def _is_csv(path):
+    return str(path).lower().endswith(".csv")
+
+
+def write_parquet(df, path, date_column=None, scheme_column=SCHEME_COLUMN):
+    """
+    This function writes a DataFrame as Parquet.
+
+    Parameters:
+    - `df`: DataFrame to store
+    - `path`: a `.parquet` file, or a directory for a year-partitioned dataset
+    - `date_column`: the date column; when given, it is stored as `date32` and, if `path` is a
+      directory, the data is partitioned by year. Text dates must be ISO ('YYYY-MM-DD').
+    - `scheme_column`: stored dictionary-encoded when present
+
+    For a partitioned dataset, only the years present in `df` are replaced; other years are kept.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    df = df.copy(deep=False)
+    if scheme_column in df.columns:
+        df[scheme_column] = df[scheme_column].astype("category")  # -> Arrow dictionary type
+    if date_column:
+        df[date_column] = pd.to_datetime(df[date_column], format="%Y-%m-%d")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if date_column:
+        index = table.schema.get_field_index(date_column)
+        table = table.set_column(index, date_column, table.column(date_column).cast(pa.date32()))
+
+    if str(path).lower().endswith(".parquet") or not date_column:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        pq.write_table(table, path)
+        return
+
+    years = df[date_column].dt.year.astype("int16")
+    table = table.append_column(PARTITION_COLUMN, pa.array(years.to_numpy(), type=pa.int16()))
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.int16())]), flavor="hive"),
+        existing_data_behavior="delete_matching",  # Rewrite only the years being written
+        basename_template="part-{i}.parquet",
+    )
+
+
+def read_parquet(path, columns=None, schemes=None, start=None, end=None, date_column=None,
+                 scheme_column=SCHEME_COLUMN):
+    """
+    This function reads a Parquet file or year-partitioned dataset, loading only what is asked for.
+
+    Parameters:
+    - `path`: `.parquet` file or dataset directory
+    - `columns`: columns to load (default: all stored columns)
+    - `schemes`: only load these scheme names
+    - `start`, `end`: inclusive date range on `date_column` (requires a typed date column)
+
+    Filters are pushed down to the Parquet reader, so partitions (years) and row groups that
+    cannot match are skipped, and files are memory-mapped instead of copied into memory.
+    Dates come back as `datetime64`, `Scheme Name` as a categorical.
+    """
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    filesystem = fs.LocalFileSystem(use_mmap=True)
+    partitioned = os.path.isdir(path)
+    dataset = ds.dataset(
+        os.path.abspath(path), format="parquet", filesystem=filesystem,
+        partitioning="hive" if partitioned else None,
+    )
+
+    predicate = None
+
+    def _and(expr):
+        return expr if predicate is None else predicate & expr
+
+    if schemes is not None:
+        predicate = _and(ds.field(scheme_column).isin(list(schemes)))
+    if start is not None or end is not None:
+        if not date_column:
+            raise ValueError("A date_column is required to filter on a date range")
+        if start is not None:
+            start = pd.Timestamp(start)
+            predicate = _and(ds.field(date_column) >= start.date())
+            if partitioned:
+                predicate = _and(ds.field(PARTITION_COLUMN) >= start.year)
+        if end is not None:
+            end = pd.Timestamp(end)
+            predicate = _and(ds.field(date_column) <= end.date())
+            if partitioned:
+                predicate = _and(ds.field(PARTITION_COLUMN) <= end.year)
+
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != PARTITION_COLUMN]
+    table = dataset.to_table(columns=list(columns), filter=predicate)
+    return table.to_pandas(date_as_object=False)
+
+
+def save_frame(df, path, date_column=None, scheme_column=SCHEME_COLUMN):
+    """
+    Save `df` to `path`: CSV if the path ends in `.csv`, Parquet otherwise (see `write_parquet`).
+    """
+    if _is_csv(path):
+        df.to_csv(path, index=False)
+    else:
+        write_parquet(df, path, date_column=date_column, scheme_column=scheme_column)
+
+
+def load_frame(path, columns=None, schemes=None, start=None, end=None, date_column=None,
+               scheme_column=SCHEME_COLUMN, **csv_kwargs):
+    """
+    Load a dataset saved with `save_frame`.
+
+    Parquet paths get column pruning and filter pushdown (see `read_parquet`). CSV paths are
+    read with `pd.read_csv` (extra keyword arguments are passed to it) and filtered afterwards.
+    """
+    if not _is_csv(path):
+        return read_parquet(path, columns=columns, schemes=schemes, start=start, end=end,
+                            date_column=date_column, scheme_column=scheme_column)
+
+    df = pd.read_csv(path, usecols=columns, **csv_kwargs)
+    if schemes is not None:
+        df = df[df[scheme_column].isin(list(schemes))]
+    if start is not None or end is not None:
+        if not date_column:
+            raise ValueError("A date_column is required to filter on a date range")
+        dates = pd.to_datetime(df[date_column], format="%Y-%m-%d")
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= dates >= pd.Timestamp(start)
+        if end is not None:
+            keep &= dates <= pd.Timestamp(end)
+        df = df[keep]
+    return df.reset_index(drop=True)
+
+
+def append_frame(df, path, date_column=None, scheme_column=SCHEME_COLUMN):
+    """
+    Append rows to a dataset saved with `save_frame` (or create it).
+
+    CSV files are appended to in place. For a year-partitioned Parquet dataset only the years
+    present in `df` are read back and rewritten; a single Parquet file is rewritten whole.
+    """
+    if not os.path.exists(path):
+        save_frame(df, path, date_column=date_column, scheme_column=scheme_column)
+        return
+
+    if _is_csv(path):
+        header = pd.read_csv(path, nrows=0).columns
+        df[list(header)].to_csv(path, mode="a", header=False, index=False)
+        return
+
+    start = None
+    if os.path.isdir(path) and date_column:
+        start = pd.Timestamp(year=int(pd.to_datetime(df[date_column]).dt.year.min()), month=1, day=1)
+    existing = read_parquet(path, start=start, date_column=date_column, scheme_column=scheme_column)
+    if scheme_column in existing.columns:
+        existing[scheme_column] = existing[scheme_column].astype(str)  # Categorical -> text before concat
+    combined = pd.concat([existing, df], ignore_index=True)
+    write_parquet(combined, path, date_column=date_column, scheme_column=scheme_column)
+
+
+def load_store(path, date_column="Date Valued", scheme_column=SCHEME_COLUMN, value_columns=None,
+               date_format=None, **csv_kwargs):
+    """
+    Load a dataset straight into a `timeseries.FundSeriesStore`.
+
+    `.fts` files (written by `FundSeriesStore.save`) are memory-mapped. CSV and Parquet datasets
+    are read with only the scheme, date and value columns, and converted; raw CSVs work too
+    (thousands separators are dropped while parsing, as in `read_fund_csv`; pass the raw
+    `date_format`).
+    """
+    from .timeseries import VALUE_COLUMNS, FundSeriesStore
+
+    if str(path).lower().endswith(".fts"):
+        return FundSeriesStore.load(path)
+    if _is_csv(path):
+        csv_kwargs.setdefault("thousands", ",")
+        csv_kwargs.setdefault("float_precision", "round_trip")
+
+    if value_columns is None:
+        if _is_csv(path):
+            available = pd.read_csv(path, nrows=0).columns
+        else:
+            import pyarrow.dataset as ds
+
+            available = ds.dataset(path, format="parquet", partitioning="hive" if os.path.isdir(path) else None).schema.names
+        value_columns = [col for col in VALUE_COLUMNS if col in available]
+    df = load_frame(path, columns=[scheme_column, date_column, *value_columns], **csv_kwargs)
+    return FundSeriesStore.from_frame(
+        df, date_column=date_column, scheme_column=scheme_column, value_columns=value_columns,
+        date_format=date_format,
+    )
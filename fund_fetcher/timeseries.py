@@ -0,0 +1,270 @@
+"""
+Compact, read-optimized store of the fund history, keyed by scheme and date.
+
+A pandas frame of the history keeps `Scheme Name` as one Python string per row and,
+after cleaning, `Date Valued` as text, and finding one scheme's rows means a boolean
+mask over the whole frame. `FundSeriesStore` keeps the same data as flat NumPy arrays
+sorted by (scheme, date):
+- scheme names are interned once; rows hold a small integer scheme ID,
+- dates are int32 day numbers (days since 1970-01-01),
+- every value column (NAV, units, prices) is a contiguous float64 array,
+- `offsets[i]:offsets[i + 1]` is the row range of scheme ID `i`.
+
+A scheme's rows are therefore a slice found in O(1), and point and range lookups inside
+it are binary searches (`np.searchsorted`). `save` writes everything into one file
+(a JSON header followed by the raw arrays) that `load` memory-maps, so opening a large
+history costs almost nothing and only the pages actually read are loaded.
+"""
+
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+SCHEME_COLUMN = "Scheme Name"
+DATE_COLUMN = "Date Valued"
+VALUE_COLUMNS = [
+    "Nav Per Unit",
+    "Net Asset Value",
+    "Outstanding Number of Units",
+    "Sale Price per Unit",
+    "Repurchase Price/Unit",
+]
+
+_MAGIC = b"FUNDTS01"
+_ALIGN = 64  # Every array starts on a 64-byte boundary in the file
+_EPOCH = np.datetime64("1970-01-01", "D")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def to_day_number(value):
+    """
+    Convert a date (date, datetime, Timestamp or ISO text) to its day number.
+    """
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = pd.Timestamp(value).date()
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def from_day_number(day):
+    """
+    Convert a day number back to a `datetime.date`.
+    """
+    return date.fromordinal(int(day) + _EPOCH_ORDINAL)
+
+
+class FundSeriesStore:
+    """
+    Scheme/date-keyed fund history held in flat arrays sorted by (scheme ID, day).
+
+    - `schemes`: tuple of scheme names; a scheme's ID is its position
+    - `scheme_ids`: int16/int32 array, the scheme ID of every row
+    - `days`: int32 array, the day number of every row
+    - `values`: dict of column name -> float64 array
+    - `offsets`: int64 array; the rows of scheme ID `i` are `offsets[i]:offsets[i + 1]`
+    """
+
+    def __init__(self, schemes, scheme_ids, days, values, offsets=None):
+        self.schemes = tuple(schemes)
+        self.scheme_ids = scheme_ids
+        self.days = days
+        self.values = dict(values)
+        if offsets is None:
+            offsets = np.searchsorted(scheme_ids, np.arange(len(self.schemes) + 1)).astype(np.int64)
+        self.offsets = offsets
+        self._scheme_index = {name: i for i, name in enumerate(self.schemes)}
+
+    # === Building ===
+
+    @classmethod
+    def from_frame(cls, df, date_column=DATE_COLUMN, scheme_column=SCHEME_COLUMN, value_columns=None,
+                   date_format=None):
+        """
+        This function builds a store from a fund DataFrame (raw-cleaned or cleaned).
+
+        Parameters:
+        - `df`: one row per valuation
+        - `date_column`: dates as datetimes, or text parsed with `date_format` (ISO by default)
+        - `scheme_column`: scheme names
+        - `value_columns`: numeric columns to keep (default: the `VALUE_COLUMNS` present in `df`)
+
+        Rows without a date are dropped. If a (scheme, date) appears more than once, its first
+        row (the newest on the website) is kept.
+        """
+        if value_columns is None:
+            value_columns = [col for col in VALUE_COLUMNS if col in df.columns]
+
+        dates = df[date_column]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            from .fetch_utt import parse_fund_dates
+
+            dates = parse_fund_dates(dates, date_format=date_format or "%Y-%m-%d")
+        if dates.isna().any():
+            df, dates = df[dates.notna()], dates[dates.notna()]
+        days = (np.asarray(dates, dtype="datetime64[D]") - _EPOCH).astype(np.int32)
+
+        codes, names = pd.factorize(df[scheme_column].astype(str), sort=True)
+        id_type = np.int16 if len(names) < np.iinfo(np.int16).max else np.int32
+        codes = codes.astype(id_type)
+
+        # Stable sort by (scheme, day), then keep the first row of every repeated key
+        order = np.lexsort((days, codes))
+        codes, days = codes[order], days[order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (days[1:] != days[:-1])
+        order = order[keep]
+
+        values = {
+            col: np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)[order]) for col in value_columns
+        }
+        return cls(list(names), np.ascontiguousarray(codes[keep]), np.ascontiguousarray(days[keep]), values)
+
+    # === Lookups ===
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays."""
+        arrays = [self.scheme_ids, self.days, self.offsets, *self.values.values()]
+        return sum(array.nbytes for array in arrays)
+
+    def scheme_id(self, scheme):
+        """Return the ID of `scheme` (KeyError if unknown)."""
+        return self._scheme_index[scheme]
+
+    def scheme_rows(self, scheme):
+        """Return the `slice` of rows holding `scheme`."""
+        i = self._scheme_index[scheme]
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def _row(self, index, column):
+        values = {col: float(array[index]) for col, array in self.values.items()}
+        values[DATE_COLUMN] = from_day_number(self.days[index])
+        return values if column is None else values[column]
+
+    def get(self, scheme, on, column=None):
+        """
+        Return the valuation of `scheme` exactly on date `on` (None if there is none).
+
+        Gives a dict of all values (plus `Date Valued`), or only `column`'s value.
+        """
+        rows = self.scheme_rows(scheme)
+        day = to_day_number(on)
+        index = rows.start + int(np.searchsorted(self.days[rows], day))
+        if index >= rows.stop or self.days[index] != day:
+            return None
+        return self._row(index, column)
+
+    def asof(self, scheme, on, column=None):
+        """
+        Return the valuation of `scheme` in force on date `on`: the last one on or before it.
+        """
+        rows = self.scheme_rows(scheme)
+        index = rows.start + int(np.searchsorted(self.days[rows], to_day_number(on), side="right")) - 1
+        if index < rows.start:
+            return None
+        return self._row(index, column)
+
+    def latest(self, scheme, column=None):
+        """
+        Return the most recent valuation of `scheme` (None if it has no rows).
+        """
+        rows = self.scheme_rows(scheme)
+        return self._row(rows.stop - 1, column) if rows.stop > rows.start else None
+
+    def range_rows(self, scheme, start=None, end=None):
+        """
+        Return the `slice` of rows of `scheme` valued between `start` and `end` (inclusive).
+        """
+        rows = self.scheme_rows(scheme)
+        days = self.days[rows]
+        lo = 0 if start is None else int(np.searchsorted(days, to_day_number(start)))
+        hi = len(days) if end is None else int(np.searchsorted(days, to_day_number(end), side="right"))
+        return slice(rows.start + lo, rows.start + max(lo, hi))
+
+    def series(self, scheme, start=None, end=None, columns=None):
+        """
+        Return the valuations of `scheme` between `start` and `end` as a DataFrame
+        (`Date Valued` plus the value columns), without scanning other schemes.
+        """
+        rows = self.range_rows(scheme, start, end)
+        data = {DATE_COLUMN: (_EPOCH + self.days[rows].astype("timedelta64[D]")).astype("datetime64[ns]")}
+        for col in columns or self.values:
+            data[col] = self.values[col][rows]
+        return pd.DataFrame(data)
+
+    def to_frame(self):
+        """
+        Return the whole store as a DataFrame (`Scheme Name` as a categorical).
+        """
+        frame = pd.DataFrame({
+            SCHEME_COLUMN: pd.Categorical.from_codes(self.scheme_ids, categories=list(self.schemes)),
+            DATE_COLUMN: (_EPOCH + self.days.astype("timedelta64[D]")).astype("datetime64[ns]"),
+        })
+        for col, array in self.values.items():
+            frame[col] = array
+        return frame
+
+    # === Files ===
+
+    def save(self, path):
+        """
+        Write the store to one memory-mappable file (see `load`).
+        """
+        arrays = [("scheme_ids", self.scheme_ids), ("days", self.days), ("offsets", self.offsets)]
+        arrays += [(f"value:{col}", array) for col, array in self.values.items()]
+
+        layout, position = [], 0
+        for name, array in arrays:
+            position = -(-position // _ALIGN) * _ALIGN
+            layout.append({"name": name, "dtype": array.dtype.str, "length": len(array), "offset": position})
+            position += array.nbytes
+        header = json.dumps({"schemes": list(self.schemes), "arrays": layout}).encode("utf-8")
+        data_start = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(_MAGIC)
+            file.write(len(header).to_bytes(8, "little"))
+            file.write(header)
+            for (name, array), entry in zip(arrays, layout):
+                file.seek(data_start + entry["offset"])
+                file.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Open a store written by `save`. With `mmap=True` the arrays are read-only views of the
+        file, paged in on access; otherwise they are read into memory.
+        """
+        with open(path, "rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a fund series store")
+            header_length = int.from_bytes(file.read(8), "little")
+            header = json.loads(file.read(header_length))
+        data_start = -(-(len(_MAGIC) + 8 + header_length) // _ALIGN) * _ALIGN
+
+        arrays = {}
+        for entry in header["arrays"]:
+            dtype = np.dtype(entry["dtype"])
+            if entry["length"] == 0:
+                arrays[entry["name"]] = np.empty(0, dtype=dtype)
+            elif mmap:
+                arrays[entry["name"]] = np.memmap(
+                    path, dtype=dtype, mode="r", offset=data_start + entry["offset"], shape=(entry["length"],)
+                )
+            else:
+                arrays[entry["name"]] = np.fromfile(
+                    path, dtype=dtype, count=entry["length"], offset=data_start + entry["offset"]
+                )
+
+        values = {name[len("value:"):]: array for name, array in arrays.items() if name.startswith("value:")}
+        return cls(header["schemes"], arrays["scheme_ids"], arrays["days"], values, offsets=arrays["offsets"])
@@ -1,50 +1,193 @@
 # main.py
 
-from scripts.fetch_utt import (
+from fund_fetcher import (
+    read_fund_csv,
     clean_and_format_fund_data,
     create_utt_table,
     insert_utt_data
 )
+from fund_fetcher.analytics import update_metrics
+from fund_fetcher.change_detection import SourceFingerprint, file_digest
+from fund_fetcher.chunked import clean_csv_in_chunks
+from fund_fetcher.instrumentation import PipelineMonitor
+from fund_fetcher.storage import load_frame, save_frame
+from fund_fetcher.timeseries import FundSeriesStore
 from scripts.generate_reports import generate_report
+from scripts.scrape_uttamis import scrape
 from scripts.config import (
-    RAW_DATA_PATH,
-    CLEANED_DATA_PATH,
+    RAW_STORE_PATH,
+    CLEANED_STORE_PATH,
+    SERIES_STORE_PATH,
     DATE_COLUMN,
+    DATE_FORMAT,
+    CLEAN_CHUNK_SIZE,
+    CLEAN_WORKERS,
     BIGINT_COLUMNS,
-    DECIMAL_COLUMNS
+    DECIMAL_COLUMNS,
+    METRICS_PATH,
+    SUMMARY_PATH,
+    METRICS_STATE_PATH,
+    METRICS_TO_DB,
+    VOLATILITY_WINDOW,
+    PIPELINE_METRICS_PATH,
+    PROMETHEUS_METRICS_PATH,
+    PROFILE_OUTPUT_DIR,
+    PIPELINE_FETCH,
+    SOURCE_FINGERPRINT_PATH,
+    REPORT_OUTPUT_DIR
 )
 
+import argparse
 import pandas as pd
 import os
 
-def main():
-    print("🚀 Starting UTT Fund Performance Tracker")
+STAGES = ["fetch", "load", "clean", "save", "database", "series_store", "metrics", "report"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="UTT Fund Performance Tracker pipeline")
+    parser.add_argument(
+        "--profile", nargs="+", metavar="STAGE", choices=STAGES + ["all"], default=[],
+        help="run these stages under cProfile and dump the stats to PROFILE_OUTPUT_DIR"
+    )
+    parser.add_argument(
+        "--no-fetch", dest="fetch", action="store_false", default=PIPELINE_FETCH,
+        help="do not fetch new rows first; process the stored raw data"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="fetch and process everything even if the source and the raw data are unchanged"
+    )
+    parser.add_argument(
+        "--metrics-log", default=PIPELINE_METRICS_PATH,
+        help="JSON-lines file the stage measurements are appended to"
+    )
+    parser.add_argument(
+        "--prometheus", default=PROMETHEUS_METRICS_PATH,
+        help="also write the stage measurements to this Prometheus text-format file"
+    )
+    return parser.parse_args(argv)
+
 
-    # Step 1: Load raw scraped data
-    print("📥 Loading scraped data...")
-    df = pd.read_csv(RAW_DATA_PATH)
-
-    # Step 2: Clean and format data
-    print("🧹 Cleaning data...")
-    cleaned = clean_and_format_fund_data(
-        df,
-        date_column=DATE_COLUMN,
-        bigint_columns=BIGINT_COLUMNS,
-        decimal_columns=DECIMAL_COLUMNS
+def main(argv=None):
+    args = parse_args(argv)
+    monitor = PipelineMonitor(
+        log_path=args.metrics_log,
+        prometheus_path=args.prometheus,
+        profile=args.profile,
+        profile_dir=PROFILE_OUTPUT_DIR
     )
+    print("🚀 Starting UTT Fund Performance Tracker")
+    try:
+        run_pipeline(monitor, fetch=args.fetch, force=args.force)
+    finally:
+        print(f"⏱ Stage timings (run {monitor.run_id}):\n{monitor.summary()}")
+        if monitor.write_prometheus():
+            print(f"✅ Prometheus metrics written to {monitor.prometheus_path}")
+
+
+def run_pipeline(monitor, fetch=PIPELINE_FETCH, force=False):
+    # Step 0: Fetch new rows; one conditional request when the website has nothing new
+    if fetch:
+        print("🌐 Checking the source for new data...")
+        try:
+            with monitor.stage("fetch"):
+                scrape(force=force)
+        except Exception as exc:
+            print(f"⚠️ Fetch failed ({exc}); continuing with the stored raw data")
+
+    # Nothing to do if the raw data is exactly what the last complete run processed
+    raw_hash = file_digest(RAW_STORE_PATH)
+    fingerprint = SourceFingerprint.load(SOURCE_FINGERPRINT_PATH, "utt")
+    outputs = [CLEANED_STORE_PATH, SERIES_STORE_PATH, os.path.join(REPORT_OUTPUT_DIR, "daily_report.pdf")]
+    if not force and raw_hash == fingerprint.processed_hash and all(os.path.exists(path) for path in outputs):
+        print("✅ No new data since the last run; cleaning, database and report are up to date")
+        return
+
+    if CLEAN_CHUNK_SIZE and RAW_STORE_PATH.endswith(".csv"):
+        # Steps 1-4 in bounded memory: the raw file is read, cleaned, saved and loaded chunk by chunk.
+        # The later steps (series store, metrics, report) need the whole history and read the
+        # cleaned dataset back, typed, which is much smaller than the raw text but not bounded
+        print(f"🧹 Cleaning data in chunks of {CLEAN_CHUNK_SIZE} rows...")
+        with monitor.stage("clean") as stage:
+            stage.rows_out = clean_csv_in_chunks(
+                RAW_STORE_PATH,
+                CLEANED_STORE_PATH,
+                date_column=DATE_COLUMN,
+                bigint_columns=BIGINT_COLUMNS,
+                decimal_columns=DECIMAL_COLUMNS,
+                date_format=DATE_FORMAT,
+                chunk_size=CLEAN_CHUNK_SIZE,
+                workers=CLEAN_WORKERS,
+                to_db=True
+            )
+        print(f"✅ Cleaned data saved to {CLEANED_STORE_PATH}")
+        with monitor.stage("load") as stage:
+            cleaned = load_frame(CLEANED_STORE_PATH)
+            stage.rows_out = len(cleaned)
+    else:
+        # Step 1: Load raw scraped data
+        print("📥 Loading scraped data...")
+        with monitor.stage("load") as stage:
+            if RAW_STORE_PATH.endswith(".csv"):
+                df = read_fund_csv(RAW_STORE_PATH)  # Thousands separators are dropped while parsing
+            else:
+                df = load_frame(RAW_STORE_PATH)
+            stage.rows_out = len(df)
 
-    # Step 3: Save cleaned data to CSV
-    cleaned.to_csv(CLEANED_DATA_PATH, index=False)
-    print(f"✅ Cleaned data saved to {CLEANED_DATA_PATH}")
+        # Step 2: Clean and format data
+        print("🧹 Cleaning data...")
+        with monitor.stage("clean", rows_in=len(df)) as stage:
+            cleaned = clean_and_format_fund_data(
+                df,
+                date_column=DATE_COLUMN,
+                bigint_columns=BIGINT_COLUMNS,
+                decimal_columns=DECIMAL_COLUMNS,
+                date_format=DATE_FORMAT
+            )
+            stage.rows_out = len(cleaned)
 
-    # Step 4: Insert into database
-    print("🗄 Updating database...")
-    create_utt_table()
-    insert_utt_data(cleaned)
+        # Step 3: Save cleaned data (CSV or Parquet, see STORAGE_FORMAT)
+        with monitor.stage("save", rows_in=len(cleaned)) as stage:
+            save_frame(cleaned, CLEANED_STORE_PATH, date_column=DATE_COLUMN)
+            stage.rows_out = len(cleaned)
+        print(f"✅ Cleaned data saved to {CLEANED_STORE_PATH}")
 
-    # Step 5: Generate report (charts + PDF)
+        # Step 4: Insert into database
+        print("🗄 Updating database...")
+        with monitor.stage("database", rows_in=len(cleaned)) as stage:
+            create_utt_table()
+            stage.rows_out = insert_utt_data(cleaned)  # New or changed rows
+
+    with monitor.stage("series_store", rows_in=len(cleaned)) as stage:
+        store = FundSeriesStore.from_frame(cleaned, date_column=DATE_COLUMN)
+        store.save(SERIES_STORE_PATH)
+        stage.rows_out = len(store)
+    print(f"✅ Series store saved to {SERIES_STORE_PATH}")
+
+    # Step 5: Precompute analytics (returns, volatility, drawdowns, flows); only new days are computed
+    print("📈 Updating fund metrics...")
+    with monitor.stage("metrics", rows_in=len(cleaned)) as stage:
+        new_rows, _, _ = update_metrics(
+            cleaned,
+            metrics_path=METRICS_PATH,
+            state_path=METRICS_STATE_PATH,
+            summary_path=SUMMARY_PATH,
+            to_db=METRICS_TO_DB,
+            window=VOLATILITY_WINDOW
+        )
+        stage.rows_out = len(new_rows)
+    print(f"✅ Metrics saved to {METRICS_PATH} and {SUMMARY_PATH}")
+
+    # Step 6: Generate report (charts + PDF)
     print("📊 Generating charts and report...")
-    generate_report()
+    with monitor.stage("report", rows_in=len(cleaned)):
+        generate_report()
+
+    # Remember which raw data is now fully processed (re-read: the fetch may have updated the file)
+    fingerprint = SourceFingerprint.load(SOURCE_FINGERPRINT_PATH, "utt")
+    fingerprint.processed_hash = raw_hash
+    fingerprint.save(SOURCE_FINGERPRINT_PATH)
 
     print("🎉 Report generation complete!")
 
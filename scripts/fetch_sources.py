@@ -0,0 +1,36 @@
+# Fetch and clean every configured fund provider (UTT AMIS, Sanlam, Zan Securities) in parallel.
+#
+# Providers are registered in `fund_fetcher.sources`; `fund_fetcher.scheduler.run_sources`
+# runs them concurrently with per-host politeness limits, retries with backoff and a
+# bounded pool of headless browsers for the JavaScript-heavy sites.
+#
+# Run from the repository root:
+#     python scripts/fetch_sources.py [provider ...]
+
+import os
+import sys
+
+# Make the repository root importable when this file is run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fund_fetcher.scheduler import run_sources
+from fund_fetcher.sources import get_source
+from scripts.config import (
+    UTT_PAGE_URL, UTT_DATA_URL, SANLAM_PAGE_URL, ZANSEC_PAGE_URL,
+    SOURCES_OUTPUT_DIR, FETCH_BROWSER_SLOTS, FETCH_RETRIES
+)
+
+
+if __name__ == "__main__":
+    get_source("utt").page_url = UTT_PAGE_URL
+    get_source("utt").data_url = UTT_DATA_URL
+    get_source("sanlaam").page_url = SANLAM_PAGE_URL
+    get_source("zansec").page_url = ZANSEC_PAGE_URL
+
+    results = run_sources(
+        names=sys.argv[1:] or None,
+        browser_slots=FETCH_BROWSER_SLOTS,
+        retries=FETCH_RETRIES,
+        output_dir=SOURCES_OUTPUT_DIR,
+    )
+    sys.exit(0 if all(result.ok for result in results.values()) else 1)
@@ -0,0 +1,51 @@
+# Generate the charts and the PDF report from the cleaned dataset.
+#
+# The rendering lives in `fund_fetcher.report`:
+# - every chart is keyed by a hash of its input data, and unchanged charts are reused
+#   from CHART_OUTPUT_DIR instead of being redrawn
+# - charts that changed are drawn in parallel (process pool, headless Agg backend)
+# - the PDF is assembled from the chart images
+#
+# Run from the repository root:
+#     python scripts/generate_reports.py
+
+import os
+import sys
+import time
+
+# Make the repository root importable when this file is run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fund_fetcher.report import build_report
+from fund_fetcher.storage import load_frame
+from scripts.config import (
+    CLEANED_STORE_PATH, REPORT_OUTPUT_DIR, CHART_OUTPUT_DIR, DEFAULT_SAMPLE_FUND, DATE_COLUMN, SUMMARY_PATH
+)
+
+REPORT_COLUMNS = ["Scheme Name", DATE_COLUMN, "Nav Per Unit", "Net Asset Value"]
+
+
+def generate_report(df=None, summary=None, max_workers=None):
+    """
+    Build `daily_report.pdf` in REPORT_OUTPUT_DIR, redrawing only the charts whose data changed.
+
+    `df` defaults to the cleaned dataset and `summary` to the precomputed fund summary
+    (SUMMARY_PATH), when it exists. Returns the path of the PDF.
+    """
+    started = time.perf_counter()
+    if df is None:
+        df = load_frame(CLEANED_STORE_PATH, columns=REPORT_COLUMNS)
+    if summary is None and os.path.exists(SUMMARY_PATH):
+        summary = load_frame(SUMMARY_PATH)
+
+    output_path = os.path.join(REPORT_OUTPUT_DIR, "daily_report.pdf")
+    redrawn = build_report(
+        df, output_path, CHART_OUTPUT_DIR, summary=summary, sample_fund=DEFAULT_SAMPLE_FUND,
+        max_workers=max_workers
+    )
+    print(f"✅ Report saved to {output_path} ({len(redrawn)} chart(s) redrawn, {time.perf_counter() - started:.1f}s)")
+    return output_path
+
+
+if __name__ == "__main__":
+    generate_report()
@@ -1,104 +1,79 @@
-# Import all necessary libraries and modules
-# These include Selenium components for browser automation,
-# BeautifulSoup for HTML parsing, and pandas for data manipulation.
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By  # Used to specify how we locate elements (e.g., by name, ID, class, etc.)
-from selenium.webdriver.support.ui import WebDriverWait, Select  # WebDriverWait allows us to wait for certain conditions. Select is for handling dropdowns.
-from selenium.webdriver.support import expected_conditions as EC  # Contains expected conditions to wait for (e.g., element to be present)
-from selenium.webdriver.chrome.options import Options  # Used to set browser options (like headless mode)
-from selenium.webdriver.chrome.service import Service  # Used to configure the ChromeDriver service
-from webdriver_manager.chrome import ChromeDriverManager  # Automatically manages ChromeDriver installation
-from bs4 import BeautifulSoup  # For parsing HTML and extracting data from it
-import pandas as pd  # For handling tabular data and saving it to CSV
-import time  # Used for delays in execution (though WebDriverWait is usually preferred)
-import psycopg2
-from sqlalchemy import create_engine
+# Scrape the UTT AMIS fund performance table and save it as the raw dataset.
+#
+# The scraping logic lives in `fund_fetcher.fetch_utt.scrape_fund_data`: it fetches the
+# table directly over HTTP and only falls back to a headless Chrome browser (Selenium)
+# when the HTTP engine cannot get the table.
+#
+# In "incremental" mode (see SCRAPE_MODE in scripts/config.py) only the rows newer than
+# the latest stored `Date Valued` of each scheme are fetched and merged into RAW_DATA_PATH.
+#
+# Before scraping, one conditional request checks whether the table changed since the last
+# fetch (ETag / Last-Modified, else a hash of the newest rows; see
+# `fund_fetcher.change_detection`). If it did not, nothing is scraped. The fingerprint is
+# kept in SOURCE_FINGERPRINT_PATH.
+#
+# Run from the repository root:
+#     python scripts/scrape_uttamis.py [--force]
+
+import argparse
 import os
+import sys
 
+# Make the repository root importable when this file is run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# The URL of the webpage containing the fund performance table
-url = "https://uttamis.co.tz/fund-performance"
-
-# Set up Chrome browser options for automated use
-options = Options()
-options.add_argument("--headless")  # Run browser in headless mode (no UI). Useful for automation and running on servers.
-options.add_argument("--no-sandbox")  # Disable sandboxing for Chrome (commonly needed for running in containers or CI/CD)
-options.add_argument("--disable-dev-shm-usage")  # Prevents issues related to limited shared memory space in container environments
-
-# Initialize a Chrome browser session using WebDriverManager to auto-handle driver setup
-driver = webdriver.Chrome(
-    service=Service(ChromeDriverManager().install()),  # Automatically install and use the correct ChromeDriver version
-    options=options  # Use the browser options defined above
+from fund_fetcher import parse_fund_dates, read_fund_csv, scrape_fund_data, scrape_incremental
+from fund_fetcher.change_detection import SourceFingerprint, source_changed
+from fund_fetcher.storage import save_frame
+from scripts.config import (
+    RAW_DATA_PATH, RAW_PARQUET_PATH, STORAGE_FORMAT, UTT_PAGE_URL, UTT_DATA_URL, SCRAPE_ENGINE, SCRAPE_MODE,
+    SOURCE_FINGERPRINT_PATH, DATE_COLUMN, DATE_FORMAT
 )
 
-try:
-    # Navigate to the fund performance page
-    driver.get(url)
-
-    # Wait up to 30 seconds for the dropdown element that controls how many table entries are shown
-    WebDriverWait(driver, 30).until(
-        EC.presence_of_element_located((By.NAME, "data_table_length"))
-    )
-
-    # Locate the dropdown menu by its HTML 'name' attribute and create a Select object to interact with it
-    dropdown = Select(driver.find_element(By.NAME, "data_table_length"))
-
-    # Print all available dropdown options (e.g., 50, 100, 200, Max 5000) for debugging purposes
-    print("Dropdown options:")
-    for option in dropdown.options:
-        print(f"- {option.text} (value: {option.get_attribute('value')})")
-
-    # Select the dropdown option that has value "5000", which corresponds to "Max (5000)" entries
-    dropdown.select_by_value("5000")
-    print("Selected 'Max (5000)' option...")
-
-    # Pause execution for 5 seconds to allow the table to start loading the large number of entries
-    # (5000 entries can take significant time to fully load; this buffer prevents premature scraping)
-    time.sleep(5)
-
-    # Wait until the table has been updated and contains rows inside the <tbody> section
-    # This is done using an anonymous lambda function that tries to find <tr> elements inside the <tbody> of the table with ID "data_table"
-    WebDriverWait(driver, 30).until(
-        lambda d: d.find_element(By.ID, "data_table")
-                 .find_element(By.TAG_NAME, "tbody")
-                 .find_elements(By.TAG_NAME, "tr")  # Will return True when at least one row is present
-    )
 
-    # Parse the current page's HTML using BeautifulSoup to allow easier navigation and extraction of the table
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-
-    # Find the main table on the page that has the class "table"
-    table = soup.find("table", class_="table")
-
-    # If the table exists and was successfully found:
-    if table:
-        # Extract the column headers by selecting all <th> elements inside the <thead>
-        headers = [th.text.strip() for th in table.select("thead th")]
-
-        # Extract each row of data by selecting <tr> elements inside the <tbody>
-        # For each row, extract the text from each <td> (cell), strip whitespace, and store it as a list of lists
-        rows = [
-            [td.text.strip() for td in tr.select("td")]
-            for tr in table.select("tbody tr")
-        ]
-
-        # Create a pandas DataFrame from the extracted rows and headers
-        df = pd.DataFrame(rows, columns=headers)
-
-        # Display the first 5 rows of the resulting DataFrame in the terminal for verification
-        print(df.head())
+def scrape(force=False):
+    """
+    Bring RAW_DATA_PATH up to date with the website, unless the source has not changed.
+
+    Returns True if the raw data was (re)fetched, False if the source was unchanged.
+    """
+    # Fingerprint the source before scraping: data published during the scrape is then seen as new next time
+    fingerprint = SourceFingerprint.load(SOURCE_FINGERPRINT_PATH, "utt")
+    changed = True
+    if SCRAPE_ENGINE != "selenium":
+        try:
+            changed = source_changed(fingerprint, page_url=UTT_PAGE_URL, data_url=UTT_DATA_URL)
+        except Exception as exc:  # The check is only an optimization: scrape as usual
+            print(f"⚠️ Change check failed ({exc}); scraping anyway")
+        if not (changed or force) and os.path.exists(RAW_DATA_PATH):
+            fingerprint.save(SOURCE_FINGERPRINT_PATH)
+            print(f"✅ Source unchanged since {fingerprint.changed_at or 'the last fetch'}; nothing to scrape")
+            return False
+
+    if SCRAPE_MODE == "incremental" and os.path.exists(RAW_DATA_PATH) and SCRAPE_ENGINE != "selenium":
+        scrape_incremental(RAW_DATA_PATH, page_url=UTT_PAGE_URL, data_url=UTT_DATA_URL)
     else:
-        # If the table could not be found on the page, print an error message
-        print("Table not found.")
-
-finally:
-    # Close and terminate the browser session to free up resources (regardless of whether success or failure)
-    driver.quit()
-
-# Save the DataFrame as a CSV file named 'utt_fund_data_max.csv'
-# This allows future analysis or processing without needing to re-scrape
-df.to_csv("raw_data.csv", index=False)
-
-# Confirm to the user via console that the file was saved successfully
-print("Saved to 'raw_data.csv'")
+        scrape_fund_data(
+            page_url=UTT_PAGE_URL,
+            output_path=RAW_DATA_PATH,
+            engine=SCRAPE_ENGINE,
+            data_url=UTT_DATA_URL,
+        )
+
+    # The CSV is the scrape's merge target; mirror it into the Parquet tier when that is selected,
+    # typed (float64 numbers, date32 dates), so the tier gets its compression and date pushdown
+    if STORAGE_FORMAT == "parquet" and os.path.exists(RAW_DATA_PATH):
+        raw = read_fund_csv(RAW_DATA_PATH, dtype={DATE_COLUMN: str})
+        raw[DATE_COLUMN] = parse_fund_dates(raw[DATE_COLUMN], DATE_FORMAT)
+        save_frame(raw, RAW_PARQUET_PATH, date_column=DATE_COLUMN)
+        print(f"✅ Raw data mirrored to {RAW_PARQUET_PATH}")
+
+    # Remember what was fetched only now that it is stored
+    fingerprint.save(SOURCE_FINGERPRINT_PATH)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the UTT AMIS fund performance table")
+    parser.add_argument("--force", action="store_true", help="scrape even if the source looks unchanged")
+    scrape(force=parser.parse_args().force)
@@ -0,0 +1,24 @@
+# Serve the fund query API (latest NAV, NAV on a date, NAV series) over local HTTP.
+#
+# Answers come from `fund_fetcher.query`, which keeps recent results in an in-process
+# LRU/TTL cache; the cache is dropped whenever a load commits new rows to `utt_data`.
+#
+# Run from the repository root:
+#     python scripts/serve_api.py
+# then e.g.:
+#     curl "http://127.0.0.1:8765/latest?scheme=Liquid%20Fund"
+#     curl "http://127.0.0.1:8765/series?scheme=Liquid%20Fund&start=2025-01-01&end=2025-03-31"
+
+import os
+import sys
+
+# Make the repository root importable when this file is run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fund_fetcher.query import configure_cache, serve
+from scripts.config import QUERY_API_HOST, QUERY_API_PORT, QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+
+
+if __name__ == "__main__":
+    configure_cache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+    serve(host=QUERY_API_HOST, port=QUERY_API_PORT)
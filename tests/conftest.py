@@ -0,0 +1,147 @@
+"""
+Shared test fixtures: recorded responses, a local stub HTTP server serving them, and an
+optional PostgreSQL connection.
+
+The fetch engines take their URLs as parameters, so the tests point them at
+`stub_server.url(...)` and never touch the network. Database tests only run when
+`FUNDFETCH_TEST_DATABASE_URL` names a test database (see `pg_conn`).
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(REPO_ROOT, "tests", "fixtures")
+sys.path.insert(0, REPO_ROOT)
+
+
+def read_fixture(name):
+    """Return the text of a recorded response in tests/fixtures."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as file:
+        return file.read()
+
+
+def datatables_route(payload):
+    """
+    Route answering DataTables server-side requests from one recorded payload: the rows
+    are sliced by the request's `start`/`length`, like the live endpoint pages them.
+    """
+    def route(query):
+        start = int(query.get("start", 0))
+        length = int(query.get("length", len(payload["data"])))
+        page = dict(payload, draw=int(query.get("draw", 1)), data=payload["data"][start:start + length])
+        return 200, "application/json", json.dumps(page)
+    return route
+
+
+class StubServer:
+    """
+    A local HTTP server answering GET requests from a `{path: route}` table.
+
+    A route is either a `(status, content type, body)` tuple or a callable taking the
+    request's query parameters and returning one; an optional fourth item is a dict of
+    extra response headers. A response with an `ETag` is answered `304 Not Modified`
+    when the request's `If-None-Match` carries the same tag. Every request is recorded in
+    `requests` as `(path, query)`.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                with stub._lock:
+                    stub.requests.append((parts.path, query))
+                route = stub.routes.get(parts.path)
+                if route is None:
+                    status, content_type, body, *extra = 404, "text/plain", "not found"
+                else:
+                    status, content_type, body, *extra = route(query) if callable(route) else route
+                headers = extra[0] if extra else {}
+                if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+                    status, body = 304, ""
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # Keep the test output clean
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path="/"):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def hits(self, path):
+        """Number of requests received for `path`."""
+        with self._lock:
+            return sum(1 for requested, _ in self.requests if requested == path)
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.thread.start()
+    try:
+        yield server
+    finally:
+        server.server.shutdown()
+        server.server.server_close()
+
+
+TEST_DATABASE_URL_ENV = "FUNDFETCH_TEST_DATABASE_URL"
+TEST_SCHEMA = "fundfetch_test"
+
+
+@pytest.fixture
+def pg_conn():
+    """
+    A psycopg2 connection to the PostgreSQL database in `FUNDFETCH_TEST_DATABASE_URL`
+    (a SQLAlchemy URL). The shared engine is pointed at the same database with its
+    `search_path` set to a throwaway `fundfetch_test` schema, so every pooled connection
+    (including those the code under test borrows) works in that schema; it is dropped
+    afterwards. Tests using it are skipped when the variable is not set.
+    """
+    url = os.environ.get(TEST_DATABASE_URL_ENV)
+    if not url:
+        pytest.skip(f"{TEST_DATABASE_URL_ENV} is not set")
+    from sqlalchemy.engine import make_url
+
+    from fund_fetcher import db
+
+    url = make_url(url).update_query_dict({"options": f"-csearch_path={TEST_SCHEMA}"})
+    db.configure(url.render_as_string(hide_password=False), pool_size=2, max_overflow=0)
+
+    def run(conn, statement):
+        cursor = conn.cursor()
+        cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+
+    with db.raw_connection() as conn:
+        run(conn, f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+        run(conn, f"CREATE SCHEMA {TEST_SCHEMA}")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            run(conn, f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+    db.dispose_engine()
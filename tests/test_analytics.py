@@ -0,0 +1,141 @@
+"""
+Tests of the fund analytics: the metric values on a small hand-checked history, and the
+consistency of the incremental updates (`update_metrics`) with a full recomputation
+(`compute_metrics` / `materialize_metrics`) on synthetic histories in both storage tiers.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fund_fetcher.analytics import (
+    DATE_COLUMN,
+    METRIC_COLUMNS,
+    SCHEME_COLUMN,
+    compute_metrics,
+    materialize_metrics,
+    summarize_metrics,
+    update_metrics,
+)
+from fund_fetcher.storage import load_frame
+
+
+# Newest first, like the website; two schemes interleaved
+SMALL = pd.DataFrame({
+    SCHEME_COLUMN: ["Umoja Fund", "Watoto Fund", "Umoja Fund", "Watoto Fund", "Umoja Fund", "Umoja Fund"],
+    DATE_COLUMN: ["2025-01-06", "2025-01-03", "2025-01-03", "2025-01-02", "2025-01-02", "2024-12-31"],
+    "Nav Per Unit": [110.0, 51.0, 90.0, 50.0, 120.0, 100.0],
+    "Net Asset Value": [1100.0, 510.0, 1080.0, 500.0, 1200.0, 1000.0],
+    "Outstanding Number of Units": [10.0, 10.0, 12.0, 10.0, 10.0, 10.0],
+})
+
+
+def test_metrics_of_a_small_history():
+    metrics = compute_metrics(SMALL, window=2, periods_per_year=4)
+    umoja = metrics[metrics[SCHEME_COLUMN] == "Umoja Fund"].reset_index(drop=True)
+    watoto = metrics[metrics[SCHEME_COLUMN] == "Watoto Fund"].reset_index(drop=True)
+
+    assert umoja[DATE_COLUMN].dt.strftime("%Y-%m-%d").tolist() == ["2024-12-31", "2025-01-02", "2025-01-03",
+                                                                    "2025-01-06"]
+    np.testing.assert_allclose(umoja["daily_return"], [np.nan, 0.2, -0.25, 110 / 90 - 1])
+    np.testing.assert_allclose(umoja["drawdown"], [0.0, 0.0, -0.25, 110 / 120 - 1])
+    np.testing.assert_allclose(umoja["max_drawdown"], [0.0, 0.0, -0.25, -0.25])
+    np.testing.assert_allclose(umoja["net_flow"], [np.nan, 0.0, 2 * 90.0, -2 * 110.0])
+    np.testing.assert_allclose(umoja["cumulative_net_flow"], [0.0, 0.0, 180.0, -40.0])
+    # Volatility needs `window` returns: sample std of the last two returns, annualized
+    expected = np.std([-0.25, 110 / 90 - 1], ddof=1) * 2
+    np.testing.assert_allclose(umoja["volatility"], [np.nan, np.nan, np.std([0.2, -0.25], ddof=1) * 2, expected])
+    # The first row of each scheme never looks at the other scheme
+    assert np.isnan(watoto.loc[0, "daily_return"]) and watoto.loc[1, "daily_return"] == pytest.approx(0.02)
+
+
+def test_summary_looks_back_from_each_schemes_latest_row():
+    summary = summarize_metrics(compute_metrics(SMALL, window=2, periods_per_year=4)).set_index(SCHEME_COLUMN)
+
+    assert summary.loc["Umoja Fund", "as_of"] == pd.Timestamp("2025-01-06")
+    assert summary.loc["Watoto Fund", "as_of"] == pd.Timestamp("2025-01-03")
+    # 1-week return of Umoja Fund: against 2024-12-30, before its first valuation
+    assert np.isnan(summary.loc["Umoja Fund", "return_1w"])
+    # YTD: against the last valuation of the previous year (2024-12-31)
+    assert summary.loc["Umoja Fund", "return_ytd"] == pytest.approx(0.1)
+    assert np.isnan(summary.loc["Watoto Fund", "return_ytd"])  # No valuation in 2024
+
+
+def synthetic_history(seed=7):
+    """Two active schemes over ~18 months of business days and one that stopped a year before the end."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for name, start, end in [
+        ("Umoja Fund", "2024-01-01", "2025-06-30"),
+        ("Watoto Fund", "2024-03-01", "2025-06-30"),
+        ("Jikimu Fund", "2023-01-02", "2024-05-31"),  # No valuation in the last year
+    ]:
+        dates = pd.bdate_range(start, end)
+        nav = 100 * np.cumprod(1 + rng.normal(0.0003, 0.004, len(dates)))
+        units = 1e6 + np.cumsum(rng.normal(0, 1e3, len(dates)))
+        frames.append(pd.DataFrame({
+            SCHEME_COLUMN: name,
+            DATE_COLUMN: dates.strftime("%Y-%m-%d"),
+            "Nav Per Unit": nav,
+            "Net Asset Value": nav * units,
+            "Outstanding Number of Units": units,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _sorted(df, key):
+    df = df.copy()
+    df[SCHEME_COLUMN] = df[SCHEME_COLUMN].astype(str)
+    for col in [DATE_COLUMN, "as_of"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col]).astype("datetime64[ns]")  # Parquet reads back other units
+    return df.sort_values(key, kind="mergesort").reset_index(drop=True)
+
+
+def assert_same_metrics(expected, actual):
+    key = [SCHEME_COLUMN, DATE_COLUMN]
+    expected, actual = _sorted(expected, key), _sorted(actual, key)
+    pd.testing.assert_frame_equal(actual[key], expected[key])
+    for col in METRIC_COLUMNS:
+        np.testing.assert_allclose(actual[col], expected[col], rtol=1e-9, atol=1e-12, err_msg=col)
+
+
+def assert_same_summary(expected, actual):
+    expected, actual = _sorted(expected, [SCHEME_COLUMN]), _sorted(actual, [SCHEME_COLUMN])
+    pd.testing.assert_frame_equal(actual[expected.columns], expected, check_exact=False, rtol=1e-9)
+
+
+@pytest.fixture(params=["metrics.csv", "metrics_parquet/"], ids=["csv", "parquet"])
+def metrics_paths(request, tmp_path):
+    return str(tmp_path / request.param), str(tmp_path / "state.json")
+
+
+def test_daily_updates_match_a_full_recomputation(metrics_paths):
+    metrics_path, state_path = metrics_paths
+    cleaned = synthetic_history()
+    dates = pd.to_datetime(cleaned[DATE_COLUMN])
+    days = np.sort(dates.unique())[-5:]
+
+    _, _, rebuilt = update_metrics(cleaned[dates < days[0]], metrics_path, state_path)
+    assert rebuilt  # Nothing stored yet
+    for day in days:
+        _, summary, rebuilt = update_metrics(cleaned[dates <= day], metrics_path, state_path)
+        assert not rebuilt
+
+    assert_same_metrics(compute_metrics(cleaned), load_frame(metrics_path, date_column=DATE_COLUMN))
+    _, full_summary = materialize_metrics(cleaned)
+    assert_same_summary(full_summary, summary)
+    assert "Jikimu Fund" in set(summary[SCHEME_COLUMN])
+
+
+def test_a_corrected_old_value_forces_a_full_rebuild(metrics_paths):
+    metrics_path, state_path = metrics_paths
+    cleaned = synthetic_history()
+    update_metrics(cleaned, metrics_path, state_path)
+
+    corrected = cleaned.copy()
+    corrected.loc[len(corrected) // 2, "Nav Per Unit"] *= 1.01
+    _, _, rebuilt = update_metrics(corrected, metrics_path, state_path)
+
+    assert rebuilt
+    assert_same_metrics(compute_metrics(corrected), load_frame(metrics_path, date_column=DATE_COLUMN))
@@ -0,0 +1,155 @@
+"""
+Tests of the browser helpers that need no Chrome: the DataTables readiness rules, the cached
+ChromeDriver lookup, and the pool's reuse policy with stand-in drivers.
+"""
+
+import json
+import time
+
+import pytest
+
+from fund_fetcher import browser
+from fund_fetcher.browser import BrowserPool, chromedriver_path, parse_info_label, table_ready
+
+
+def test_info_labels_are_parsed():
+    assert parse_info_label("Showing 1 to 5,000 of 12,345 entries") == (1, 5000, 12345)
+    assert parse_info_label("Showing 0 to 0 of 0 entries") == (0, 0, 0)
+    assert parse_info_label("Loading...") is None
+
+
+def _api_state(rows, start=0, end=10, total=100, length=10, processing=False):
+    return {"rows": rows, "info": {"start": start, "end": end, "total": total, "length": length},
+            "label": None, "processing": processing}
+
+
+def test_a_table_is_ready_when_its_rows_match_the_datatables_page():
+    assert table_ready(_api_state(10))
+    assert not table_ready(_api_state(7))  # Still drawing
+    assert not table_ready(_api_state(10, processing=True))
+    assert not table_ready(None)
+
+
+def test_the_requested_page_length_must_be_in_effect():
+    # The old 10-row page is rendered completely, but "Max (5000)" was chosen
+    assert not table_ready(_api_state(10), page_length=5000)
+    assert table_ready(_api_state(100, end=100, length=5000), page_length=5000)
+    assert not table_ready(_api_state(100, end=100, length=5000), page_length=5000, expected_total=120)
+
+
+def test_the_info_label_is_used_without_the_datatables_api():
+    state = {"rows": 5000, "info": None, "label": "Showing 1 to 5,000 of 12,345 entries"}
+    assert table_ready(state, page_length=5000)
+    assert not table_ready(dict(state, rows=10), page_length=5000)
+
+
+def test_plain_tables_are_ready_once_the_row_count_settles():
+    state = {"rows": 42, "info": None, "label": None}
+    assert not table_ready(state, previous_rows=None)
+    assert not table_ready(state, previous_rows=40)
+    assert table_ready(state, previous_rows=42)
+    assert not table_ready(dict(state, rows=0), previous_rows=0)
+
+
+def test_the_driver_path_is_taken_from_the_environment_or_the_cache(tmp_path, monkeypatch):
+    driver = tmp_path / "chromedriver"
+    driver.write_text("")
+    cache = tmp_path / "chromedriver.json"
+    monkeypatch.setattr(browser, "DRIVER_CACHE_PATH", str(cache))
+    monkeypatch.delenv("FUNDFETCH_CHROMEDRIVER_PATH", raising=False)
+
+    cache.write_text(json.dumps({"path": str(driver), "resolved_at": time.time() - 86400}))
+    assert chromedriver_path(max_age_days=7) == str(driver)  # No webdriver-manager lookup
+
+    monkeypatch.setenv("FUNDFETCH_CHROMEDRIVER_PATH", "/opt/chromedriver")
+    assert chromedriver_path() == "/opt/chromedriver"
+
+
+def test_a_stale_cache_entry_is_not_used(tmp_path, monkeypatch):
+    cache = tmp_path / "chromedriver.json"
+    cache.write_text(json.dumps({"path": str(cache), "resolved_at": time.time() - 8 * 86400}))
+    monkeypatch.setattr(browser, "DRIVER_CACHE_PATH", str(cache))
+    assert browser._read_driver_cache(max_age_days=7) is None
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.pages = []
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return "about:blank"
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        self.pages.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def started(monkeypatch):
+    """Make the pool start stand-in drivers; returns the list of drivers started."""
+    drivers = []
+
+    def start_chrome(block_resources=True, headless=True):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    monkeypatch.setattr(browser, "start_chrome", start_chrome)
+    return drivers
+
+
+def test_a_returned_browser_is_reused(started):
+    pool = BrowserPool(size=1)
+    first = pool._checkout()
+    pool._checkin(first, healthy=True)
+
+    assert pool._checkout() is first
+    assert pool.started == 1
+    assert first.pages == ["about:blank"]  # The last page was unloaded before reuse
+
+
+def test_broken_worn_out_and_surplus_browsers_are_quit(started):
+    pool = BrowserPool(size=1, max_uses=2)
+    a, b = pool._checkout(), pool._checkout()
+    pool._checkin(a, healthy=True)
+    pool._checkin(b, healthy=True)  # The pool already keeps one idle browser
+    assert b.quit_called and not a.quit_called
+
+    pool._checkin(pool._checkout(), healthy=False)
+    assert a.quit_called  # A browser whose scrape raised a Selenium error is not reused
+
+    c = pool._checkout()
+    pool._checkin(c, healthy=True)
+    pool._checkin(pool._checkout(), healthy=True)
+    assert c.quit_called  # Replaced after `max_uses` pages
+
+
+def test_a_dead_idle_browser_is_replaced(started):
+    pool = BrowserPool(size=1)
+    driver = pool._checkout()
+    pool._checkin(driver, healthy=True)
+    driver.alive = False
+
+    assert pool._checkout() is not driver
+    assert driver.quit_called
+
+
+def test_warm_starts_browsers_ahead_of_time_and_close_quits_them(started):
+    pool = BrowserPool(size=2)
+    pool.warm(wait=True)
+    assert len(started) == 2
+
+    pool._checkin(pool._checkout(), healthy=True)
+    assert len(started) == 2  # Served from the warm pool
+
+    pool.close()
+    assert all(driver.quit_called for driver in started)
@@ -0,0 +1,101 @@
+"""
+Offline tests of `source_changed` and the source fingerprints against a local stub server.
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import datatables_route, read_fixture
+from fund_fetcher.change_detection import SourceFingerprint, latest_rows_hash, source_changed
+
+PAGE_PATH = "/fund-performance"
+DATA_PATH = "/fund-performance/data"
+NEW_ROW = ["6", "Umoja Fund", "381,000,000,000.0000", "330,500,000.0000", "1,152.8000",
+           "1,152.8000", "1,141.2720", "05-05-2025"]
+
+
+@pytest.fixture
+def payload():
+    return json.loads(read_fixture("utt_datatables.json"))
+
+
+@pytest.fixture
+def site(stub_server, payload):
+    stub_server.routes[PAGE_PATH] = (200, "text/html", read_fixture("utt_fund_performance.html"))
+    stub_server.routes[DATA_PATH] = datatables_route(payload)
+    return stub_server
+
+
+def check(site, fingerprint):
+    return source_changed(fingerprint, page_url=site.url(PAGE_PATH))
+
+
+def test_the_first_check_reports_a_change_and_remembers_the_data_url(site):
+    fingerprint = SourceFingerprint(source="utt")
+    assert check(site, fingerprint)
+    assert fingerprint.data_url == site.url(DATA_PATH)
+    assert fingerprint.latest_date == "2025-05-02"
+    assert fingerprint.changed_at == fingerprint.checked_at
+
+
+def test_an_unchanged_source_is_checked_with_one_data_request(site):
+    fingerprint = SourceFingerprint(source="utt")
+    check(site, fingerprint)
+    page_hits = site.hits(PAGE_PATH)
+
+    assert not check(site, fingerprint)
+    assert site.hits(PAGE_PATH) == page_hits
+    assert site.hits(DATA_PATH) == 2
+
+
+def test_a_new_valuation_is_a_change(site, payload):
+    fingerprint = SourceFingerprint(source="utt")
+    check(site, fingerprint)
+    payload["data"].insert(0, NEW_ROW)
+
+    assert check(site, fingerprint)
+    assert fingerprint.latest_date == "2025-05-05"
+
+
+def test_a_matching_etag_is_answered_not_modified(stub_server, payload):
+    body = json.dumps(payload)
+    stub_server.routes[PAGE_PATH] = (200, "text/html", read_fixture("utt_fund_performance.html"))
+    stub_server.routes[DATA_PATH] = (200, "application/json", body, {"ETag": '"v1"'})
+    fingerprint = SourceFingerprint(source="utt")
+    assert check(stub_server, fingerprint)
+    assert fingerprint.etag == '"v1"'
+    latest_hash = fingerprint.latest_hash
+
+    assert not check(stub_server, fingerprint)  # 304 Not Modified
+    assert fingerprint.latest_hash == latest_hash
+
+    stub_server.routes[DATA_PATH] = (200, "application/json", body, {"ETag": '"v2"'})
+    assert not check(stub_server, fingerprint)  # New tag, same newest rows
+    assert fingerprint.etag == '"v2"'
+
+
+def test_renumbering_the_rows_does_not_change_the_hash():
+    df = pd.DataFrame({
+        "#": ["1", "2"],
+        "Scheme Name": ["Umoja Fund", "Watoto Fund"],
+        "Nav Per Unit": ["1,151.1480", "477.4466"],
+        "Date Valued": ["02-05-2025", "02-05-2025"],
+    })
+    assert latest_rows_hash(df) == latest_rows_hash(df.assign(**{"#": ["11", "12"]}))
+    assert latest_rows_hash(df)[0] != latest_rows_hash(df.assign(**{"Nav Per Unit": ["1,151.1480", "477.5"]}))[0]
+    assert latest_rows_hash(df.iloc[:0]) == (None, None)
+
+
+def test_fingerprints_round_trip_through_their_file(tmp_path):
+    path = tmp_path / "utt_fingerprint.json"
+    assert SourceFingerprint.load(str(path), "utt") == SourceFingerprint(source="utt")
+
+    fingerprint = SourceFingerprint(source="utt", etag='"v1"', headers=["#", "Scheme Name"], latest_hash="abc")
+    fingerprint.save(str(path))
+    stored = json.loads(path.read_text())
+    stored["retired_field"] = 1  # Written by another version
+    path.write_text(json.dumps(stored))
+
+    assert SourceFingerprint.load(str(path), "utt") == fingerprint
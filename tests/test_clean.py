@@ -0,0 +1,127 @@
+"""
+Tests of the UTT cleaning helpers: the batched numeric cleaner and the date parsing.
+"""
+
+import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fund_fetcher import fetch_utt
+from fund_fetcher.fetch_utt import (
+    UTT_DATE_FORMAT,
+    clean_and_format_fund_data,
+    clean_fund_data_basic,
+    format_fund_dates,
+    parse_fund_dates,
+)
+
+BIGINT = ["Net Asset Value", "Outstanding Number of Units"]
+DECIMAL = ["Nav Per Unit"]
+
+
+def raw_frame():
+    return pd.DataFrame({
+        "Scheme Name": ["Umoja Fund", "Watoto Fund", "Liquid Fund"],
+        "Net Asset Value": ["380,429,787,331.8930", "13,217,012,040.6427", "1,000"],
+        "Outstanding Number of Units": ["330,478,604.2184", "27,683,101.7735", None],
+        "Nav Per Unit": ["1,151.1480", "477.4466", ""],
+    })
+
+
+def test_separators_are_removed_and_every_column_is_float():
+    df = clean_fund_data_basic(raw_frame(), BIGINT, DECIMAL)
+
+    assert df["Net Asset Value"].tolist() == [380429787331.893, 13217012040.6427, 1000.0]
+    assert df["Nav Per Unit"].tolist()[:2] == [1151.148, 477.4466]
+    assert all(df[col].dtype == np.float64 for col in BIGINT + DECIMAL)
+    # Missing and blank cells are NaN, not errors
+    assert math.isnan(df.loc[2, "Outstanding Number of Units"]) and math.isnan(df.loc[2, "Nav Per Unit"])
+    assert "numeric_errors" not in df.attrs
+    assert df["Scheme Name"].tolist() == ["Umoja Fund", "Watoto Fund", "Liquid Fund"]
+
+
+def test_values_match_the_per_column_float_conversion():
+    # The batched cleaner must round exactly like the old `str.replace(",", "").astype(float)`
+    raw = raw_frame()
+    expected = raw["Net Asset Value"].str.replace(",", "").astype(float)
+    assert clean_fund_data_basic(raw.copy(), BIGINT, DECIMAL)["Net Asset Value"].equals(expected)
+
+
+def test_other_number_formats_are_converted():
+    df = pd.DataFrame({"Nav Per Unit": ["1.151,148", "477,4466"]})
+    df = clean_fund_data_basic(df, [], DECIMAL, thousands=".", decimal=",")
+    assert df["Nav Per Unit"].tolist() == [1151.148, 477.4466]
+
+
+def test_numeric_columns_are_only_cast():
+    df = pd.DataFrame({"Net Asset Value": [1, 2], "Outstanding Number of Units": ["3,000", "4"]})
+    df = clean_fund_data_basic(df, BIGINT)
+    assert df["Net Asset Value"].tolist() == [1.0, 2.0]
+    assert df["Outstanding Number of Units"].tolist() == [3000.0, 4.0]
+
+
+def test_bad_values_are_reported_and_set_to_nan(capsys):
+    raw = raw_frame()
+    raw.loc[1, "Nav Per Unit"] = "n/a"
+
+    df = clean_fund_data_basic(raw, BIGINT, DECIMAL)
+
+    assert math.isnan(df.loc[1, "Nav Per Unit"])
+    assert df.loc[0, "Nav Per Unit"] == 1151.148
+    assert df.attrs["numeric_errors"] == {"Nav Per Unit": ["n/a"]}
+    assert "Non-numeric values set to NaN" in capsys.readouterr().out
+
+
+def test_bad_values_can_raise():
+    raw = raw_frame()
+    raw.loc[0, "Net Asset Value"] = "TBA"
+    with pytest.raises(ValueError, match="Net Asset Value"):
+        clean_fund_data_basic(raw, BIGINT, DECIMAL, errors="raise")
+
+
+def test_dates_are_parsed_with_the_explicit_format():
+    values = pd.Series(["02-05-2025", "12-04-2025", None], index=[10, 11, 12], name="Date Valued")
+    parsed = parse_fund_dates(values, UTT_DATE_FORMAT)
+
+    assert parsed.index.tolist() == [10, 11, 12] and parsed.name == "Date Valued"
+    assert parsed.tolist()[:2] == [pd.Timestamp("2025-05-02"), pd.Timestamp("2025-04-12")]  # Not 5 Feb / 4 Dec
+    assert pd.isna(parsed.iloc[2])
+
+
+def test_a_date_not_in_the_format_raises():
+    with pytest.raises(ValueError):
+        parse_fund_dates(pd.Series(["2025-05-02"]), UTT_DATE_FORMAT)
+
+
+def test_each_distinct_date_is_parsed_once(monkeypatch):
+    seen = []
+    to_datetime = pd.to_datetime
+
+    def counting(values, **kwargs):
+        seen.append(len(values))
+        return to_datetime(values, **kwargs)
+
+    monkeypatch.setattr(fetch_utt.pd, "to_datetime", counting)
+    parse_fund_dates(pd.Series(["02-05-2025", "30-04-2025"] * 500), UTT_DATE_FORMAT)
+    assert seen == [2]
+
+
+def test_dates_are_formatted_back_as_iso_text():
+    dates = pd.Series(pd.to_datetime(["2025-05-02", None, "2025-05-02"]))
+    assert format_fund_dates(dates).tolist()[::2] == ["2025-05-02", "2025-05-02"]
+    assert pd.isna(format_fund_dates(dates).iloc[1])
+
+
+@pytest.mark.parametrize("date_output, expected", [
+    ("text", "2025-05-02"),
+    ("datetime", pd.Timestamp("2025-05-02")),
+    ("date", date(2025, 5, 2)),
+])
+def test_clean_and_format_date_outputs(date_output, expected):
+    raw = raw_frame().assign(**{"Date Valued": ["02-05-2025"] * 3})
+    df = clean_and_format_fund_data(raw, "Date Valued", BIGINT, DECIMAL, date_format=UTT_DATE_FORMAT,
+                                    date_output=date_output)
+    assert df.loc[0, "Date Valued"] == expected
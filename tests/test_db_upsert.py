@@ -0,0 +1,149 @@
+"""
+COPY + upsert loading of `utt_data` (`db.copy_upsert` / `fetch_utt.upsert_utt_data`) against
+a real PostgreSQL database; skipped unless FUNDFETCH_TEST_DATABASE_URL is set.
+"""
+
+import math
+
+import pandas as pd
+
+from fund_fetcher import db
+from fund_fetcher.fetch_utt import create_utt_table, upsert_utt_data
+
+
+def _rows(*rows):
+    columns = ["#", "Scheme Name", "Net Asset Value", "Outstanding Number of Units", "Nav Per Unit",
+               "Sale Price per Unit", "Repurchase Price/Unit", "Date Valued"]
+    return pd.DataFrame(list(rows), columns=columns)
+
+
+def _table(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT "#", "Scheme Name", "Nav Per Unit", "Date Valued"::text FROM utt_data '
+                   'ORDER BY "Scheme Name", "Date Valued"')
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+FIRST_DAY = _rows(
+    (1, "Umoja Fund", 3.8e11, 3.3e8, 1151.148, 1151.148, 1139.6365, "2025-05-02"),
+    (2, "Wekeza Maisha Fund", 2.2e10, 2.1e7, 1010.541, 1010.541, 990.3302, "2025-05-02"),
+    (3, "Watoto Fund", 1.3e10, 2.7e7, float("nan"), 477.4466, 472.6721, "2025-05-02"),
+)
+
+
+def test_upsert_inserts_and_returns_the_row_count(pg_conn):
+    create_utt_table(pg_conn)
+    assert upsert_utt_data(FIRST_DAY, conn=pg_conn) == 3
+    assert [row[1] for row in _table(pg_conn)] == ["Umoja Fund", "Watoto Fund", "Wekeza Maisha Fund"]
+
+
+def test_duplicate_keys_in_one_load_keep_the_lowest_row_number(pg_conn):
+    create_utt_table(pg_conn)
+    df = pd.concat([
+        FIRST_DAY,
+        _rows((7, "Umoja Fund", 1.0, 1.0, 999.0, 999.0, 999.0, "2025-05-02")),  # Older copy of row 1
+    ], ignore_index=True)
+
+    assert upsert_utt_data(df, conn=pg_conn) == 3
+    umoja = [row for row in _table(pg_conn) if row[1] == "Umoja Fund"]
+    assert umoja == [(1, "Umoja Fund", 1151.148, "2025-05-02")]
+
+
+def test_reloading_unchanged_rows_writes_nothing(pg_conn):
+    create_utt_table(pg_conn)
+    upsert_utt_data(FIRST_DAY, conn=pg_conn)
+    published = []
+    listener = db.add_change_listener(published.append)
+    try:
+        # The NaN in Watoto Fund is stored as NULL; NULL IS NOT DISTINCT FROM NULL
+        assert upsert_utt_data(FIRST_DAY, conn=pg_conn) == 0
+        assert published == []
+    finally:
+        db._change_listeners.remove(listener)
+
+
+def test_reloading_renumbered_rows_writes_nothing(pg_conn):
+    create_utt_table(pg_conn)
+    upsert_utt_data(FIRST_DAY, conn=pg_conn)
+    renumbered = FIRST_DAY.assign(**{"#": FIRST_DAY["#"] + 10})  # The site numbers from 1 on every scrape
+    published = []
+    listener = db.add_change_listener(published.append)
+    try:
+        assert upsert_utt_data(renumbered, conn=pg_conn) == 0
+        assert published == []
+    finally:
+        db._change_listeners.remove(listener)
+    assert [row[0] for row in _table(pg_conn)] == [1, 3, 2]  # The stored numbers are kept
+
+
+def test_only_changed_and_new_rows_are_counted(pg_conn):
+    create_utt_table(pg_conn)
+    upsert_utt_data(FIRST_DAY, conn=pg_conn)
+    next_load = FIRST_DAY.copy()
+    next_load.loc[0, "Nav Per Unit"] = 1152.0  # Corrected value
+    next_load = pd.concat([
+        next_load,
+        _rows((1, "Umoja Fund", 3.8e11, 3.3e8, 1153.0, 1153.0, 1141.0, "2025-05-05")),  # New day
+    ], ignore_index=True)
+
+    published = []
+    listener = db.add_change_listener(published.append)
+    try:
+        assert upsert_utt_data(next_load, conn=pg_conn) == 2
+        assert published == ["utt_data"]
+    finally:
+        db._change_listeners.remove(listener)
+
+    rows = _table(pg_conn)
+    assert len(rows) == 4
+    assert (1, "Umoja Fund", 1152.0, "2025-05-02") in rows
+    watoto = [row for row in rows if row[1] == "Watoto Fund"][0]
+    assert watoto[2] is None or math.isnan(watoto[2])
+
+
+def test_chunked_load_resolves_duplicates_like_the_whole_file(pg_conn, tmp_path):
+    from fund_fetcher.chunked import clean_csv_in_chunks
+
+    raw = _rows(
+        (1, "Umoja Fund", "380,429,787,331.8930", "330,478,604.2184", "1,151.1480", "1,151.1480", "1,139.6365",
+         "02-05-2025"),
+        (2, "Watoto Fund", "13,217,012,040.6427", "27,683,101.7735", "477.4466", "477.4466", "472.6721",
+         "02-05-2025"),
+        # A stale copy of row 1 in a later chunk: the lowest "#" must still win
+        (3, "Umoja Fund", "1", "1", "999.0000", "999.0000", "999.0000", "02-05-2025"),
+    )
+    path = tmp_path / "raw.csv"
+    raw.to_csv(path, index=False)
+
+    clean_csv_in_chunks(
+        str(path), date_column="Date Valued", bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
+        decimal_columns=["Nav Per Unit", "Sale Price per Unit", "Repurchase Price/Unit"], date_format="%d-%m-%Y",
+        chunk_size=2, to_db=True,
+    )
+
+    assert _table(pg_conn) == [
+        (1, "Umoja Fund", 1151.148, "2025-05-02"),
+        (2, "Watoto Fund", 477.4466, "2025-05-02"),
+    ]
+
+
+def test_chunked_load_merges_nothing_when_cleaning_fails(pg_conn, tmp_path):
+    import pytest
+
+    from fund_fetcher.chunked import clean_csv_in_chunks
+
+    raw = _rows(
+        (1, "Umoja Fund", "1", "1", "1", "1", "1", "02-05-2025"),
+        (2, "Watoto Fund", "1", "1", "1", "1", "1", "not a date"),
+    )
+    path = tmp_path / "raw.csv"
+    raw.to_csv(path, index=False)
+
+    with pytest.raises(ValueError):
+        clean_csv_in_chunks(
+            str(path), date_column="Date Valued", bigint_columns=["Net Asset Value"], date_format="%d-%m-%Y",
+            chunk_size=1, to_db=True,
+        )
+    assert _table(pg_conn) == []
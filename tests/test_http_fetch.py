@@ -0,0 +1,149 @@
+"""
+Offline tests of the HTTP fetch engine against recorded responses on a local stub server.
+"""
+
+import json
+
+import pytest
+
+from conftest import datatables_route, read_fixture
+from fund_fetcher.http_fetch import (
+    fetch_fund_table_http,
+    find_column_keys,
+    find_data_url,
+    iter_datatables_pages,
+    make_session,
+    rows_to_frame,
+)
+
+PAGE_PATH = "/fund-performance"
+DATA_PATH = "/fund-performance/data"
+
+
+@pytest.fixture
+def recorded_site(stub_server):
+    stub_server.routes[PAGE_PATH] = (200, "text/html", read_fixture("utt_fund_performance.html"))
+    stub_server.routes[DATA_PATH] = datatables_route(json.loads(read_fixture("utt_datatables.json")))
+    return stub_server
+
+
+def test_find_data_url_resolves_the_ajax_url_of_the_recorded_page():
+    html = read_fixture("utt_fund_performance.html")
+    assert find_data_url(html, "https://uttamis.co.tz/fund-performance") == \
+        "https://uttamis.co.tz/fund-performance/data"
+
+
+def test_find_data_url_accepts_a_plain_ajax_string():
+    html = '<script>$("#t").DataTable({ajax: "api/funds.json"});</script>'
+    assert find_data_url(html, "http://example.test/funds/") == "http://example.test/funds/api/funds.json"
+
+
+def test_find_data_url_returns_none_without_a_datatables_endpoint():
+    assert find_data_url("<table class='table'></table>", "http://example.test/") is None
+
+
+def test_iter_datatables_pages_reads_every_page(recorded_site):
+    session = make_session()
+    try:
+        pages = list(iter_datatables_pages(session, recorded_site.url(DATA_PATH), page_size=2))
+    finally:
+        session.close()
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [row[1] for page in pages for row in page][:2] == ["Umoja Fund", "Wekeza Maisha Fund"]
+    queries = [query for path, query in recorded_site.requests if path == DATA_PATH]
+    assert [(q["draw"], q["start"], q["length"]) for q in queries] == [("1", "0", "2"), ("2", "2", "2"), ("3", "4", "2")]
+
+
+def test_iter_datatables_pages_stops_on_an_empty_page(stub_server):
+    payload = {"draw": 1, "recordsTotal": 10, "data": [["1", "Umoja Fund"]]}
+    stub_server.routes[DATA_PATH] = datatables_route(payload)  # Claims 10 rows but only has 1
+    session = make_session()
+    try:
+        pages = list(iter_datatables_pages(session, stub_server.url(DATA_PATH), page_size=1))
+    finally:
+        session.close()
+    assert pages == [[["1", "Umoja Fund"]]]
+    assert stub_server.hits(DATA_PATH) == 2
+
+
+def test_fetch_fund_table_http_discovers_the_endpoint_and_pages_through_it(recorded_site):
+    df = fetch_fund_table_http(recorded_site.url(PAGE_PATH), page_size=2)
+
+    assert list(df.columns) == [
+        "#", "Scheme Name", "Net Asset Value", "Outstanding Number of Units", "Nav Per Unit",
+        "Sale Price per Unit", "Repurchase Price/Unit", "Date Valued",
+    ]
+    assert len(df) == 5
+    assert df.loc[4, "Scheme Name"] == "Liquid Fund"
+    assert recorded_site.hits(PAGE_PATH) == 1
+    assert recorded_site.hits(DATA_PATH) == 3
+
+
+def test_fetch_fund_table_http_retries_server_errors(recorded_site):
+    route = recorded_site.routes[DATA_PATH]
+    failures = iter([(503, "text/plain", "busy"), (502, "text/plain", "bad gateway")])
+    recorded_site.routes[DATA_PATH] = lambda query: next(failures, None) or route(query)
+
+    df = fetch_fund_table_http(recorded_site.url(PAGE_PATH))
+
+    assert len(df) == 5
+    assert recorded_site.hits(DATA_PATH) == 3  # Two 5xx answers, then the page
+
+
+def test_fetch_fund_table_http_gives_up_after_the_retries(recorded_site):
+    import requests
+
+    recorded_site.routes[DATA_PATH] = (500, "text/plain", "down")
+    session = make_session(retries=1)
+    try:
+        with pytest.raises(requests.exceptions.RequestException):
+            fetch_fund_table_http(recorded_site.url(PAGE_PATH), session=session)
+    finally:
+        session.close()
+    assert recorded_site.hits(DATA_PATH) == 2  # The first try and one retry
+
+
+OBJECT_PAGE = """
+<table class="table" id="data_table">
+  <thead><tr><th>#</th><th>Scheme Name</th><th>Nav Per Unit</th></tr></thead><tbody></tbody>
+</table>
+<script>
+$("#data_table").DataTable({
+    ajax: {"url": "/fund-performance/data"},
+    columns: [{data: "id"}, {data: "scheme_name"}, {data: "nav_per_unit"}]
+});
+</script>
+"""
+
+
+def test_find_column_keys_reads_the_datatables_columns_option():
+    assert find_column_keys(OBJECT_PAGE) == ["id", "scheme_name", "nav_per_unit"]
+    assert find_column_keys(read_fixture("utt_fund_performance.html")) is None
+
+
+def test_object_rows_are_matched_to_the_headers_by_key(stub_server):
+    # The endpoint sends its keys in another order than the table columns
+    payload = {"draw": 1, "recordsTotal": 2, "data": [
+        {"nav_per_unit": "1,151.1480", "scheme_name": "Umoja Fund", "id": "1"},
+        {"scheme_name": "Watoto Fund", "id": "2", "nav_per_unit": "477.4466"},
+    ]}
+    stub_server.routes[PAGE_PATH] = (200, "text/html", OBJECT_PAGE)
+    stub_server.routes[DATA_PATH] = datatables_route(payload)
+
+    df = fetch_fund_table_http(stub_server.url(PAGE_PATH))
+
+    assert list(df.columns) == ["#", "Scheme Name", "Nav Per Unit"]
+    assert df.values.tolist() == [["1", "Umoja Fund", "1,151.1480"], ["2", "Watoto Fund", "477.4466"]]
+
+
+def test_object_rows_keyed_by_header_name_are_reordered():
+    rows = [{"Nav Per Unit": "477.4466", "Scheme Name": "Watoto Fund"}]
+    df = rows_to_frame(rows, ["Scheme Name", "Nav Per Unit"])
+    assert df.values.tolist() == [["Watoto Fund", "477.4466"]]
+
+
+def test_object_rows_with_unknown_keys_are_rejected():
+    rows = [{"fund": "Watoto Fund", "nav": "477.4466"}]
+    with pytest.raises(ValueError, match="column keys"):
+        rows_to_frame(rows, ["Scheme Name", "Nav Per Unit"])
@@ -0,0 +1,50 @@
+"""
+Tests of the incremental scraper against a page served by the local stub server.
+"""
+
+import pandas as pd
+
+from fund_fetcher.incremental import scrape_incremental
+
+HEADERS = ["#", "Scheme Name", "Nav Per Unit", "Date Valued"]
+
+
+def fund_page(rows):
+    head = "".join(f"<th>{name}</th>" for name in HEADERS)
+    body = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+    return f'<table class="table"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def test_new_rows_are_numbered_after_the_stored_rows(tmp_path, stub_server):
+    raw_path = tmp_path / "raw_data.csv"
+    pd.DataFrame([
+        ["1", "Umoja Fund", "1,150.0000", "01-05-2025"],
+        ["2", "Watoto Fund", "477.0000", "01-05-2025"],
+    ], columns=HEADERS).to_csv(raw_path, index=False)
+    # The site numbers its rows from 1 on every day, so the stored rows now show as #3 and #4
+    stub_server.routes["/funds"] = (200, "text/html", fund_page([
+        ["1", "Umoja Fund", "1,151.1480", "02-05-2025"],
+        ["2", "Watoto Fund", "477.4466", "02-05-2025"],
+        ["3", "Umoja Fund", "1,150.0000", "01-05-2025"],
+        ["4", "Watoto Fund", "477.0000", "01-05-2025"],
+    ]))
+
+    added = scrape_incremental(str(raw_path), page_url=stub_server.url("/funds"))
+
+    assert len(added) == 2
+    stored = pd.read_csv(raw_path, dtype=str)
+    assert stored[["#", "Date Valued"]].values.tolist() == [
+        ["3", "02-05-2025"], ["4", "02-05-2025"], ["1", "01-05-2025"], ["2", "01-05-2025"],
+    ]
+
+
+def test_an_up_to_date_file_is_left_untouched(tmp_path, stub_server):
+    raw_path = tmp_path / "raw_data.csv"
+    pd.DataFrame([["1", "Umoja Fund", "1,150.0000", "01-05-2025"]], columns=HEADERS).to_csv(raw_path, index=False)
+    before = raw_path.read_text()
+    stub_server.routes["/funds"] = (200, "text/html", fund_page([["7", "Umoja Fund", "1,150.0000", "01-05-2025"]]))
+
+    added = scrape_incremental(str(raw_path), page_url=stub_server.url("/funds"))
+
+    assert added.empty
+    assert raw_path.read_text() == before
@@ -0,0 +1,52 @@
+"""
+Tests of the pipeline stage monitor: stage records, the JSON-lines log and the Prometheus file.
+"""
+
+import json
+
+import pytest
+
+from fund_fetcher import instrumentation
+from fund_fetcher.instrumentation import PipelineMonitor
+
+
+def test_stages_are_recorded_and_logged(tmp_path):
+    log_path = tmp_path / "metrics.jsonl"
+    monitor = PipelineMonitor(log_path=str(log_path), run_id="run1")
+
+    with monitor.stage("clean", rows_in=3) as stats:
+        stats.rows_out = 2
+    with pytest.raises(ValueError):
+        with monitor.stage("load"):
+            raise ValueError("no database")
+
+    logged = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [(s["stage"], s["status"], s["rows_in"], s["rows_out"]) for s in logged] == [
+        ("clean", "ok", 3, 2), ("load", "error", None, None),
+    ]
+    assert logged[1]["error"] == "ValueError: no database"
+    assert all(s["run_id"] == "run1" and s["wall_seconds"] >= 0 for s in logged)
+    assert "❌ ValueError: no database" in monitor.summary()
+
+
+def test_prometheus_file_has_one_sample_per_stage(tmp_path):
+    monitor = PipelineMonitor()
+    with monitor.stage("scrape") as stats:
+        stats.rows_out = 5
+
+    path = monitor.write_prometheus(str(tmp_path / "fundfetch.prom"))
+
+    text = open(path, encoding="utf-8").read()
+    assert 'fundfetch_stage_rows_out{stage="scrape"} 5' in text
+    assert 'fundfetch_stage_success{stage="scrape"} 1' in text
+    assert "# TYPE fundfetch_stage_wall_seconds gauge" in text
+    assert not (tmp_path / "fundfetch.prom.tmp").exists()
+
+
+def test_cpu_time_falls_back_without_the_resource_module(monkeypatch):
+    # Windows has no `resource` module; stages are still measured, for this process only
+    monkeypatch.setattr(instrumentation, "resource", None)
+    monitor = PipelineMonitor()
+    with monitor.stage("clean"):
+        sum(range(10_000))
+    assert monitor.stages[0].cpu_seconds >= 0
@@ -0,0 +1,69 @@
+"""
+Tests of the schema-driven normalizer and the `process_fund_csv` dispatcher built on it.
+"""
+
+import pandas as pd
+import pytest
+
+from fund_fetcher import sources as registry
+from fund_fetcher.fetch_utt import process_fund_csv
+from fund_fetcher.normalize import CANONICAL_COLUMNS, compile_plan, normalize_frame
+from fund_fetcher.sources import FundSource, register_source
+
+UTT_CSV = (
+    "#,Scheme Name,Net Asset Value,Outstanding Number of Units,Nav Per Unit,"
+    "Sale Price per Unit,Repurchase Price/Unit,Date Valued\n"
+    '1,Umoja Fund,"380,429,787,331.8930","330,478,604.2184","1,151.1480","1,151.1480","1,139.6365",02-05-2025\n'
+    '2,Watoto Fund,"13,217,012,040.6427","27,683,101.7735",477.4466,477.4466,472.6721,02-05-2025\n'
+)
+
+
+def test_process_fund_csv_keeps_the_row_numbers(tmp_path):
+    raw = tmp_path / "utt_max.csv"
+    raw.write_text(UTT_CSV)
+    output = tmp_path / "utt_cleaned.csv"
+
+    process_fund_csv(str(raw), output_path=str(output))
+
+    cleaned = pd.read_csv(output)
+    assert list(cleaned.columns) == list(CANONICAL_COLUMNS)
+    assert cleaned["#"].tolist() == [1, 2]
+    assert cleaned["Nav Per Unit"].tolist() == [1151.148, 477.4466]
+
+
+def test_providers_without_row_numbers_get_missing_values():
+    raw = pd.DataFrame({
+        "Scheme Name": ["Zan Fund"],
+        "Net Asset Value": ["1,000"],
+        "Outstanding number of units": ["10"],
+    })
+    cleaned = normalize_frame(raw, "zansec")
+    assert str(cleaned["#"].dtype) == "Int64"
+    assert cleaned["#"].isna().all()
+    assert cleaned.loc[0, "Outstanding Number of Units"] == 10.0
+
+
+def test_a_batch_missing_a_declared_column_is_reported_by_name():
+    raw = pd.DataFrame({"Fund": ["Zan Fund"], "Net Asset Value": ["1,000"], "Outstanding number of units": ["10"]})
+    with pytest.raises(ValueError, match="Scheme Name"):
+        compile_plan("zansec").apply(raw)
+
+
+def test_mapping_the_scheme_through_columns_is_rejected_at_compile_time():
+    source = register_source(FundSource(
+        name="stub_bad", scheme_column="Scheme Name", bigint_columns=["NAV"],
+        columns={"NAV": "Net Asset Value", "Fund": "Scheme Name"},
+    ))
+    try:
+        with pytest.raises(ValueError, match="scheme_column"):
+            compile_plan(source)
+    finally:
+        registry._REGISTRY.pop(source.name, None)
+
+
+def test_only_utt_files_are_loaded_into_utt_data(tmp_path):
+    raw = tmp_path / "zansec_max.csv"
+    raw.write_text('Scheme Name,Net Asset Value,Outstanding number of units\nZan Fund,"1,000",10\n')
+    with pytest.raises(ValueError, match="zansec"):
+        process_fund_csv(str(raw), chunk_size=10, output_path=str(tmp_path / "out.csv"), to_db=True)
+    assert not (tmp_path / "out.csv").exists()
@@ -0,0 +1,139 @@
+"""
+The local query API (`query.make_server`) and its result cache, without a database: the
+queries are replaced by counting stubs.
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from datetime import date
+
+import pytest
+
+from fund_fetcher import db, query
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    query.configure_cache(maxsize=query.DEFAULT_CACHE_SIZE, ttl=query.DEFAULT_CACHE_TTL)
+    yield
+    query.configure_cache(maxsize=query.DEFAULT_CACHE_SIZE, ttl=query.DEFAULT_CACHE_TTL)
+
+
+@pytest.fixture
+def latest_calls(monkeypatch):
+    """Replace `latest_nav` with a stub; returns the list of schemes it was asked for."""
+    calls = []
+
+    def latest_nav(scheme):
+        calls.append(scheme)
+        return query.NavPoint(scheme, date(2025, 5, 2), 1151.148, 3.8e11, 3.3e8, 1151.148, 1139.6365)
+
+    monkeypatch.setattr(query, "latest_nav", latest_nav)
+    return calls
+
+
+@pytest.fixture
+def api():
+    server = query.make_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_missing_scheme_is_a_bad_request(api):
+    assert _get(f"{api}/latest") == (400, {"error": "The 'scheme' parameter is required"})
+
+
+def test_missing_date_of_a_nav_lookup_is_a_bad_request(api, monkeypatch):
+    monkeypatch.setattr(query, "_fetch", lambda sql, **params: pytest.fail("no query without a date"))
+    assert _get(f"{api}/nav?scheme=Umoja%20Fund") == (400, {"error": "The 'date' parameter is required"})
+
+
+def test_invalid_date_is_a_bad_request(api):
+    status, _ = _get(f"{api}/nav?scheme=Umoja%20Fund&date=02-05-2025")
+    assert status == 400
+
+
+def test_unknown_route_is_not_found(api):
+    status, _ = _get(f"{api}/nope")
+    assert status == 404
+
+
+def test_unexpected_errors_are_answered_with_a_json_500(api, monkeypatch, capsys):
+    def broken(*args):
+        raise AttributeError("'str' object has no attribute 'isoformat'")
+
+    monkeypatch.setattr(query, "_response", broken)
+
+    assert _get(f"{api}/latest?scheme=Umoja%20Fund") == (500, {"error": "Internal server error"})
+    assert "AttributeError" in capsys.readouterr().err
+
+
+def test_repeated_requests_are_answered_from_the_cache(api, latest_calls):
+    first = _get(f"{api}/latest?scheme=Umoja%20Fund")
+    second = _get(f"{api}/latest?scheme=Umoja%20Fund")
+    _get(f"{api}/latest?scheme=Watoto%20Fund")
+
+    assert first == second
+    assert first[0] == 200 and first[1]["scheme"] == "Umoja Fund"
+    assert latest_calls == ["Umoja Fund", "Watoto Fund"]
+    stats = _get(f"{api}/stats")[1]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_cached_entries_expire_after_the_ttl(latest_calls, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query.time, "monotonic", lambda: now[0])
+    query.configure_cache(ttl=60)
+
+    query._response("/latest", "Umoja Fund", None, None, None)
+    now[0] += 59
+    query._response("/latest", "Umoja Fund", None, None, None)
+    assert latest_calls == ["Umoja Fund"]
+
+    now[0] += 2
+    query._response("/latest", "Umoja Fund", None, None, None)
+    assert latest_calls == ["Umoja Fund", "Umoja Fund"]
+
+
+def test_a_published_change_clears_the_cache(latest_calls):
+    query._response("/latest", "Umoja Fund", None, None, None)
+    db._notify_listeners("utt_fund_metrics")  # Another table: the cache is kept
+    query._response("/latest", "Umoja Fund", None, None, None)
+    assert latest_calls == ["Umoja Fund"]
+
+    db._notify_listeners(query.TABLE)
+    query._response("/latest", "Umoja Fund", None, None, None)
+    assert latest_calls == ["Umoja Fund", "Umoja Fund"]
+
+
+def test_results_computed_before_a_change_are_not_stored():
+    cache = query.QueryCache(maxsize=2, ttl=60)
+    found, generation = cache.get("key")
+    assert not found
+    cache.clear()  # The data changed while the result was being computed
+    cache.put("key", "stale", generation)
+    assert cache.get("key")[0] is False
+
+
+def test_the_least_recently_used_entry_is_evicted():
+    cache = query.QueryCache(maxsize=2, ttl=60)
+    for key in ["a", "b"]:
+        cache.put(key, key.upper(), cache.get(key)[1])
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", "C", cache.get("c")[1])
+    assert [cache.get(key)[0] for key in ["a", "b", "c"]] == [True, False, True]
@@ -0,0 +1,84 @@
+"""
+Tests of the report renderer's chart cache (`report.render_charts`) and PDF assembly.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from fund_fetcher import report
+from fund_fetcher.report import build_report, render_charts, report_charts
+
+HISTORY = pd.DataFrame({
+    "Scheme Name": ["Umoja Fund", "Watoto Fund", "Umoja Fund", "Watoto Fund"],
+    "Date Valued": ["2025-04-30", "2025-04-30", "2025-05-02", "2025-05-02"],
+    "Nav Per Unit": [1150.0, 476.0, 1151.148, 477.4466],
+    "Net Asset Value": [3.7e11, 1.2e10, 3.8e11, 1.3e10],
+})
+
+
+@pytest.fixture
+def drawn(monkeypatch):
+    """Replace the matplotlib drawing with a stub; returns the file names it wrote, in order."""
+    names = []
+
+    def render_chart(kind, title, data, path):
+        names.append(os.path.basename(path))
+        with open(path, "wb") as file:
+            file.write(b"png")
+        return path
+
+    monkeypatch.setattr(report, "render_chart", render_chart)
+    return names
+
+
+def test_a_chart_key_depends_only_on_its_own_input():
+    before = {chart.name: chart.key for chart in report_charts(HISTORY)}
+    # Umoja Fund gets a new valuation; the Watoto Fund chart keeps its key
+    newer = pd.concat([HISTORY, pd.DataFrame({
+        "Scheme Name": ["Umoja Fund"], "Date Valued": ["2025-05-05"],
+        "Nav Per Unit": [1152.0], "Net Asset Value": [3.81e11],
+    })], ignore_index=True)
+    after = {chart.name: chart.key for chart in report_charts(newer)}
+
+    assert after["scheme_watoto_fund"] == before["scheme_watoto_fund"]
+    assert after["scheme_umoja_fund"] != before["scheme_umoja_fund"]
+    assert after["nav_index"] != before["nav_index"]
+
+
+def test_unchanged_charts_are_reused(tmp_path, drawn):
+    charts = report_charts(HISTORY)
+    paths, redrawn = render_charts(charts, str(tmp_path), max_workers=1)
+
+    assert redrawn == [chart.name for chart in charts]
+    assert all(os.path.exists(path) for path in paths)
+
+    drawn.clear()
+    again, redrawn = render_charts(report_charts(HISTORY), str(tmp_path), max_workers=1)
+    assert (again, redrawn, drawn) == (paths, [], [])
+
+
+def test_outdated_images_of_the_same_charts_are_removed(tmp_path, drawn):
+    render_charts(report_charts(HISTORY), str(tmp_path), max_workers=1)
+    (tmp_path / "notes-1234.png").write_bytes(b"kept")  # Not one of the report's charts
+
+    changed = HISTORY.assign(**{"Nav Per Unit": HISTORY["Nav Per Unit"] * 1.01})
+    changed.loc[[1, 3], "Nav Per Unit"] = HISTORY.loc[[1, 3], "Nav Per Unit"]  # Watoto Fund unchanged
+    paths, redrawn = render_charts(report_charts(changed), str(tmp_path), max_workers=1)
+
+    assert sorted(redrawn) == ["aum", "nav_index", "scheme_umoja_fund"]
+    files = [name for name in os.listdir(tmp_path) if name != "notes-1234.png"]
+    assert sorted(files) == sorted(os.path.basename(path) for path in paths)  # One image per chart
+    assert (tmp_path / "notes-1234.png").exists()
+
+
+def test_the_report_is_assembled_from_real_charts(tmp_path):
+    pytest.importorskip("matplotlib")
+    output = tmp_path / "daily_report.pdf"
+
+    redrawn = build_report(HISTORY, str(output), str(tmp_path / "visuals"), sample_fund="watoto", max_workers=1)
+
+    assert redrawn == ["nav_index", "aum", "scheme_watoto_fund", "scheme_umoja_fund"]  # Sample fund first
+    assert output.read_bytes().startswith(b"%PDF")
+    assert build_report(HISTORY, str(output), str(tmp_path / "visuals"), max_workers=1) == []
@@ -0,0 +1,193 @@
+"""
+Tests of the concurrent fetch scheduler: the per-host limiter and the retry handling,
+with the providers pointed at a local stub server.
+"""
+
+import threading
+import time
+
+import pytest
+
+from fund_fetcher import sources as registry
+from fund_fetcher.scheduler import HostLimiter, run_sources
+from fund_fetcher.sources import FundSource, register_source
+
+HEADERS = ["Scheme Name", "Net Asset Value", "Outstanding Number of Units", "Nav Per Unit", "Date Valued"]
+ROWS = [
+    ["Umoja Fund", "380,429,787,331.8930", "330,478,604.2184", "1,151.1480", "02-05-2025"],
+    ["Watoto Fund", "13,217,012,040.6427", "27,683,101.7735", "477.4466", "02-05-2025"],
+]
+
+
+def fund_page(rows=ROWS):
+    head = "".join(f"<th>{name}</th>" for name in HEADERS)
+    body = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+    return f'<table class="table"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+@pytest.fixture
+def stub_sources(stub_server):
+    """Register providers on the stub server; they are removed from the registry afterwards."""
+    added = []
+
+    def add(name, path, **settings):
+        stub_server.routes.setdefault(path, (200, "text/html", fund_page()))
+        added.append(register_source(FundSource(
+            name=name,
+            scheme_column="Scheme Name",
+            page_url=stub_server.url(path),
+            bigint_columns=["Net Asset Value", "Outstanding Number of Units"],
+            decimal_columns=["Nav Per Unit"],
+            date_column="Date Valued",
+            date_format="%d-%m-%Y",
+            **settings,
+        )))
+        return added[-1]
+
+    yield add
+    for source in added:
+        registry._REGISTRY.pop(source.name, None)
+
+
+def test_host_limiter_spaces_requests_by_min_interval():
+    limiter = HostLimiter(max_concurrency=1, min_interval=0.05)
+    started = []
+    for _ in range(3):
+        with limiter.slot():
+            started.append(time.monotonic())
+    gaps = [later - earlier for earlier, later in zip(started, started[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_host_limiter_caps_concurrency():
+    limiter = HostLimiter(max_concurrency=2)
+    lock = threading.Lock()
+    active, peak = 0, 0
+
+    def work():
+        nonlocal active, peak
+        with limiter.slot():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+
+
+def test_sources_are_fetched_and_cleaned(stub_sources):
+    stub_sources("stub_a", "/a", min_interval=0.0)
+    results = run_sources(["stub_a"])
+
+    result = results["stub_a"]
+    assert result.ok and result.attempts == 1
+    assert len(result.raw) == 2
+    assert result.cleaned["Net Asset Value"].tolist() == [380429787331.893, 13217012040.6427]
+    assert result.cleaned["Provider"].tolist() == ["stub_a", "stub_a"]
+    assert str(result.cleaned["Date Valued"].dtype) == "datetime64[ns]"
+
+
+def test_sources_are_cleaned_with_their_declared_schema(stub_server):
+    page = (
+        "<table class='table'><thead><tr><th>Fund</th><th>NAV</th><th>Date</th></tr></thead>"
+        "<tbody><tr><td>Umoja Fund</td><td>380.429.787.331,89</td><td>2025-05-02</td></tr></tbody></table>"
+    )
+    stub_server.routes["/eu"] = (200, "text/html", page)
+    source = register_source(FundSource(
+        name="stub_eu",
+        scheme_column="Fund",
+        page_url=stub_server.url("/eu"),
+        bigint_columns=["NAV"],
+        date_column="Date",
+        date_format="%Y-%m-%d",
+        thousands=".",
+        decimal=",",
+        columns={"NAV": "Net Asset Value", "Date": "Date Valued"},
+        min_interval=0.0,
+    ))
+    try:
+        result = run_sources(["stub_eu"])["stub_eu"]
+    finally:
+        registry._REGISTRY.pop(source.name, None)
+
+    assert result.ok, result.error
+    assert result.cleaned.loc[0, "Scheme Name"] == "Umoja Fund"
+    assert result.cleaned.loc[0, "Net Asset Value"] == 380429787331.89
+
+
+def _recording_page(stub_server, path, delay):
+    # Route serving the fund page slowly, recording the request start times and peak concurrency
+    lock = threading.Lock()
+    stats = {"active": 0, "peak": 0, "started": []}
+
+    def page(query):
+        with lock:
+            stats["active"] += 1
+            stats["peak"] = max(stats["peak"], stats["active"])
+            stats["started"].append(time.monotonic())
+        time.sleep(delay)
+        with lock:
+            stats["active"] -= 1
+        return 200, "text/html", fund_page()
+
+    stub_server.routes[path] = page
+    return stats
+
+
+def test_sources_on_one_host_share_the_lowest_concurrency(stub_server, stub_sources):
+    stats = _recording_page(stub_server, "/slow", delay=0.1)
+    # The first source alone would allow 3 requests at once; the second allows only 1
+    stub_sources("stub_a", "/slow", max_concurrency=3, min_interval=0.0)
+    stub_sources("stub_b", "/slow", max_concurrency=1, min_interval=0.0)
+    stub_sources("stub_c", "/slow", max_concurrency=3, min_interval=0.0)
+
+    results = run_sources(["stub_a", "stub_b", "stub_c"])
+
+    assert all(result.ok for result in results.values())
+    assert stats["peak"] == 1
+
+
+def test_sources_on_one_host_share_the_longest_interval(stub_server, stub_sources):
+    stats = _recording_page(stub_server, "/paced", delay=0.0)
+    stub_sources("stub_a", "/paced", min_interval=0.0)
+    stub_sources("stub_b", "/paced", min_interval=0.1)
+    stub_sources("stub_c", "/paced", min_interval=0.0)
+
+    results = run_sources(["stub_a", "stub_b", "stub_c"])
+
+    assert all(result.ok for result in results.values())
+    started = sorted(stats["started"])
+    assert all(later - earlier >= 0.09 for earlier, later in zip(started, started[1:]))
+
+
+def test_failed_fetches_are_retried_by_the_scheduler_only(stub_server, stub_sources):
+    failures = iter([(503, "text/plain", "busy"), (500, "text/plain", "error")])
+    stub_server.routes["/flaky"] = lambda query: next(failures, None) or (200, "text/html", fund_page())
+    stub_sources("stub_flaky", "/flaky", min_interval=0.0)
+
+    result = run_sources(["stub_flaky"], retries=3, backoff=0.01)["stub_flaky"]
+
+    assert result.ok
+    assert result.attempts == 3
+    assert stub_server.hits("/flaky") == 3  # One request per attempt: the session does not retry on its own
+
+
+def test_a_source_that_keeps_failing_reports_its_error(stub_server, stub_sources):
+    stub_server.routes["/down"] = (503, "text/plain", "down")
+    stub_server.routes["/up"] = (200, "text/html", fund_page())
+    stub_sources("stub_down", "/down", min_interval=0.0)
+    stub_sources("stub_up", "/up", min_interval=0.0)
+
+    results = run_sources(["stub_down", "stub_up"], retries=2, backoff=0.01)
+
+    assert not results["stub_down"].ok
+    assert results["stub_down"].attempts == 3
+    assert stub_server.hits("/down") == 3
+    assert results["stub_up"].ok
@@ -0,0 +1,116 @@
+"""
+Tests of the CSV / Parquet storage tier (`fund_fetcher.storage`).
+"""
+
+import pandas as pd
+import pytest
+
+from fund_fetcher.storage import append_frame, load_frame, read_parquet, save_frame, write_parquet
+
+DATE = "Date Valued"
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["Scheme Name", DATE, "Nav Per Unit"])
+
+
+HISTORY = frame([
+    ("Umoja Fund", "2024-12-30", 1100.0),
+    ("Watoto Fund", "2024-12-30", 470.0),
+    ("Umoja Fund", "2025-01-02", 1101.5),
+    ("Watoto Fund", "2025-01-02", 470.5),
+])
+
+
+def _partitions(path):
+    return sorted(p.name for p in path.iterdir())
+
+
+def test_a_directory_is_partitioned_by_year_with_typed_columns(tmp_path):
+    path = tmp_path / "cleaned"
+    write_parquet(HISTORY, str(path), date_column=DATE)
+
+    assert _partitions(path) == ["year=2024", "year=2025"]
+    df = read_parquet(str(path), date_column=DATE)
+    assert list(df.columns) == ["Scheme Name", DATE, "Nav Per Unit"]
+    assert isinstance(df["Scheme Name"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df[DATE])
+    assert df["Nav Per Unit"].dtype == "float64"
+    assert len(df) == 4
+
+
+def test_rewriting_a_year_keeps_the_other_years(tmp_path):
+    path = tmp_path / "cleaned"
+    write_parquet(HISTORY, str(path), date_column=DATE)
+
+    write_parquet(frame([("Umoja Fund", "2025-01-03", 1102.0)]), str(path), date_column=DATE)
+
+    df = read_parquet(str(path), date_column=DATE)
+    assert df[DATE].dt.strftime("%Y-%m-%d").tolist() == ["2024-12-30", "2024-12-30", "2025-01-03"]
+
+
+def test_filters_are_applied_on_read(tmp_path):
+    path = tmp_path / "cleaned"
+    write_parquet(HISTORY, str(path), date_column=DATE)
+
+    df = read_parquet(str(path), columns=["Scheme Name", "Nav Per Unit"], schemes=["Watoto Fund"],
+                      start="2025-01-01", date_column=DATE)
+
+    assert list(df.columns) == ["Scheme Name", "Nav Per Unit"]
+    assert df["Nav Per Unit"].tolist() == [470.5]
+
+
+@pytest.mark.parametrize("name", ["cleaned.csv", "cleaned.parquet", "cleaned/"])
+def test_every_tier_round_trips_and_filters_alike(tmp_path, name):
+    path = str(tmp_path / name)
+    save_frame(HISTORY, path, date_column=DATE)
+
+    df = load_frame(path, schemes=["Umoja Fund"], start="2024-12-31", end="2025-12-31", date_column=DATE)
+
+    assert df["Scheme Name"].astype(str).tolist() == ["Umoja Fund"]
+    assert df["Nav Per Unit"].tolist() == [1101.5]
+
+
+def test_a_date_range_needs_the_date_column(tmp_path):
+    path = str(tmp_path / "cleaned.csv")
+    save_frame(HISTORY, path)
+    with pytest.raises(ValueError, match="date_column"):
+        load_frame(path, start="2025-01-01")
+
+
+def test_appending_rewrites_only_the_years_of_the_new_rows(tmp_path):
+    path = tmp_path / "metrics"
+    write_parquet(HISTORY, str(path), date_column=DATE)
+    old_year = path / "year=2024" / "part-0.parquet"
+    old_year_written = old_year.stat().st_mtime_ns
+
+    append_frame(frame([("Umoja Fund", "2025-01-03", 1102.0)]), str(path), date_column=DATE)
+
+    assert old_year.stat().st_mtime_ns == old_year_written  # The 2024 partition was not rewritten
+    df = read_parquet(str(path), date_column=DATE)
+    assert df[DATE].dt.strftime("%Y-%m-%d").tolist() == [
+        "2024-12-30", "2024-12-30", "2025-01-02", "2025-01-02", "2025-01-03",
+    ]
+
+
+def test_appending_a_new_year_adds_a_partition(tmp_path):
+    path = tmp_path / "metrics"
+    write_parquet(HISTORY, str(path), date_column=DATE)
+
+    append_frame(frame([("Umoja Fund", "2026-01-02", 1200.0)]), str(path), date_column=DATE)
+
+    assert _partitions(path) == ["year=2024", "year=2025", "year=2026"]
+    assert len(read_parquet(str(path), date_column=DATE)) == 5
+
+
+@pytest.mark.parametrize("name", ["metrics.csv", "metrics.parquet"])
+def test_appending_to_a_file_keeps_its_rows_and_columns(tmp_path, name):
+    path = str(tmp_path / name)
+    append_frame(HISTORY, path, date_column=DATE)  # Created on the first call
+    new = frame([("Umoja Fund", "2025-01-03", 1102.0)])[["Nav Per Unit", DATE, "Scheme Name"]]
+
+    append_frame(new, path, date_column=DATE)
+
+    df = load_frame(path)
+    assert list(df.columns) == ["Scheme Name", DATE, "Nav Per Unit"]
+    assert df["Nav Per Unit"].tolist() == [1100.0, 470.0, 1101.5, 470.5, 1102.0]
@@ -0,0 +1,86 @@
+"""
+Tests of the scheme/date-keyed time-series store (`timeseries.FundSeriesStore`).
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fund_fetcher.storage import load_store
+from fund_fetcher.timeseries import FundSeriesStore, from_day_number, to_day_number
+
+# Newest first, like the website, with a repeated (scheme, date) and a missing date
+HISTORY = pd.DataFrame({
+    "Scheme Name": ["Watoto Fund", "Umoja Fund", "Umoja Fund", "Umoja Fund", "Watoto Fund", "Umoja Fund"],
+    "Date Valued": ["2025-05-02", "2025-05-02", "2025-05-02", "2025-04-30", "2025-04-28", None],
+    "Nav Per Unit": [477.4466, 1151.148, 999.0, 1150.0, 476.0, 1.0],
+    "Net Asset Value": [1.3e10, 3.8e11, 1.0, 3.7e11, 1.2e10, 1.0],
+})
+
+
+@pytest.fixture
+def store():
+    return FundSeriesStore.from_frame(HISTORY)
+
+
+def test_day_numbers_round_trip():
+    assert to_day_number("1970-01-02") == 1
+    assert to_day_number(pd.Timestamp("2025-05-02")) == to_day_number(date(2025, 5, 2))
+    assert from_day_number(to_day_number("2025-05-02")) == date(2025, 5, 2)
+
+
+def test_rows_are_sorted_by_scheme_and_date_and_deduplicated(store):
+    assert store.schemes == ("Umoja Fund", "Watoto Fund")
+    assert len(store) == 4  # The repeated key and the undated row are dropped
+    assert store.scheme_rows("Umoja Fund") == slice(0, 2)
+    assert store.get("Umoja Fund", "2025-05-02", "Nav Per Unit") == 1151.148  # First (newest) row kept
+    assert store.scheme_ids.dtype == np.int16 and store.days.dtype == np.int32
+
+
+def test_exact_and_as_of_lookups(store):
+    assert store.get("Umoja Fund", "2025-05-01") is None
+    assert store.asof("Umoja Fund", "2025-05-01", "Nav Per Unit") == 1150.0  # Last one on or before
+    assert store.asof("Umoja Fund", "2025-04-29") is None  # Before the first valuation
+    assert store.asof("Watoto Fund", "2030-01-01")["Date Valued"] == date(2025, 5, 2)
+    assert store.latest("Watoto Fund", "Nav Per Unit") == 477.4466
+    with pytest.raises(KeyError):
+        store.asof("Unknown Fund", "2025-05-02")
+
+
+def test_range_queries_stay_within_the_scheme(store):
+    series = store.series("Umoja Fund", start="2025-04-01", end="2025-05-01")
+    assert series["Date Valued"].dt.strftime("%Y-%m-%d").tolist() == ["2025-04-30"]
+    assert store.series("Watoto Fund")["Nav Per Unit"].tolist() == [476.0, 477.4466]
+    assert store.series("Umoja Fund", start="2025-06-01").empty
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load_round_trip(store, tmp_path, mmap):
+    path = str(tmp_path / "fund_series.fts")
+    store.save(path)
+
+    loaded = FundSeriesStore.load(path, mmap=mmap)
+
+    assert isinstance(loaded.days, np.memmap) == mmap
+    assert loaded.schemes == store.schemes
+    pd.testing.assert_frame_equal(loaded.to_frame(), store.to_frame())
+    assert loaded.asof("Umoja Fund", "2025-05-01", "Nav Per Unit") == 1150.0
+
+
+def test_loading_another_file_is_rejected(tmp_path):
+    path = tmp_path / "not_a_store.fts"
+    path.write_bytes(b"Scheme Name,Date Valued\n")
+    with pytest.raises(ValueError, match="not a fund series store"):
+        FundSeriesStore.load(str(path))
+
+
+def test_load_store_reads_csv_and_store_files_alike(store, tmp_path):
+    csv_path = str(tmp_path / "cleaned.csv")
+    HISTORY.to_csv(csv_path, index=False)
+    fts_path = str(tmp_path / "fund_series.fts")
+    store.save(fts_path)
+
+    for path in [csv_path, fts_path]:
+        pd.testing.assert_frame_equal(load_store(path).to_frame(), store.to_frame())